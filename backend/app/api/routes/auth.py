@@ -8,8 +8,8 @@ from datetime import timedelta
 
 from app.core.config import settings
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    averify_password,
+    aget_password_hash,
     create_access_token,
     get_current_user
 )
@@ -17,11 +17,12 @@ from app.models.auth import Token, UserCreate, User
 
 router = APIRouter()
 
-# In-memory user store (replace with database in production)
+# In-memory user store (replace with database in production).
+# The admin hash is precomputed so importing this module runs no bcrypt.
 users_db = {
     "admin": {
         "username": "admin",
-        "hashed_password": get_password_hash("1234"),
+        "hashed_password": settings.ADMIN_PASSWORD_HASH,
         "full_name": "Διαχειριστής Συστήματος",
         "role": "admin"
     }
@@ -44,9 +45,17 @@ async def signup(user: UserCreate):
             detail="Το όνομα χρήστη υπάρχει ήδη"
         )
     
+    hashed_password = await aget_password_hash(user.password)
+    # Someone may have taken the name while the password was hashed.
+    if user.username in users_db:
+        raise HTTPException(
+            status_code=400,
+            detail="Το όνομα χρήστη υπάρχει ήδη"
+        )
+    
     users_db[user.username] = {
         "username": user.username,
-        "hashed_password": get_password_hash(user.password),
+        "hashed_password": hashed_password,
         "full_name": user.full_name or user.username,
         "role": "operator"
     }
@@ -62,7 +71,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """Authenticate user and return token"""
     user = get_user(form_data.username)
     
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await averify_password(form_data.password, user["hashed_password"]):
         raise HTTPException(
             status_code=401,
             detail="Λανθασμένα στοιχεία σύνδεσης",
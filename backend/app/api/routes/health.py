@@ -3,21 +3,38 @@ Health check and status routes
 """
 
 from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.security import token_cache
+from app.services import metrics
 
 router = APIRouter()
 
 
 @router.get("/health")
 async def health(request: Request):
-    """Health check endpoint"""
+    """Health check endpoint; dependency results come from the background probes."""
     rag_service = request.app.state.rag_service
-    
+    monitor = getattr(request.app.state, "health_monitor", None)
+    circuits = _circuit_stats(rag_service) or {}
+    degraded = (monitor is not None and not monitor.healthy) or any(
+        circuit["state"] != "closed" for circuit in circuits.values()
+    )
+
     return {
-        "status": "healthy",
-        "rag_initialized": rag_service is not None
+        "status": "degraded" if degraded else "healthy",
+        "rag_initialized": rag_service is not None,
+        "dependencies": monitor.snapshot() if monitor is not None else None,
+        "models": _model_status(rag_service),
     }
 
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Stage and HTTP latency histograms in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/status")
 async def status(request: Request):
     """Detailed status information"""
@@ -29,6 +46,89 @@ async def status(request: Request):
         "rag_service": {
             "initialized": rag_service is not None,
             "ready": rag_service is not None
-        }
+        },
+        "embedding_cache": _embedding_cache_stats(rag_service),
+        "answer_cache": _answer_cache_stats(request),
+        "router": _router_stats(request),
+        "single_flight": _single_flight_stats(request),
+        "scheduler": _scheduler_stats(rag_service),
+        "endpoints": _endpoint_stats(rag_service),
+        "streams": _stream_stats(request),
+        "degradation": _degradation_stats(request),
+        "dependencies": _dependency_stats(request),
+        "circuits": _circuit_stats(rag_service),
+        "rate_limit": _rate_limit_stats(request),
+        "query_log": _query_log_stats(request),
+        "token_cache": token_cache.stats(),
     }
 
+
+def _model_status(rag_service):
+    registry = getattr(rag_service, "llm_registry", None)
+    return registry.status() if registry is not None else None
+
+
+def _endpoint_stats(rag_service):
+    registry = getattr(rag_service, "llm_registry", None)
+    return registry.endpoint_stats() if registry is not None else None
+
+
+def _embedding_cache_stats(rag_service):
+    cache = getattr(getattr(rag_service, "emb_factory", None), "cache", None)
+    return cache.stats() if cache is not None else None
+
+
+
+def _answer_cache_stats(request: Request):
+    orchestrator = getattr(request.app.state, "query_orchestrator", None)
+    cache = getattr(orchestrator, "answer_cache", None)
+    return cache.stats() if cache is not None else None
+
+
+def _router_stats(request: Request):
+    orchestrator = getattr(request.app.state, "query_orchestrator", None)
+    stats = getattr(orchestrator, "router_stats", None)
+    return stats.snapshot() if stats is not None else None
+
+
+def _single_flight_stats(request: Request):
+    orchestrator = getattr(request.app.state, "query_orchestrator", None)
+    single_flight = getattr(orchestrator, "single_flight", None)
+    return single_flight.stats() if single_flight is not None else None
+
+
+def _scheduler_stats(rag_service):
+    scheduler = getattr(rag_service, "scheduler", None)
+    return scheduler.stats() if scheduler is not None else None
+
+
+def _stream_stats(request: Request):
+    orchestrator = getattr(request.app.state, "query_orchestrator", None)
+    stats = getattr(orchestrator, "stream_stats", None)
+    return stats.snapshot() if stats is not None else None
+
+
+def _degradation_stats(request: Request):
+    orchestrator = getattr(request.app.state, "query_orchestrator", None)
+    controller = getattr(orchestrator, "degradation", None)
+    return controller.stats() if controller is not None else None
+
+
+def _dependency_stats(request: Request):
+    monitor = getattr(request.app.state, "health_monitor", None)
+    return monitor.snapshot() if monitor is not None else None
+
+
+def _circuit_stats(rag_service):
+    breakers = getattr(rag_service, "breakers", None)
+    return {name: breaker.stats() for name, breaker in breakers.items()} if breakers else None
+
+
+def _rate_limit_stats(request: Request):
+    limiter = getattr(request.app.state, "rate_limiter", None)
+    return limiter.stats() if limiter is not None else None
+
+
+def _query_log_stats(request: Request):
+    query_log = getattr(request.app.state, "query_log", None)
+    return query_log.stats() if query_log is not None else None
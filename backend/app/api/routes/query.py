@@ -3,19 +3,60 @@ Query routes for RAG system interactions
 """
 
 import json
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request, HTTPException
+import asyncio
+import itertools
+import time
+from contextlib import suppress
+from typing import Dict
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Request, HTTPException, Response
 from fastapi.responses import JSONResponse, StreamingResponse
 import logging
 
+from app.api.streaming import (
+    ClientDisconnected,
+    FlushPolicy,
+    query_events,
+    sse_frame,
+    wait_http_disconnect,
+)
 from app.models.query import QueryRequest, QueryResponse, SourceInfo
+from app.services.metrics import current_timings, server_timing
+from app.services.query_log import log_query
+from app.services.scheduler import AdmissionRejected
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _log_plan(question: str, transport: str, plan, started: float, status: str = "ok", **extra):
+    """Query-log record for a streamed answer (*plan* is None if planning failed)."""
+    timings = dict(plan.timings) if plan is not None else {}
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    if plan is None:
+        log_query(question, transport, "none", "none", timings=timings, status=status, **extra)
+        return
+    log_query(
+        question,
+        transport,
+        plan.mode,
+        plan.label,
+        metas=plan.metas,
+        scores=plan.scores,
+        timings=timings,
+        cached=plan.cached,
+        status=status,
+        degradation=plan.degradation_level,
+        coalesced=plan.coalesced,
+        **extra,
+    )
+
+
 @router.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest, req: Request):
-    """Non-streaming query endpoint for RAG system"""
+async def query(request: QueryRequest, req: Request, response: Response):
+    """Non-streaming query endpoint for RAG system.
+
+    The per-stage breakdown is returned in the ``Server-Timing`` header.
+    """
     
     orchestrator = getattr(req.app.state, "query_orchestrator", None)
     
@@ -35,8 +76,22 @@ async def query(request: QueryRequest, req: Request):
             label="DEMO",
         )
     
+    started = time.perf_counter()
     try:
-        outcome = orchestrator.answer_question(request.question)
+        outcome = await orchestrator.aanswer_question(request.question)
+        timings = current_timings() or {}
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        response.headers["Server-Timing"] = server_timing(timings)
+        log_query(
+            request.question,
+            "http",
+            outcome.mode,
+            outcome.label,
+            metas=outcome.metas,
+            scores=outcome.scores,
+            timings=timings,
+            cached=outcome.cached,
+        )
         
         sources = []
         for text, score, meta in zip(outcome.ctx_texts, outcome.scores, outcome.metas):
@@ -54,10 +109,15 @@ async def query(request: QueryRequest, req: Request):
             demo_mode=False,
             mode=outcome.mode,
             label=outcome.label,
+            cached=outcome.cached,
         )
         
+    except AdmissionRejected as e:
+        _log_plan(request.question, "http", None, started, status="rejected")
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Query failed: {e}", exc_info=True)
+        _log_plan(request.question, "http", None, started, status="error", error=str(e))
         raise HTTPException(
             status_code=500,
             detail=f"Query failed: {str(e)}"
@@ -79,31 +139,58 @@ async def stream_query(request: QueryRequest, req: Request):
             status_code=503
         )
     
+    policy = FlushPolicy.from_cfg(orchestrator.cfg.get("streaming"))
+
     async def generate():
+        started = time.perf_counter()
+        plan = None
         try:
-            plan = orchestrator.plan_question(request.question)
-            
-            # Send sources
-            sources = []
-            for text, score, meta in zip(plan.ctx_texts, plan.scores, plan.metas):
-                sources.append({
-                    "text": text[:200] + "..." if len(text) > 200 else text,
-                    "score": score,
-                    "source": meta.get("source", "Άγνωστη πηγή")
-                })
-            
-            yield f"event: sources\ndata: {json.dumps(sources)}\n\n"
-            
-            # Stream tokens (works for both RAG and chat now)
-            for token in orchestrator.stream_plan(plan):
-                yield f"data: {token}\n\n"
+            events = query_events(
+                orchestrator,
+                request.question,
+                policy,
+                wait_disconnect=lambda: wait_http_disconnect(req.receive),
+            )
+            async for kind, payload in events:
+                if kind == "queued":
+                    yield sse_frame(json.dumps({"position": payload}), "queued")
+                elif kind == "plan":
+                    plan = payload
+                    # Send sources
+                    sources = []
+                    for text, score, meta in zip(plan.ctx_texts, plan.scores, plan.metas):
+                        sources.append({
+                            "text": text[:200] + "..." if len(text) > 200 else text,
+                            "score": score,
+                            "source": meta.get("source", "Άγνωστη πηγή")
+                        })
+                    
+                    yield sse_frame(json.dumps(sources), "sources")
+                else:
+                    # Batched tokens; multi-line text becomes several data: lines
+                    yield sse_frame(payload)
             
             # Send done event
-            yield f"event: done\ndata: {json.dumps({'mode': plan.mode, 'label': plan.label})}\n\n"
+            yield sse_frame(
+                json.dumps({
+                    "mode": plan.mode,
+                    "label": plan.label,
+                    "cached": plan.cached,
+                    "timings": plan.timings,
+                    "degradation": plan.degradation_level,
+                }),
+                "done",
+            )
+            _log_plan(request.question, "sse", plan, started)
             
+        except ClientDisconnected:
+            # Generation was cancelled; nobody is left to send to.
+            logger.info("SSE client disconnected; generation cancelled")
+            _log_plan(request.question, "sse", plan, started, status="cancelled")
         except Exception as e:
             logger.error(f"Stream error: {e}", exc_info=True)
-            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+            _log_plan(request.question, "sse", plan, started, status="error", error=str(e))
+            yield sse_frame(json.dumps({"error": str(e)}), "error")
     
     return StreamingResponse(
         generate(),
@@ -116,84 +203,167 @@ async def stream_query(request: QueryRequest, req: Request):
         )
 
 
+async def _answer_ws(send, orchestrator, question: str, policy: FlushPolicy):
+    """Answer one question through *send*; cancelling the task stops generation."""
+    started = time.perf_counter()
+    plan = None
+    try:
+        async for kind, payload in query_events(orchestrator, question, policy, stream_all=False):
+            if kind == "queued":
+                await send({"type": "queued", "position": payload})
+            elif kind == "outcome":
+                outcome = payload
+                await send({
+                    "type": "sources",
+                    "sources": [],
+                    "mode": outcome.mode,
+                    "label": outcome.label,
+                })
+                await send({
+                    "type": "token",
+                    "content": outcome.answer,
+                    "mode": outcome.mode,
+                    "label": outcome.label,
+                })
+            elif kind == "plan":
+                plan = payload
+                if plan.mode != "rag":
+                    continue
+                sources = []
+                for text, score, meta in zip(plan.ctx_texts, plan.scores, plan.metas):
+                    sources.append({
+                        "text": text[:200] + "..." if len(text) > 200 else text,
+                        "score": score,
+                        "source": meta.get("source", "Άγνωστη πηγή")
+                    })
+                
+                await send({
+                    "type": "sources",
+                    "sources": sources,
+                    "mode": plan.mode,
+                    "label": plan.label,
+                })
+            else:
+                # mode/label were sent once with the sources message
+                await send({"type": "token", "content": payload})
+        
+        if plan.mode != "rag":
+            await send({"type": "done", "mode": plan.mode})
+            _log_plan(question, "ws", plan, started)
+            return
+        
+        await send({
+            "type": "done",
+            "mode": plan.mode,
+            "label": plan.label,
+            "cached": plan.cached,
+            "timings": plan.timings,
+            "degradation": plan.degradation_level,
+        })
+        _log_plan(question, "ws", plan, started)
+        
+    except asyncio.CancelledError:
+        # Cancelled by the client; the socket may be gone.
+        _log_plan(question, "ws", plan, started, status="cancelled")
+        with suppress(Exception):
+            await send({"type": "cancelled"})
+        raise
+    except Exception as e:
+        logger.error(f"Error processing question: {e}", exc_info=True)
+        _log_plan(question, "ws", plan, started, status="error", error=str(e))
+        with suppress(Exception):
+            await send({
+                "type": "error",
+                "content": str(e)
+            })
+
+
+def _ws_sender(websocket: WebSocket, lock: asyncio.Lock, request_id):
+    """Send function for one request: tags every message with *request_id*
+    and serialises writes from concurrent answers on the same socket."""
+    async def send(message: dict) -> None:
+        message["request_id"] = request_id
+        async with lock:
+            await websocket.send_json(message)
+    return send
+
+
 @router.websocket("/ws/chat")
 async def websocket_chat(websocket: WebSocket):
-    """WebSocket endpoint for streaming chat responses"""
+    """WebSocket endpoint for streaming chat responses.
+
+    Every question may carry a string or integer ``request_id`` (one is
+    assigned otherwise) that is echoed, as a string, on all of its messages. Questions run concurrently, up to
+    ``streaming.ws_max_concurrent`` per connection, and their messages are
+    interleaved. ``{"type": "cancel", "request_id": ...}`` cancels one
+    answer; without a ``request_id`` it cancels all of them.
+    """
     await websocket.accept()
     
+    tasks: Dict[str, asyncio.Task] = {}
+    lock = asyncio.Lock()
+    next_id = itertools.count(1)
     try:
         orchestrator = getattr(websocket.app.state, "query_orchestrator", None)
+        stream_cfg = (orchestrator.cfg.get("streaming") if orchestrator else None) or {}
+        policy = FlushPolicy.from_cfg(stream_cfg)
+        max_concurrent = stream_cfg.get("ws_max_concurrent", 4)
         
+        # Keep reading while answers stream so new questions, cancels and
+        # disconnects are seen immediately.
         while True:
             data = await websocket.receive_json()
+            request_id = data.get("request_id")
+            if request_id is not None:
+                # Ids key the task table; anything unhashable or ambiguous
+                # is refused for this message only.
+                if isinstance(request_id, bool) or not isinstance(request_id, (str, int)):
+                    await _ws_sender(websocket, lock, None)({
+                        "type": "error",
+                        "content": "request_id must be a string or an integer"
+                    })
+                    continue
+                request_id = str(request_id)
+            
+            if data.get("type") in ("cancel", "stop"):
+                if request_id is None:
+                    targets = list(tasks.values())
+                else:
+                    targets = [tasks[request_id]] if request_id in tasks else []
+                for task in targets:
+                    task.cancel()
+                continue
+            
+            if request_id is None:
+                request_id = f"ws-{next(next_id)}"
+            send = _ws_sender(websocket, lock, request_id)
             question = data.get("question", "")
             
             if not question:
-                await websocket.send_json({"error": "No question provided"})
+                await send({"type": "error", "content": "No question provided"})
                 continue
             
             if not orchestrator:
-                await websocket.send_json({
+                await send({
                     "type": "error",
                     "content": "Το σύστημα RAG δεν είναι διαθέσιμο."
                 })
                 continue
             
-            try:
-                plan = orchestrator.plan_question(question)
-                
-                if plan.mode != "rag":
-                    outcome = orchestrator.fulfill_plan(plan)
-                    await websocket.send_json({
-                        "type": "sources",
-                        "sources": [],
-                        "mode": outcome.mode,
-                        "label": outcome.label,
-                    })
-                    await websocket.send_json({
-                        "type": "token",
-                        "content": outcome.answer,
-                        "mode": outcome.mode,
-                        "label": outcome.label,
-                    })
-                    await websocket.send_json({"type": "done", "mode": outcome.mode})
-                    continue
-                
-                sources = []
-                for text, score, meta in zip(plan.ctx_texts, plan.scores, plan.metas):
-                    sources.append({
-                        "text": text[:200] + "..." if len(text) > 200 else text,
-                        "score": score,
-                        "source": meta.get("source", "Άγνωστη πηγή")
-                    })
-                
-                await websocket.send_json({
-                    "type": "sources",
-                    "sources": sources,
-                    "mode": plan.mode,
-                    "label": plan.label,
-                })
-                
-                for token in orchestrator.stream_plan(plan):
-                    await websocket.send_json({
-                        "type": "token",
-                        "content": token,
-                        "mode": plan.mode,
-                        "label": plan.label,
-                    })
-                
-                await websocket.send_json({
-                    "type": "done",
-                    "mode": plan.mode,
-                    "label": plan.label,
-                })
-                
-            except Exception as e:
-                logger.error(f"Error processing question: {e}", exc_info=True)
-                await websocket.send_json({
+            if request_id in tasks:
+                await send({"type": "error", "content": "Duplicate request_id"})
+                continue
+            
+            if len(tasks) >= max_concurrent:
+                await send({
                     "type": "error",
-                    "content": str(e)
+                    "content": f"Too many concurrent questions (max {max_concurrent})"
                 })
+                continue
+            
+            task = asyncio.create_task(_answer_ws(send, orchestrator, question, policy))
+            tasks[request_id] = task
+            task.add_done_callback(lambda _, rid=request_id: tasks.pop(rid, None))
             
     except WebSocketDisconnect:
         logger.info("Client disconnected from WebSocket")
@@ -206,3 +376,7 @@ async def websocket_chat(websocket: WebSocket):
             })
         except:
             pass
+    finally:
+        # Stop generating for a client that is gone.
+        for task in list(tasks.values()):
+            task.cancel()
@@ -0,0 +1,162 @@
+"""
+Streaming helpers shared by the SSE and WebSocket query routes
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from app.services.scheduler import queue_listener
+
+
+Event = Tuple[str, Any]
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its answer was being produced."""
+
+
+@dataclass
+class FlushPolicy:
+    """When buffered tokens are written out.
+
+    The first batch of a stream is flushed at once, so batching does not
+    delay the first token. After that, a batch is flushed ``interval``
+    seconds after its first token or as soon as it holds ``max_bytes`` of
+    UTF-8 text, whichever comes first. Both at zero disables batching (one
+    frame per token).
+    """
+
+    interval: float = 0.03
+    max_bytes: int = 1024
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0 or self.max_bytes > 0
+
+    @classmethod
+    def from_cfg(cls, cfg: Optional[Dict]) -> "FlushPolicy":
+        cfg = cfg or {}
+        return cls(
+            interval=cfg.get("flush_interval_ms", 30) / 1000.0,
+            max_bytes=cfg.get("flush_bytes", 1024),
+        )
+
+
+def sse_frame(data: str, event: Optional[str] = None) -> str:
+    """Encode one SSE message; every line of *data* gets its own ``data:`` field."""
+    lines = data.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    head = f"event: {event}\n" if event else ""
+    return head + "".join(f"data: {line}\n" for line in lines) + "\n"
+
+
+async def read_events(events: asyncio.Queue, policy: FlushPolicy) -> AsyncIterator[Event]:
+    """Yield events from *events* until ``("end", None)``, merging consecutive
+    ``("token", text)`` events according to *policy*.
+
+    An ``("error", exc)`` event re-raises *exc*.
+    """
+    loop = asyncio.get_running_loop()
+    held: Optional[Event] = None
+    first = True
+    while True:
+        kind, payload = held if held is not None else await events.get()
+        held = None
+        if kind == "end":
+            return
+        if kind == "error":
+            raise payload
+        if kind == "disconnected":
+            raise ClientDisconnected()
+        if kind != "token" or not policy.enabled:
+            yield kind, payload
+            continue
+
+        parts = [payload]
+        size = len(payload.encode("utf-8"))
+        # The first batch only takes what is already queued.
+        deadline = loop.time() + (0.0 if first else policy.interval)
+        first = False
+        while True:
+            # Take whatever is already queued, up to the byte threshold.
+            while held is None and (not policy.max_bytes or size < policy.max_bytes):
+                try:
+                    item = events.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item[0] != "token":
+                    held = item
+                    break
+                parts.append(item[1])
+                size += len(item[1].encode("utf-8"))
+            remaining = deadline - loop.time()
+            full = policy.max_bytes and size >= policy.max_bytes
+            if held is not None or full or remaining <= 0:
+                break
+            # One timer per batch rather than one wait per token.
+            await asyncio.sleep(remaining)
+            deadline = loop.time()
+        yield "token", "".join(parts)
+
+
+async def query_events(
+    orchestrator,
+    question: str,
+    policy: FlushPolicy,
+    stream_all: bool = True,
+    wait_disconnect: Optional[Callable[[], Awaitable[None]]] = None,
+) -> AsyncIterator[Event]:
+    """Plan and answer *question* in a background task, yielding events.
+
+    Events are ``("queued", position)`` while an LLM call waits for a
+    scheduler slot, ``("plan", plan)``, then ``("token", text)`` batches,
+    or a single ``("outcome", outcome)`` for non-RAG plans when
+    *stream_all* is false.
+
+    Closing this generator cancels the task, which closes the model
+    stream. If *wait_disconnect* returns first, the same happens and
+    :class:`ClientDisconnected` is raised.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def produce():
+        # The listener lives in this task's context only.
+        queue_listener.set(lambda position: events.put_nowait(("queued", position)))
+        try:
+            plan = await orchestrator.aplan_question(question)
+            events.put_nowait(("plan", plan))
+            if plan.mode != "rag" and not stream_all:
+                events.put_nowait(("outcome", await orchestrator.afulfill_plan(plan)))
+            else:
+                async with aclosing(orchestrator.astream_plan(plan)) as stream:
+                    async for token in stream:
+                        events.put_nowait(("token", token))
+            events.put_nowait(("end", None))
+        except Exception as exc:
+            events.put_nowait(("error", exc))
+
+    async def watch():
+        await wait_disconnect()
+        task.cancel()
+        events.put_nowait(("disconnected", None))
+
+    task = asyncio.create_task(produce())
+    watcher = asyncio.create_task(watch()) if wait_disconnect is not None else None
+    try:
+        async for event in read_events(events, policy):
+            yield event
+    finally:
+        task.cancel()
+        if watcher is not None:
+            watcher.cancel()
+
+
+async def wait_http_disconnect(receive) -> None:
+    """Return once the ASGI server reports that the HTTP client is gone."""
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
@@ -34,6 +34,24 @@ class Settings(BaseSettings):
     )
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 480  # 8 hours
+    # bcrypt runs in this many threads, off the event loop.
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Verified token claims are reused for this long (never past "exp").
+    TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+    # bcrypt hash of the seeded admin's password (default: "1234").
+    ADMIN_PASSWORD_HASH: str = os.getenv(
+        "ADMIN_PASSWORD_HASH",
+        "$2b$12$v8TotxE4XKAjQqxFrwOlw.utTIe6JzPn2KOqozFjMHW0kgE72TzVG"
+    )
+    
+    # Rate limiting: requests per period per user (or IP without a token),
+    # plus an optional budget of generated LLM tokens per period (0 = off).
+    RATE_LIMIT_CALLS: int = int(os.getenv("RATE_LIMIT_CALLS", "100"))
+    RATE_LIMIT_PERIOD_SECONDS: int = int(os.getenv("RATE_LIMIT_PERIOD_SECONDS", "60"))
+    RATE_LIMIT_LLM_TOKENS: int = int(os.getenv("RATE_LIMIT_LLM_TOKENS", "0"))
+    RATE_LIMIT_LLM_PERIOD_SECONDS: int = int(os.getenv("RATE_LIMIT_LLM_PERIOD_SECONDS", "600"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
     
     # RAG Configuration
     RAG_CONFIG_PATH: str = os.getenv("RAG_CONFIG_PATH", "backend/config/config.yml")
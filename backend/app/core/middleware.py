@@ -1,98 +1,148 @@
 """
 Security middleware and additional protections
+
+These are plain ASGI middleware rather than ``BaseHTTPMiddleware``: they
+do not run the endpoint in a separate task or re-wrap the response body,
+so streaming responses such as ``/api/stream`` pass straight through.
+Headers are injected at ``http.response.start``.
 """
 
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.middleware.trustedhost import TrustedHostMiddleware
 import time
-from collections import defaultdict
-from datetime import datetime, timedelta
 
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.rate_limit import RateLimiter, retry_after
+from app.services.llm_providers import token_listener
+from app.services.metrics import observe_http
+from app.services.query_log import access_log_enabled, log_access
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+
+class RateLimitMiddleware:
     """
-    Simple rate limiting middleware
+    Token-bucket rate limiting per user (JWT subject) or client IP
     In production, use Redis-based rate limiting
+
+    With an LLM-token budget, the tokens generated while serving a request
+    are charged to its key through ``token_listener``.
     """
     
-    def __init__(self, app, calls: int = 100, period: int = 60):
-        super().__init__(app)
-        self.calls = calls
-        self.period = period
-        self.clients = defaultdict(list)
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
     
-    async def dispatch(self, request: Request, call_next):
-        # Get client identifier (IP address)
-        client_ip = request.client.host
-        
-        # Clean old entries
-        now = datetime.now()
-        self.clients[client_ip] = [
-            req_time for req_time in self.clients[client_ip]
-            if now - req_time < timedelta(seconds=self.period)
-        ]
-        
-        # Check rate limit
-        if len(self.clients[client_ip]) >= self.calls:
-            return JSONResponse(
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = self.limiter.key(scope)
+        allowed, wait = self.limiter.admit(key)
+        if not allowed:
+            response = JSONResponse(
                 status_code=429,
                 content={
                     "detail": "Πάρα πολλές αιτήσεις. Παρακαλώ δοκιμάστε ξανά αργότερα.",
                     "error": "rate_limit_exceeded"
-                }
+                },
+                headers={"Retry-After": retry_after(wait)},
             )
-        
-        # Add current request
-        self.clients[client_ip].append(now)
-        
-        response = await call_next(request)
-        return response
+            await response(scope, receive, send)
+            return
+
+        if self.limiter.tokens is None:
+            await self.app(scope, receive, send)
+            return
+        # Tasks started for this request (streaming, generation) inherit it.
+        reset = token_listener.set(lambda n: self.limiter.charge(key, n))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            token_listener.reset(reset)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+class SecurityHeadersMiddleware:
     """
     Add security headers to all responses
     """
+
+    HEADERS = (
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Strict-Transport-Security", "max-age=31536000; includeSubDomains"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+    )
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # Remove server header
-        if "Server" in response.headers:
-            del response.headers["Server"]
-        
-        return response
-
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                # Security headers
+                for name, value in self.HEADERS:
+                    headers[name] = value
+                # Remove server header
+                if "server" in headers:
+                    del headers["server"]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class RequestLoggingMiddleware:
     """
     Log all requests for audit purposes
+
+    Records go to the ``hermes.access`` logger (see app.services.query_log)
+    while the query log is running with ``access`` enabled.
     """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
     
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log request (in production, send to proper logging service)
-        print(f"[{datetime.now().isoformat()}] "
-              f"{request.method} {request.url.path} "
-              f"- Status: {response.status_code} "
-              f"- Duration: {duration:.3f}s "
-              f"- Client: {request.client.host}")
-        
-        return response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_timed(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Label by route template so path parameters do not explode the series.
+                route = scope.get("route")
+                observe_http(
+                    scope["method"],
+                    getattr(route, "path", "unmatched"),
+                    status_code,
+                    time.perf_counter() - start_time,
+                )
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            # Only queued for the JSONL access log; without one running,
+            # every request would end up in the application log.
+            if access_log_enabled():
+                # Duration covers the whole body, streamed responses included.
+                duration = time.perf_counter() - start_time
+                client = scope.get("client")
+                log_access(
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    duration,
+                    client[0] if client else "unknown",
+                )
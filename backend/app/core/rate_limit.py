@@ -0,0 +1,152 @@
+"""
+Token-bucket rate limiting keyed by user or client address
+
+Every key (the JWT subject when the request carries a valid bearer token,
+the client IP otherwise) owns a bucket of ``capacity`` tokens that refills
+continuously at ``capacity / period`` per second. A request costs one
+token; with ``llm_tokens`` set, each key also has a second bucket charged
+with the LLM tokens generated for it, which may go into debt until it has
+refilled. Both checks are O(1).
+
+Buckets live in an insertion-ordered dict with the least recently used
+key first. A key is dropped once its buckets would have refilled
+completely (forgetting it changes nothing), or when more than
+``max_keys`` keys are tracked.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.security import decode_claims
+
+
+class TokenBucket:
+    """Buckets of one size for many keys."""
+
+    def __init__(self, capacity: float, period: float) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / period
+
+    def level(self, state: List[float], now: float) -> float:
+        """Refill *state* (``[tokens, updated]``) up to *now* and return its tokens."""
+        tokens = min(self.capacity, state[0] + (now - state[1]) * self.rate)
+        state[0] = tokens
+        state[1] = now
+        return tokens
+
+    def wait(self, tokens: float, needed: float) -> float:
+        """Seconds until a bucket holding *tokens* has *needed*."""
+        return max(0.0, (needed - tokens) / self.rate)
+
+    def full_after(self, state: List[float], now: float) -> bool:
+        return state[0] + (now - state[1]) * self.rate >= self.capacity
+
+
+class RateLimiter:
+    """Per-key request bucket plus an optional LLM-token bucket."""
+
+    def __init__(
+        self,
+        calls: int = 100,
+        period: float = 60.0,
+        llm_tokens: Optional[int] = None,
+        llm_period: float = 60.0,
+        max_keys: int = 10000,
+    ) -> None:
+        self.requests = TokenBucket(calls, period)
+        self.tokens = TokenBucket(llm_tokens, llm_period) if llm_tokens else None
+        self.max_keys = max_keys
+        # key -> [[request tokens, updated], [llm tokens, updated] or None]
+        self._keys: Dict[str, List[Optional[List[float]]]] = {}
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+        self.llm_tokens_charged = 0
+
+    def _state(self, key: str, now: float) -> List[Optional[List[float]]]:
+        state = self._keys.pop(key, None)
+        if state is None:
+            state = [
+                [self.requests.capacity, now],
+                [self.tokens.capacity, now] if self.tokens is not None else None,
+            ]
+        self._evict(now)
+        # Re-inserting keeps the dict ordered from least to most recently used.
+        self._keys[key] = state
+        return state
+
+    def _evict(self, now: float) -> None:
+        while self._keys:
+            key = next(iter(self._keys))
+            if len(self._keys) < self.max_keys and not self._idle(self._keys[key], now):
+                return
+            del self._keys[key]
+            self.evicted += 1
+
+    def _idle(self, state, now: float) -> bool:
+        requests, tokens = state
+        return self.requests.full_after(requests, now) and (
+            tokens is None or self.tokens.full_after(tokens, now)
+        )
+
+    def admit(self, key: str) -> Tuple[bool, float]:
+        """Take one request token for *key*; returns (allowed, retry-after seconds)."""
+        now = time.monotonic()
+        requests, tokens = self._state(key, now)
+        available = self.requests.level(requests, now)
+        wait = self.requests.wait(available, 1.0)
+        if tokens is not None:
+            # A key in debt waits until it is back above zero.
+            wait = max(wait, self.tokens.wait(self.tokens.level(tokens, now), 1.0))
+        if wait > 0:
+            self.rejected += 1
+            return False, wait
+        requests[0] = available - 1.0
+        self.allowed += 1
+        return True, 0.0
+
+    def charge(self, key: str, llm_tokens: int) -> None:
+        """Debit *llm_tokens* generated for *key*."""
+        if self.tokens is None or llm_tokens <= 0:
+            return
+        now = time.monotonic()
+        state = self._state(key, now)[1]
+        state[0] = self.tokens.level(state, now) - llm_tokens
+        self.llm_tokens_charged += llm_tokens
+
+    def key(self, scope) -> str:
+        """``user:<sub>`` for a valid bearer token, else ``ip:<client address>``."""
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                subject = token_subject(value.decode("latin-1"))
+                if subject:
+                    return f"user:{subject}"
+                break
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._keys),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+            "llm_tokens_charged": self.llm_tokens_charged,
+        }
+
+
+def token_subject(authorization: str) -> Optional[str]:
+    """Subject of a verified ``Bearer`` token, or ``None``."""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    # Shares the verified-claims cache with get_current_user.
+    payload = decode_claims(token)
+    return payload.get("sub") if payload is not None else None
+
+
+def retry_after(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
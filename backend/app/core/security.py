@@ -1,9 +1,18 @@
 """
 Security utilities for authentication and authorization
+
+bcrypt takes a few hundred milliseconds per call, so async code hashes
+and verifies passwords through ``averify_password``/``aget_password_hash``,
+which run it in a small dedicated thread pool instead of on the event
+loop. Verified token claims are kept in a TTL cache so that repeated
+requests with the same bearer token skip the signature check.
 """
 
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -17,6 +26,50 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# At most PASSWORD_HASH_WORKERS bcrypt calls run at once; the rest queue.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+class TokenCache:
+    """Claims of verified tokens, each kept for ``ttl`` seconds or until it expires."""
+
+    def __init__(self, ttl: float, size: int) -> None:
+        self.ttl = ttl
+        self.size = size
+        # token -> (claims, unix time the entry stops being valid), oldest first
+        self._entries: Dict[str, tuple] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(token)
+        if entry is not None:
+            if time.time() < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(token, None)
+        self.misses += 1
+        return None
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if self.ttl <= 0 or self.size <= 0:
+            return
+        expires = time.time() + self.ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires = min(expires, exp)
+        while len(self._entries) >= self.size:
+            self._entries.pop(next(iter(self._entries)), None)
+        self._entries[token] = (claims, expires)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE_TTL_SECONDS, settings.TOKEN_CACHE_SIZE)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -28,6 +81,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    """``verify_password`` in the password-hash thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, verify_password, plain_password, hashed_password)
+
+
+async def aget_password_hash(password: str) -> str:
+    """``get_password_hash`` in the password-hash thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -43,17 +108,29 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def decode_token(token: str) -> dict:
-    """Decode and verify a JWT token"""
+def decode_claims(token: str) -> Optional[dict]:
+    """Claims of a valid JWT token (cached), or ``None``"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
+        return None
+    token_cache.put(token, payload)
+    return payload
+
+
+def decode_token(token: str) -> dict:
+    """Decode and verify a JWT token"""
+    payload = decode_claims(token)
+    if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return payload
 
 
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
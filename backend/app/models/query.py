@@ -25,3 +25,4 @@ class QueryResponse(BaseModel):
     demo_mode: bool = False
     mode: str = "rag"
     label: str = "NEED_RAG"
+    cached: bool = False
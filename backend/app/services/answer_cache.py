@@ -0,0 +1,201 @@
+"""Semantic cache of generated answers, keyed by the user's question.
+
+Lookups are two-step: an exact match on the normalized question, then a
+nearest-neighbour match over the embeddings of cached questions, accepted
+only above ``similarity_threshold``. Entries expire after ``ttl_seconds``,
+the least recently used are evicted beyond ``max_entries``, and the whole
+cache is dropped whenever ingestion bumps the index generation.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.services.embedding_cache import normalize_text
+from app.services.manifest import IndexGeneration
+
+
+def cache_key(question: str) -> str:
+    """Exact-match key: NFC, collapsed whitespace, case-folded."""
+    return normalize_text(question).casefold()
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    mode: str
+    label: str
+    ctx_texts: List[str] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    metas: List[Dict] = field(default_factory=list)
+    vector: Optional[np.ndarray] = None
+    created: float = 0.0
+
+
+class AnswerCache:
+    """In-process LRU of answers with exact and embedding-similarity lookup."""
+
+    def __init__(
+        self,
+        generation: IndexGeneration,
+        max_entries: int = 2000,
+        ttl_seconds: float = 86400.0,
+        similarity_threshold: float = 0.92,
+    ) -> None:
+        self.generation = generation
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = generation.current()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # ------------------------------------------------------------ internals
+    def _check_generation(self) -> None:
+        generation = self.generation.current()
+        if generation != self._generation:
+            self._entries.clear()
+            self._matrix = None
+            self._generation = generation
+            self.invalidations += 1
+
+    def _expired(self, entry: CachedAnswer, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry.created > self.ttl_seconds
+
+    def _drop(self, key: str) -> None:
+        self._entries.pop(key, None)
+        self._matrix = None
+
+    def _similarity_matrix(self) -> Optional[np.ndarray]:
+        """Stacked unit vectors of cached questions, rebuilt after changes."""
+        if self._matrix is None:
+            self._keys = [k for k, e in self._entries.items() if e.vector is not None]
+            if not self._keys:
+                return None
+            self._matrix = np.stack([self._entries[k].vector for k in self._keys])
+        return self._matrix
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    # --------------------------------------------------------------- public
+    def get_exact(self, question: str) -> Optional[CachedAnswer]:
+        """Exact lookup only; cheap enough to run before embedding the question."""
+        key = cache_key(question)
+        now = time.time()
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._expired(entry, now):
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry
+
+    def get_similar(self, vector: Sequence[float]) -> Optional[CachedAnswer]:
+        """Nearest cached question by cosine similarity, if above the threshold."""
+        q = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            self._check_generation()
+            matrix = self._similarity_matrix()
+            if matrix is None or matrix.shape[1] != q.shape[0]:
+                self.misses += 1
+                return None
+            sims = matrix @ q
+            best = int(np.argmax(sims))
+            key = self._keys[best]
+            entry = self._entries[key]
+            if sims[best] < self.similarity_threshold or self._expired(entry, now):
+                if self._expired(entry, now):
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.semantic_hits += 1
+            return entry
+
+    def put(
+        self,
+        question: str,
+        answer: str,
+        mode: str,
+        label: str,
+        ctx_texts: List[str],
+        scores: List[float],
+        metas: List[Dict],
+        vector: Optional[Sequence[float]] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        """Store an answer; ``generation`` is the one seen before generating it,
+        so answers computed against a superseded index are not cached."""
+        key = cache_key(question)
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            mode=mode,
+            label=label,
+            ctx_texts=list(ctx_texts),
+            scores=list(scores),
+            metas=list(metas),
+            vector=self._unit(vector) if vector is not None else None,
+            created=time.time(),
+        )
+        with self._lock:
+            self._check_generation()
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def current_generation(self) -> int:
+        return self.generation.current()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        hits = self.exact_hits + self.semantic_hits
+        return {
+            "entries": len(self._entries),
+            "generation": self._generation,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+def build_answer_cache(cfg: Optional[Dict], generation: IndexGeneration) -> Optional[AnswerCache]:
+    """Create an :class:`AnswerCache` from the ``answer_cache`` section."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    return AnswerCache(
+        generation,
+        max_entries=cfg.get("max_entries", 2000),
+        ttl_seconds=cfg.get("ttl_seconds", 86400),
+        similarity_threshold=cfg.get("similarity_threshold", 0.92),
+    )
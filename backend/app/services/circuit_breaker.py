@@ -0,0 +1,231 @@
+"""Circuit breakers for the services the RAG pipeline depends on.
+
+A breaker starts closed. After ``failure_threshold`` consecutive failures
+it opens and every call fails at once with :class:`CircuitOpen`, without
+touching the dependency. ``reset_seconds`` later it goes half-open: one
+trial call (or a successful health probe) closes it again, a failed one
+re-opens it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import aclosing, closing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(RuntimeError):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(f"{name} is unavailable (circuit open)")
+        self.name = name
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with a single half-open trial call."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        timeout: Optional[float] = None,
+        is_failure: Callable[[BaseException], bool] = lambda exc: True,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.timeout = timeout
+        self.is_failure = is_failure
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def check(self) -> None:
+        """Fail fast while open, without taking the half-open trial.
+
+        For callers about to queue for a resource before calling through
+        the breaker.
+        """
+        if self.state == OPEN:
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpen(self.name)
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpen`."""
+        with self._lock:
+            state = self.state
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._trial:
+                # Let exactly one request find out whether it is back.
+                self._trial = True
+                return
+            self.rejected += 1
+        raise CircuitOpen(self.name)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial = False
+            self._state = CLOSED
+
+    def record_failure(self, exc: BaseException) -> None:
+        with self._lock:
+            self._trial = False
+            self.last_error = str(exc) or type(exc).__name__
+            self._failures += 1
+            if self._state != CLOSED or self._failures >= self.failure_threshold:
+                if self._state == CLOSED:
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def record_probe(self, exc: Optional[BaseException] = None) -> None:
+        """Apply a background health probe; success only closes once half-open."""
+        if exc is not None:
+            self.record_failure(exc)
+        elif self.state == HALF_OPEN:
+            self.record_success()
+
+    def _release_trial(self) -> None:
+        with self._lock:
+            self._trial = False
+
+    def _after(self, exc: Optional[BaseException]) -> None:
+        if exc is None:
+            self.record_success()
+        elif self.is_failure(exc):
+            self.record_failure(exc)
+        else:
+            # Not the dependency's fault.
+            self._release_trial()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        self.before_call()
+        try:
+            result = fn()
+        except Exception as exc:
+            self._after(exc)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self._after(None)
+        return result
+
+    def stream(self, fn: Callable[[], Iterator[T]]) -> Iterator[T]:
+        """Yield from ``fn()``; the first item counts as a success."""
+        self.before_call()
+        first = True
+        try:
+            with closing(fn()) as stream:
+                for item in stream:
+                    if first:
+                        first = False
+                        self.record_success()
+                    yield item
+        except Exception as exc:
+            self._after(exc)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        if first:
+            self.record_success()
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()``, bounded by ``timeout`` when one is set."""
+        self.before_call()
+        try:
+            if self.timeout is not None:
+                result = await asyncio.wait_for(fn(), self.timeout)
+            else:
+                result = await fn()
+        except Exception as exc:
+            self._after(exc)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        self._after(None)
+        return result
+
+    async def astream(self, fn: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Async variant of :meth:`stream`."""
+        self.before_call()
+        first = True
+        try:
+            async with aclosing(fn()) as stream:
+                async for item in stream:
+                    if first:
+                        first = False
+                        self.record_success()
+                    yield item
+        except Exception as exc:
+            self._after(exc)
+            raise
+        except BaseException:
+            self._release_trial()
+            raise
+        if first:
+            self.record_success()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "last_error": self.last_error,
+        }
+
+
+def build_breakers(
+    cfg: Optional[Dict], failures: Optional[Dict[str, Callable[[BaseException], bool]]] = None
+) -> Dict[str, CircuitBreaker]:
+    """Breakers for every dependency listed in the ``circuit_breakers`` section.
+
+    Top-level values are defaults for each dependency's own sub-section.
+    """
+    if not cfg or not cfg.get("enabled", False):
+        return {}
+    defaults = {k: v for k, v in cfg.items() if not isinstance(v, dict)}
+    breakers = {}
+    for name, own in cfg.items():
+        if not isinstance(own, dict):
+            continue
+        settings = {**defaults, **own}
+        kwargs = {}
+        if failures and name in failures:
+            kwargs["is_failure"] = failures[name]
+        breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=settings.get("failure_threshold", 5),
+            reset_seconds=settings.get("reset_seconds", 30.0),
+            timeout=settings.get("timeout_seconds"),
+            **kwargs,
+        )
+    return breakers
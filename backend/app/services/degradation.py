@@ -0,0 +1,179 @@
+"""Load-driven degradation of the RAG pipeline.
+
+The controller watches the number of LLM calls waiting for a scheduler slot
+and the p95 time to first token of recent RAG answers. While either is over
+its limit it raises the degradation level one step at a time; each level
+keeps the cheaper settings of the ones below it:
+
+    0  normal
+    1  skip the reranker
+    2  lower ``vector_db.top_k``
+    3  switch the answer model to ``degradation.fast_llm``
+    4  lower ``max_tokens``
+
+Once both signals have stayed well under their limits for
+``recover_seconds`` it steps back down, again one level at a time.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.services.metrics import DEGRADATION_LEVEL
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVEL = 4
+
+
+@dataclass(frozen=True)
+class DegradationProfile:
+    """Pipeline settings for one degradation level."""
+
+    level: int = 0
+    rerank: bool = True
+    top_k: Optional[int] = None
+    llm: Optional[Dict[str, Any]] = None
+    max_tokens: Optional[int] = None
+
+    @property
+    def changes_llm(self) -> bool:
+        return self.llm is not None or self.max_tokens is not None
+
+
+NORMAL = DegradationProfile()
+
+
+def build_profiles(
+    top_k: Optional[int], fast_llm: Optional[Dict[str, Any]], max_tokens: Optional[int]
+) -> List[DegradationProfile]:
+    """Profiles for levels 0..MAX_LEVEL; a lever that is not configured is a no-op."""
+    return [
+        NORMAL,
+        DegradationProfile(1, rerank=False),
+        DegradationProfile(2, rerank=False, top_k=top_k),
+        DegradationProfile(3, rerank=False, top_k=top_k, llm=fast_llm),
+        DegradationProfile(4, rerank=False, top_k=top_k, llm=fast_llm, max_tokens=max_tokens),
+    ]
+
+
+class DegradationController:
+    """Chooses the current :class:`DegradationProfile` from load signals."""
+
+    def __init__(
+        self,
+        profiles: List[DegradationProfile],
+        queue_depth: Callable[[], int],
+        ttft_slo: float = 4.0,
+        queue_high: int = 4,
+        queue_low: int = 1,
+        recover_ratio: float = 0.6,
+        window_seconds: float = 60.0,
+        min_samples: int = 5,
+        step_seconds: float = 10.0,
+        recover_seconds: float = 30.0,
+    ) -> None:
+        self.profiles = profiles
+        self.queue_depth = queue_depth
+        self.ttft_slo = ttft_slo
+        self.queue_high = queue_high
+        self.queue_low = queue_low
+        self.recover_ratio = recover_ratio
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self.step_seconds = step_seconds
+        self.recover_seconds = recover_seconds
+        self.level = 0
+        DEGRADATION_LEVEL.set(0)
+        self.changes = 0
+        self._samples: Deque[Tuple[float, float]] = deque(maxlen=1000)
+        self._changed_at = time.monotonic()
+        self._calm_since: Optional[float] = None
+        self._seconds_at_level = [0.0] * len(profiles)
+
+    def record_ttft(self, seconds: float) -> None:
+        self._samples.append((time.monotonic(), seconds))
+
+    def p95_ttft(self) -> Optional[float]:
+        cutoff = time.monotonic() - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        if len(self._samples) < self.min_samples:
+            return None
+        values = sorted(sample for _, sample in self._samples)
+        return values[min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)]
+
+    def profile(self) -> DegradationProfile:
+        """Re-evaluate the load and return the profile for new requests."""
+        now = time.monotonic()
+        depth = self.queue_depth()
+        p95 = self.p95_ttft()
+        overloaded = depth >= self.queue_high or (p95 is not None and p95 > self.ttft_slo)
+        calm = depth <= self.queue_low and (p95 is None or p95 < self.ttft_slo * self.recover_ratio)
+
+        if overloaded:
+            self._calm_since = None
+            if self.level < len(self.profiles) - 1 and now - self._changed_at >= self.step_seconds:
+                self._set_level(self.level + 1, now, depth, p95)
+        elif calm:
+            if self._calm_since is None:
+                self._calm_since = now
+            if self.level > 0 and now - max(self._calm_since, self._changed_at) >= self.recover_seconds:
+                self._set_level(self.level - 1, now, depth, p95)
+        else:
+            # Between the two thresholds: hold the current level.
+            self._calm_since = None
+        return self.profiles[self.level]
+
+    def _set_level(self, level: int, now: float, depth: int, p95: Optional[float]) -> None:
+        self._seconds_at_level[self.level] += now - self._changed_at
+        logger.warning(
+            "Degradation level %d -> %d (queue %d, p95 TTFT %s)",
+            self.level,
+            level,
+            depth,
+            f"{p95 * 1000:.0f} ms" if p95 is not None else "n/a",
+        )
+        self.level = level
+        DEGRADATION_LEVEL.set(level)
+        self.changes += 1
+        self._changed_at = now
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.p95_ttft()
+        seconds = list(self._seconds_at_level)
+        seconds[self.level] += time.monotonic() - self._changed_at
+        return {
+            "level": self.level,
+            "queue_depth": self.queue_depth(),
+            "p95_ttft_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "ttft_slo_ms": self.ttft_slo * 1000,
+            "samples": len(self._samples),
+            "changes": self.changes,
+            "seconds_at_level": [round(s, 1) for s in seconds],
+        }
+
+
+def build_degradation(
+    cfg: Optional[Dict], queue_depth: Callable[[], int]
+) -> Optional[DegradationController]:
+    """Create a :class:`DegradationController` from the ``degradation`` section."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    return DegradationController(
+        build_profiles(cfg.get("top_k"), cfg.get("fast_llm"), cfg.get("max_tokens")),
+        queue_depth,
+        ttft_slo=cfg.get("ttft_slo_ms", 4000) / 1000.0,
+        queue_high=cfg.get("queue_high", 4),
+        queue_low=cfg.get("queue_low", 1),
+        recover_ratio=cfg.get("recover_ratio", 0.6),
+        window_seconds=cfg.get("window_seconds", 60.0),
+        min_samples=cfg.get("min_samples", 5),
+        step_seconds=cfg.get("step_seconds", 10.0),
+        recover_seconds=cfg.get("recover_seconds", 30.0),
+    )
@@ -0,0 +1,187 @@
+"""Content-addressed embedding cache: in-memory LRU over a SQLite file.
+
+Keys are derived from ``(provider, model, normalized text)`` so the same
+chunk or question is embedded once, regardless of which file or user it
+came from. The SQLite file runs in WAL mode and can be shared by the
+ingestion script and every API worker.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys (NFC, collapsed whitespace)."""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU + SQLite) cache of float32 embedding vectors."""
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 500_000,
+        memory_entries: int = 10_000,
+        evict_batch: int = 1_000,
+    ) -> None:
+        self.path = Path(path).expanduser().resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.evict_batch = evict_batch
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings(accessed)"
+        )
+        self._conn.commit()
+        self._inserts_since_check = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> str:
+        payload = f"{provider}\x00{model}\x00{normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return cached vectors for *keys*; missing keys are simply absent."""
+        found: Dict[str, np.ndarray] = {}
+        disk_keys: List[str] = []
+        with self._lock:
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+                    self.memory_hits += 1
+                elif key not in found:
+                    disk_keys.append(key)
+
+            if disk_keys:
+                unique = list(dict.fromkeys(disk_keys))
+                rows = []
+                for start in range(0, len(unique), 500):
+                    part = unique[start:start + 500]
+                    marks = ",".join("?" * len(part))
+                    rows.extend(
+                        self._conn.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({marks})",
+                            part,
+                        ).fetchall()
+                    )
+                now = time.time()
+                for key, blob in rows:
+                    vec = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vec
+                    self._remember(key, vec)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE embeddings SET accessed = ? WHERE key = ?",
+                        [(now, key) for key, _ in rows],
+                    )
+                    self._conn.commit()
+                hit_keys = {key for key, _ in rows}
+                for key in disk_keys:
+                    if key in hit_keys:
+                        self.disk_hits += 1
+                    else:
+                        self.misses += 1
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, Sequence[float]]]) -> None:
+        now = time.time()
+        rows = []
+        with self._lock:
+            for key, vector in items:
+                vec = np.asarray(vector, dtype=np.float32)
+                self._remember(key, vec)
+                rows.append((key, int(vec.shape[0]), vec.tobytes(), now))
+            if not rows:
+                return
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._inserts_since_check += len(rows)
+            if self._inserts_since_check >= self.evict_batch:
+                self._inserts_since_check = 0
+                self._evict()
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self) -> None:
+        """Drop least-recently-used rows once the disk tier exceeds its budget."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY accessed LIMIT ?)",
+            (excess,),
+        )
+        self._conn.commit()
+        self.evictions += excess
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def build_cache(cfg: Optional[Dict]) -> Optional[EmbeddingCache]:
+    """Create an :class:`EmbeddingCache` from the ``embeddings.cache`` section."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    return EmbeddingCache(
+        path=cfg.get("path", "data/embedding_cache.sqlite"),
+        max_entries=cfg.get("max_entries", 500_000),
+        memory_entries=cfg.get("memory_entries", 10_000),
+    )
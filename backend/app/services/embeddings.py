@@ -1,22 +1,53 @@
 from __future__ import annotations
 
-from typing import List
+import asyncio
+from typing import Dict, List, Optional
 
+import httpx
 from langchain_ollama import OllamaEmbeddings
 import os
 
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.embedding_cache import build_cache
+from app.services.endpoint_pool import Endpoint, EndpointPool
+
 
 class EmbeddingFactory:
     """Factory that abstracts different embedding backends."""
 
-    def __init__(self, provider: str, model: str, batch_size: int = 16):
+    def __init__(
+        self,
+        provider: str,
+        model: str,
+        batch_size: int = 16,
+        cache: Optional[Dict] = None,
+        endpoints: Optional[List[str]] = None,
+        pool: Optional[EndpointPool] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        timeout: Optional[httpx.Timeout] = None,
+    ):
         self.provider = provider
         self.model = model
         self.batch_size = batch_size
+        # One backend per endpoint when the model is served by several boxes.
+        self._backends: Dict[str, OllamaEmbeddings] = {}
+        self._pool: Optional[EndpointPool] = None
+        self.breaker = breaker
+        client_kwargs = {"timeout": timeout} if timeout is not None else {}
 
-        if provider == "ollama":
+        if provider == "ollama" and endpoints:
+            urls = [url.rstrip("/") for url in endpoints]
+            self._backends = {
+                url: OllamaEmbeddings(model=model, base_url=url, client_kwargs=client_kwargs)
+                for url in urls
+            }
+            self._backend = self._backends[urls[0]]
+            self._pool = pool or EndpointPool([Endpoint(url) for url in urls])
+        elif provider == "ollama":
             base_url = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
-            self._backend = OllamaEmbeddings(model=model, base_url=base_url)
+            self._backend = OllamaEmbeddings(
+                model=model, base_url=base_url, client_kwargs=client_kwargs
+            )
         elif provider == "st":
             from sentence_transformers import SentenceTransformer
 
@@ -24,9 +55,27 @@ class EmbeddingFactory:
         else:
             raise ValueError(f"Unknown embedding provider: {provider}")
 
-    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        self.cache = build_cache(cache)
+
+    def _on_backend(self, fn):
+        """``fn(backend)`` on the endpoint picked by the pool, if any, behind
+        the circuit breaker."""
+        if self._pool is None:
+            call = lambda: fn(self._backend)
+        else:
+            call = lambda: self._pool.call(lambda url: fn(self._backends[url]))
+        return call() if self.breaker is None else self.breaker.call(call)
+
+    async def _aon_backend(self, fn):
+        if self._pool is None:
+            call = lambda: fn(self._backend)
+        else:
+            call = lambda: self._pool.acall(lambda url: fn(self._backends[url]))
+        return await (call() if self.breaker is None else self.breaker.acall(call))
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
         if hasattr(self._backend, "embed_documents"):
-            return self._backend.embed_documents(texts)
+            return self._on_backend(lambda backend: backend.embed_documents(texts))
 
         # sentence-transformers backend
         return self._backend.encode(
@@ -35,9 +84,77 @@ class EmbeddingFactory:
             show_progress_bar=False,
         ).tolist()
 
-    def embed_query(self, text: str) -> List[float]:
+    def _embed_query(self, text: str) -> List[float]:
         if hasattr(self._backend, "embed_query"):
-            return self._backend.embed_query(text)
+            return self._on_backend(lambda backend: backend.embed_query(text))
 
         return self._backend.encode([text])[0].tolist()
 
+    def _cache_lookup(self, texts: List[str]):
+        """Split *texts* into cached vectors and the unique texts still to embed."""
+        keys = [self.cache.make_key(self.provider, self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    def _cache_store(self, found, missing: Dict[str, str], vectors) -> None:
+        new_items = list(zip(missing.keys(), vectors))
+        self.cache.put_many(new_items)
+        for key, vec in new_items:
+            found[key] = vec
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self._embed_texts(texts)
+
+        keys, found, missing = self._cache_lookup(texts)
+        if missing:
+            vectors = self._embed_texts(list(missing.values()))
+            self._cache_store(found, missing, vectors)
+        return [list(map(float, found[key])) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            return self._embed_query(text)
+
+        keys, found, missing = self._cache_lookup([text])
+        if missing:
+            self._cache_store(found, missing, [self._embed_query(text)])
+        return list(map(float, found[keys[0]]))
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return await self._aembed_texts(texts)
+
+        # SQLite lookups are short but still blocking; keep them off the loop.
+        keys, found, missing = await asyncio.to_thread(self._cache_lookup, texts)
+        if missing:
+            vectors = await self._aembed_texts(list(missing.values()))
+            await asyncio.to_thread(self._cache_store, found, missing, vectors)
+        return [list(map(float, found[key])) for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        if self.cache is None:
+            return await self._aembed_query(text)
+
+        keys, found, missing = await asyncio.to_thread(self._cache_lookup, [text])
+        if missing:
+            vector = await self._aembed_query(text)
+            await asyncio.to_thread(self._cache_store, found, missing, [vector])
+        return list(map(float, found[keys[0]]))
+
+    async def _aembed_query(self, text: str) -> List[float]:
+        if hasattr(self._backend, "aembed_query"):
+            return await self._aon_backend(lambda backend: backend.aembed_query(text))
+
+        return await asyncio.to_thread(self._embed_query, text)
+
+    async def _aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        if hasattr(self._backend, "aembed_documents"):
+            return await self._aon_backend(lambda backend: backend.aembed_documents(texts))
+
+        # sentence-transformers is CPU/GPU bound; keep it off the event loop
+        return await asyncio.to_thread(self._embed_texts, texts)
@@ -0,0 +1,251 @@
+"""Least-outstanding-requests balancing over several Ollama endpoints.
+
+Each endpoint (one inference box) tracks its in-flight requests, latency
+and failures. After ``eject_after`` consecutive failures it is ejected for
+``eject_seconds`` and only readmitted early by a successful health probe.
+Calls that fail to reach an endpoint are retried on the next one, as long
+as nothing has been returned to the caller yet.
+"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from contextlib import aclosing, closing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set, TypeVar
+
+import httpx
+
+
+T = TypeVar("T")
+
+# Weight of the newest sample in the latency moving average.
+_LATENCY_ALPHA = 0.2
+
+# Endpoints are shared by every pool that lists them, and pools are used from
+# the event loop and from worker threads alike.
+_LOCK = threading.Lock()
+
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """Whether *exc* means the endpoint itself is unreachable or failing."""
+    if isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    # ollama.ResponseError and httpx.HTTPStatusError carry the HTTP status.
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+
+class Endpoint:
+    """Load and health state of one endpoint URL."""
+
+    def __init__(self, url: str, eject_after: int = 3, eject_seconds: float = 30.0) -> None:
+        self.url = url
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.latency: Optional[float] = None
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def observe(self, seconds: float) -> None:
+        """Record the time the endpoint took to start responding."""
+        with _LOCK:
+            if self.latency is None:
+                self.latency = seconds
+            else:
+                self.latency += _LATENCY_ALPHA * (seconds - self.latency)
+
+    def succeeded(self) -> None:
+        self.consecutive_failures = 0
+
+    def failed(self, exc: BaseException) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(exc) or type(exc).__name__
+        if self.consecutive_failures >= self.eject_after:
+            if self.healthy:
+                self.ejections += 1
+            self.ejected_until = time.monotonic() + self.eject_seconds
+
+    def probed(self, exc: Optional[BaseException] = None) -> None:
+        """Apply a health probe result: readmit on success."""
+        with _LOCK:
+            if exc is None:
+                self.consecutive_failures = 0
+                self.ejected_until = 0.0
+            else:
+                self.failed(exc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "healthy": self.healthy,
+            "in_flight": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "latency_ms": self.latency * 1000 if self.latency is not None else None,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointPool:
+    """Routes calls to the healthy :class:`Endpoint` with the fewest in flight.
+
+    Ties go to the endpoint with the lower latency, then round robin. If every
+    endpoint is ejected the one due back first is used rather than failing.
+    """
+
+    def __init__(self, endpoints: List[Endpoint]) -> None:
+        if not endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self._turn = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _acquire(self, exclude: Set[str]) -> Endpoint:
+        with _LOCK:
+            candidates = [e for e in self.endpoints if e.url not in exclude]
+            healthy = [e for e in candidates if e.healthy]
+            if healthy:
+                turn = next(self._turn)
+                n = len(healthy)
+                endpoint = min(
+                    enumerate(healthy),
+                    key=lambda item: (
+                        item[1].outstanding,
+                        item[1].latency or 0.0,
+                        (item[0] - turn) % n,
+                    ),
+                )[1]
+            else:
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def _release(self, endpoint: Endpoint, exc: Optional[BaseException] = None) -> None:
+        with _LOCK:
+            endpoint.outstanding -= 1
+            if exc is None:
+                endpoint.succeeded()
+            elif is_endpoint_failure(exc):
+                endpoint.failed(exc)
+
+    def _retry(self, exc: BaseException, tried: Set[str]) -> bool:
+        return is_endpoint_failure(exc) and len(tried) < len(self.endpoints)
+
+    def call(self, fn: Callable[[str], T]) -> T:
+        """Run ``fn(url)`` on the chosen endpoint, failing over on errors."""
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.url)
+            started = time.perf_counter()
+            try:
+                result = fn(endpoint.url)
+            except Exception as exc:
+                self._release(endpoint, exc)
+                if self._retry(exc, tried):
+                    continue
+                raise
+            except BaseException as exc:
+                self._release(endpoint, exc)
+                raise
+            endpoint.observe(time.perf_counter() - started)
+            self._release(endpoint)
+            return result
+
+    async def acall(self, fn: Callable[[str], Awaitable[T]]) -> T:
+        """Async variant of :meth:`call`."""
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.url)
+            started = time.perf_counter()
+            try:
+                result = await fn(endpoint.url)
+            except Exception as exc:
+                self._release(endpoint, exc)
+                if self._retry(exc, tried):
+                    continue
+                raise
+            except BaseException as exc:
+                # Cancelled: neither a success nor the endpoint's fault.
+                self._release(endpoint, exc)
+                raise
+            endpoint.observe(time.perf_counter() - started)
+            self._release(endpoint)
+            return result
+
+    def stream(self, fn: Callable[[str], Iterator[T]]) -> Iterator[T]:
+        """Yield from ``fn(url)``; fails over only before the first item.
+
+        The endpoint counts as in flight until the stream is exhausted or
+        closed, and its latency is the time to the first item.
+        """
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.url)
+            started = time.perf_counter()
+            first = True
+            try:
+                with closing(fn(endpoint.url)) as stream:
+                    for item in stream:
+                        if first:
+                            first = False
+                            endpoint.observe(time.perf_counter() - started)
+                        yield item
+            except Exception as exc:
+                self._release(endpoint, exc)
+                if first and self._retry(exc, tried):
+                    continue
+                raise
+            except BaseException as exc:
+                self._release(endpoint, exc)
+                raise
+            self._release(endpoint)
+            return
+
+    async def astream(self, fn: Callable[[str], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Async variant of :meth:`stream`."""
+        tried: Set[str] = set()
+        while True:
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.url)
+            started = time.perf_counter()
+            first = True
+            try:
+                async with aclosing(fn(endpoint.url)) as stream:
+                    async for item in stream:
+                        if first:
+                            first = False
+                            endpoint.observe(time.perf_counter() - started)
+                        yield item
+            except Exception as exc:
+                self._release(endpoint, exc)
+                if first and self._retry(exc, tried):
+                    continue
+                raise
+            except BaseException as exc:
+                self._release(endpoint, exc)
+                raise
+            self._release(endpoint)
+            return
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {e.url: e.snapshot() for e in self.endpoints}
@@ -0,0 +1,123 @@
+"""Background health probes for external dependencies.
+
+Each dependency registers an async probe that raises when the service is
+down. :meth:`HealthMonitor.run` calls every probe each ``interval`` seconds
+(bounded by ``timeout``), caches the outcome and round-trip latency for the
+health routes, and feeds it to the dependency's circuit breaker so an open
+circuit can close without waiting for a user request to try it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.services.circuit_breaker import CircuitBreaker
+
+
+logger = logging.getLogger(__name__)
+
+Probe = Callable[[], Awaitable[Optional[Dict[str, Any]]]]
+
+
+@dataclass
+class ProbeResult:
+    ok: Optional[bool] = None
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "age_seconds": round(time.time() - self.checked_at, 1) if self.checked_at else None,
+            "error": self.error,
+            **({"details": self.details} if self.details else {}),
+        }
+
+
+class HealthMonitor:
+    """Runs dependency probes periodically and caches their results."""
+
+    def __init__(self, interval: float = 10.0, timeout: float = 2.0) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self._probes: Dict[str, Probe] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.results: Dict[str, ProbeResult] = {}
+
+    def add(self, name: str, probe: Probe, breaker: Optional[CircuitBreaker] = None) -> None:
+        self._probes[name] = probe
+        if breaker is not None:
+            self._breakers[name] = breaker
+        self.results[name] = ProbeResult()
+
+    async def check(self, name: str) -> ProbeResult:
+        started = time.perf_counter()
+        result = ProbeResult(checked_at=time.time())
+        error: Optional[BaseException] = None
+        try:
+            result.details = await asyncio.wait_for(self._probes[name](), self.timeout) or {}
+            result.ok = True
+        except Exception as exc:
+            error = exc
+            result.ok = False
+            result.error = str(exc) or type(exc).__name__
+        result.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        previous = self.results.get(name)
+        if previous is not None and previous.ok is not None and previous.ok != result.ok:
+            log = logger.info if result.ok else logger.warning
+            log("Dependency %s is %s", name, "up" if result.ok else f"down: {result.error}")
+        self.results[name] = result
+        breaker = self._breakers.get(name)
+        if breaker is not None:
+            breaker.record_probe(error)
+        return result
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(name) for name in self._probes))
+
+    async def run(self) -> None:
+        """Probe every dependency each ``interval`` seconds until cancelled."""
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.interval)
+
+    @property
+    def healthy(self) -> bool:
+        """False once any dependency's last probe failed."""
+        return all(result.ok is not False for result in self.results.values())
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        snapshot = {}
+        for name, result in self.results.items():
+            snapshot[name] = result.snapshot()
+            breaker = self._breakers.get(name)
+            if breaker is not None:
+                snapshot[name]["circuit"] = breaker.state
+        return snapshot
+
+
+def build_health_monitor(cfg: Optional[Dict], rag_service) -> HealthMonitor:
+    """Monitor for the Ollama servers and, when used, Weaviate of *rag_service*.
+
+    Reads the optional ``health`` section.
+    """
+    cfg = cfg or {}
+    monitor = HealthMonitor(
+        interval=cfg.get("probe_interval_seconds", 10.0),
+        timeout=cfg.get("probe_timeout_seconds", 2.0),
+    )
+    breakers = rag_service.breakers
+    registry = rag_service.llm_registry
+    monitor.add("ollama", lambda: registry.probe(monitor.timeout), breakers.get("ollama"))
+    vector_db = rag_service.vector_db
+    if vector_db.backend == "weaviate":
+        monitor.add("weaviate", lambda: asyncio.to_thread(vector_db.ping), breakers.get("weaviate"))
+    return monitor
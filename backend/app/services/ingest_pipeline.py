@@ -0,0 +1,276 @@
+"""Staged, pipelined corpus ingestion.
+
+Three stages run concurrently and are connected by bounded queues so that a
+slow stage applies backpressure to the ones in front of it:
+
+* **parse**  – a process pool loads PDF/Markdown files and splits them.
+* **embed**  – worker threads turn chunk batches into vectors.
+* **write**  – worker threads push embedded batches to the vector store
+  (and to the lexical index, when hybrid search is enabled).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.loaders import load_doc
+from app.services.manifest import chunk_id
+from app.services.splitter import TitleSplitter
+
+
+Chunk = Tuple[str, Dict]
+
+_STOP = object()
+
+# One splitter per worker process, built on first use.
+_worker_splitter: Optional[TitleSplitter] = None
+
+
+def load_and_split(
+    path: str, splitter_cfg: Dict, source_key: str
+) -> Tuple[str, List[Chunk]]:
+    """Process-pool entry point: parse one file into ``(text, metadata)`` chunks.
+
+    Each chunk gets a deterministic ``chunk_id`` derived from *source_key*,
+    its ordinal and its text, so re-ingesting a file upserts in place.
+    """
+    global _worker_splitter
+    if _worker_splitter is None:
+        _worker_splitter = TitleSplitter(
+            chunk_size=splitter_cfg["chunk_size"],
+            chunk_overlap=splitter_cfg["chunk_overlap"],
+            separators=splitter_cfg.get("separators", ("\n\n", "\n**", "\n")),
+        )
+
+    documents = load_doc(Path(path))
+    chunks: List[Chunk] = []
+    for ordinal, chunk in enumerate(_worker_splitter.split_documents(documents)):
+        metadata = dict(chunk.metadata)
+        metadata.setdefault("source", path)
+        metadata["chunk_id"] = chunk_id(source_key, ordinal, chunk.page_content)
+        chunks.append((chunk.page_content, metadata))
+    return source_key, chunks
+
+
+@dataclass
+class StageStats:
+    """Item counter and active wall-clock window for one pipeline stage."""
+
+    name: str
+    unit: str
+    items: int = 0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, count: int) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            if self.started is None:
+                self.started = now
+            self.items += count
+            self.finished = now
+
+    def mark_started(self) -> None:
+        with self._lock:
+            if self.started is None:
+                self.started = time.perf_counter()
+
+    @property
+    def seconds(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class IngestStats:
+    parse: StageStats = field(default_factory=lambda: StageStats("parse", "docs"))
+    embed: StageStats = field(default_factory=lambda: StageStats("embed", "chunks"))
+    write: StageStats = field(default_factory=lambda: StageStats("write", "vectors"))
+    wall_seconds: float = 0.0
+    # source key -> chunk IDs produced by the parse stage
+    chunk_ids: Dict[str, List[str]] = field(default_factory=dict)
+    files_skipped: int = 0
+    files_removed: int = 0
+    chunks_deleted: int = 0
+    ann_built: bool = False
+
+    @property
+    def stages(self) -> Sequence[StageStats]:
+        return (self.parse, self.embed, self.write)
+
+
+class IngestPipeline:
+    """Run parse → embed → write concurrently with per-stage parallelism."""
+
+    def __init__(
+        self,
+        splitter_cfg: Dict,
+        emb_factory,
+        vector_db,
+        lexical=None,
+        parse_workers: int = 2,
+        embed_workers: int = 1,
+        write_workers: int = 1,
+        batch_size: int = 1000,
+        queue_size: int = 4,
+    ) -> None:
+        self.logger = logging.getLogger(__name__)
+        self.splitter_cfg = splitter_cfg
+        self.emb_factory = emb_factory
+        self.vector_db = vector_db
+        self.lexical = lexical
+        self.parse_workers = max(1, parse_workers)
+        self.embed_workers = max(1, embed_workers)
+        self.write_workers = max(1, write_workers)
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+
+    def run(self, files: Iterable[Tuple[Path, str]]) -> IngestStats:
+        """Ingest ``(path, source_key)`` pairs and return per-stage statistics."""
+        stats = IngestStats()
+        embed_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        write_q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        errors: List[BaseException] = []
+        failed = threading.Event()
+
+        def fail(exc: BaseException) -> None:
+            errors.append(exc)
+            failed.set()
+
+        def embed_worker() -> None:
+            while True:
+                batch = embed_q.get()
+                if batch is _STOP:
+                    return
+                if failed.is_set():
+                    continue
+                texts, metas = batch
+                try:
+                    stats.embed.mark_started()
+                    vectors = self.emb_factory.embed_texts(texts)
+                    stats.embed.record(len(texts))
+                    self._put(write_q, (texts, metas, vectors), failed)
+                except BaseException as exc:  # noqa: BLE001 - surfaced after join
+                    fail(exc)
+
+        def write_worker() -> None:
+            while True:
+                batch = write_q.get()
+                if batch is _STOP:
+                    return
+                if failed.is_set():
+                    continue
+                texts, metas, vectors = batch
+                try:
+                    stats.write.mark_started()
+                    ids = [meta["chunk_id"] for meta in metas]
+                    self.vector_db.add_embeddings(texts, metas, vectors, ids=ids)
+                    if self.lexical is not None:
+                        self.lexical.add(ids, texts, metas)
+                    stats.write.record(len(texts))
+                except BaseException as exc:  # noqa: BLE001 - surfaced after join
+                    fail(exc)
+
+        embedders = self._start(embed_worker, self.embed_workers, "ingest-embed")
+        writers = self._start(write_worker, self.write_workers, "ingest-write")
+
+        start = time.perf_counter()
+        try:
+            self._parse(files, stats, embed_q, failed, fail)
+        finally:
+            for _ in embedders:
+                embed_q.put(_STOP)
+            for thread in embedders:
+                thread.join()
+            for _ in writers:
+                write_q.put(_STOP)
+            for thread in writers:
+                thread.join()
+            stats.wall_seconds = time.perf_counter() - start
+
+        if errors:
+            raise errors[0]
+        return stats
+
+    def _parse(self, files, stats: IngestStats, embed_q, failed, fail) -> None:
+        batch_texts: List[str] = []
+        batch_meta: List[Dict] = []
+        max_in_flight = self.parse_workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as pool:
+            pending = set()
+            file_iter = iter(files)
+            exhausted = False
+            stats.parse.mark_started()
+
+            while pending or not exhausted:
+                # Keep a bounded number of files in flight so parsing cannot
+                # run arbitrarily far ahead of embedding.
+                while not exhausted and len(pending) < max_in_flight and not failed.is_set():
+                    item = next(file_iter, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    path, source_key = item
+                    pending.add(
+                        pool.submit(load_and_split, str(path), self.splitter_cfg, source_key)
+                    )
+
+                if failed.is_set():
+                    for future in pending:
+                        future.cancel()
+                    return
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        source_key, chunks = future.result()
+                    except BaseException as exc:  # noqa: BLE001
+                        fail(exc)
+                        continue
+                    stats.parse.record(1)
+                    stats.chunk_ids[source_key] = [meta["chunk_id"] for _, meta in chunks]
+                    self.logger.debug("Parsed %s into %d chunks", source_key, len(chunks))
+                    for text, metadata in chunks:
+                        batch_texts.append(text)
+                        batch_meta.append(metadata)
+                        if len(batch_texts) >= self.batch_size:
+                            self._put(embed_q, (batch_texts, batch_meta), failed)
+                            batch_texts, batch_meta = [], []
+
+        if batch_texts and not failed.is_set():
+            self._put(embed_q, (batch_texts, batch_meta), failed)
+
+    @staticmethod
+    def _put(q: "queue.Queue", item, failed: threading.Event) -> None:
+        """Blocking put that gives up once another stage has failed."""
+        while not failed.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _start(target, count: int, name: str) -> List[threading.Thread]:
+        threads = []
+        for idx in range(count):
+            thread = threading.Thread(target=target, name=f"{name}-{idx}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
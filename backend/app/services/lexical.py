@@ -0,0 +1,247 @@
+"""Greek-aware BM25 inverted index and reciprocal rank fusion.
+
+Exact identifiers such as "Άρθρο 12", "Ν 2439" or acronyms are matched
+poorly by dense vectors. This index complements vector search with a
+lexical leg that is cheap enough to run on every query.
+
+On disk (directory ``path``):
+
+* ``docs.jsonl`` – one ``{"id", "text", "meta"}`` record per document
+* ``postings.npz`` – CSR postings with precomputed BM25 impact weights,
+  document offsets into ``docs.jsonl`` and the vocabulary
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+_TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+Hit = Tuple[str, float, Dict]
+
+
+def greek_analyzer(text: str) -> List[str]:
+    """Lowercase, strip accents (tonos/dialytika) and fold final sigma."""
+    decomposed = unicodedata.normalize("NFD", text.casefold())
+    stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+    return _TOKEN_RE.findall(stripped.replace("ς", "σ"))
+
+
+class LexicalIndex:
+    """BM25 over chunk texts with add/delete/persist like the vector store."""
+
+    DOCS = "docs.jsonl"
+    POSTINGS = "postings.npz"
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75) -> None:
+        self.path = Path(path).expanduser().resolve()
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self) -> None:
+        with self._lock:
+            self._vocab: Dict[str, int] = {}
+            self._idf = np.zeros(0, dtype=np.float32)
+            self._post_offsets = np.zeros(1, dtype=np.int64)
+            self._post_docs = np.zeros(0, dtype=np.int32)
+            self._post_weights = np.zeros(0, dtype=np.float32)
+            self._doc_offsets = np.zeros(1, dtype=np.int64)
+            self._docs: Optional[mmap.mmap] = None
+
+            postings = self.path / self.POSTINGS
+            if postings.exists():
+                with np.load(postings) as data:
+                    terms = data["terms"]
+                    self._idf = data["idf"]
+                    self._post_offsets = data["post_offsets"]
+                    self._post_docs = data["post_docs"]
+                    self._post_weights = data["post_weights"]
+                    self._doc_offsets = data["doc_offsets"]
+                self._vocab = {str(term): idx for idx, term in enumerate(terms)}
+                with (self.path / self.DOCS).open("rb") as handle:
+                    if self._doc_offsets[-1] > 0:
+                        self._docs = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._pending: Dict[str, Tuple[str, Dict]] = {}
+            self._deleted: set = set()
+
+    def __len__(self) -> int:
+        return int(self._doc_offsets.shape[0] - 1)
+
+    # ----------------------------------------------------------------- write
+    def add(self, ids: Sequence[str], texts: Sequence[str], metas: Sequence[Dict]) -> None:
+        with self._lock:
+            for cid, text, meta in zip(ids, texts, metas):
+                self._pending[cid] = (text, dict(meta))
+                self._deleted.discard(cid)
+
+    def delete(self, ids: Iterable[str]) -> None:
+        with self._lock:
+            for cid in ids:
+                self._pending.pop(cid, None)
+                self._deleted.add(cid)
+
+    def _stored_docs(self) -> Iterable[Tuple[str, str, Dict]]:
+        for row in range(len(self)):
+            record = self._record(row)
+            yield record["id"], record["text"], record["meta"]
+
+    def persist(self) -> None:
+        """Merge pending changes and rebuild postings as a new snapshot."""
+        with self._lock:
+            if not self._pending and not self._deleted and (self.path / self.POSTINGS).exists():
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+
+            vocab: Dict[str, int] = {}
+            doc_terms: List[np.ndarray] = []
+            doc_tfs: List[np.ndarray] = []
+            doc_lengths: List[int] = []
+            doc_offsets = [0]
+
+            docs_tmp = self.path / f"{self.DOCS}.tmp"
+            with docs_tmp.open("wb") as handle:
+                def write(cid: str, text: str, meta: Dict) -> None:
+                    line = json.dumps({"id": cid, "text": text, "meta": meta}, ensure_ascii=False)
+                    data = line.encode("utf-8") + b"\n"
+                    handle.write(data)
+                    doc_offsets.append(doc_offsets[-1] + len(data))
+                    counts: Dict[int, int] = {}
+                    tokens = greek_analyzer(text)
+                    for token in tokens:
+                        tid = vocab.setdefault(token, len(vocab))
+                        counts[tid] = counts.get(tid, 0) + 1
+                    doc_terms.append(np.fromiter(counts.keys(), dtype=np.int32, count=len(counts)))
+                    doc_tfs.append(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+                    doc_lengths.append(len(tokens))
+
+                for cid, text, meta in self._stored_docs():
+                    if cid in self._deleted or cid in self._pending:
+                        continue
+                    write(cid, text, meta)
+                for cid, (text, meta) in self._pending.items():
+                    write(cid, text, meta)
+
+            n_docs = len(doc_lengths)
+            terms = np.concatenate(doc_terms) if doc_terms else np.zeros(0, dtype=np.int32)
+            tfs = np.concatenate(doc_tfs) if doc_tfs else np.zeros(0, dtype=np.float32)
+            lengths = np.asarray(doc_lengths, dtype=np.float32)
+            docs = np.repeat(np.arange(n_docs, dtype=np.int32), [t.shape[0] for t in doc_terms])
+
+            # Group postings by term (CSR) and precompute BM25 impact weights.
+            order = np.argsort(terms, kind="stable")
+            terms, tfs, docs = terms[order], tfs[order], docs[order]
+            counts = np.bincount(terms, minlength=len(vocab))
+            post_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+            np.cumsum(counts, out=post_offsets[1:])
+            df = counts.astype(np.float32)
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+            avgdl = float(lengths.mean()) if n_docs else 1.0
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[docs] / max(avgdl, 1e-9))
+            weights = idf[terms] * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+            postings_tmp = self.path / f"{self.POSTINGS}.tmp"
+            with postings_tmp.open("wb") as handle:
+                np.savez(
+                    handle,
+                    terms=np.asarray(list(vocab.keys()), dtype=str),
+                    idf=idf,
+                    post_offsets=post_offsets,
+                    post_docs=docs,
+                    post_weights=weights.astype(np.float32),
+                    doc_offsets=np.asarray(doc_offsets, dtype=np.int64),
+                )
+
+            os.replace(docs_tmp, self.path / self.DOCS)
+            os.replace(postings_tmp, self.path / self.POSTINGS)
+            self.load()
+
+    # ------------------------------------------------------------------ read
+    def _record(self, row: int) -> Dict:
+        start, end = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        return json.loads(self._docs[start:end])
+
+    def search(self, query: str, k: int) -> List[Hit]:
+        """BM25 top-*k* as ``(text, score, meta)``; ``score`` is normalised to
+        ``[0, 1]`` by the best score attainable for this query."""
+        with self._lock:
+            n_docs = len(self)
+            if not n_docs:
+                return []
+            term_ids = {self._vocab[t] for t in greek_analyzer(query) if t in self._vocab}
+            if not term_ids:
+                return []
+
+            scores = np.zeros(n_docs, dtype=np.float32)
+            for tid in term_ids:
+                start, end = self._post_offsets[tid], self._post_offsets[tid + 1]
+                # Each document appears once per posting list, so += is safe.
+                scores[self._post_docs[start:end]] += self._post_weights[start:end]
+
+            k = min(k, n_docs)
+            rows = np.argpartition(-scores, k - 1)[:k]
+            rows = rows[np.argsort(-scores[rows], kind="stable")]
+            rows = rows[scores[rows] > 0]
+
+            # Upper bound: every query term at saturation (tf → ∞) in a document.
+            ceiling = float(self._idf[list(term_ids)].sum() * (self.k1 + 1.0)) or 1.0
+            hits = []
+            for row in rows:
+                record = self._record(int(row))
+                meta = dict(record["meta"])
+                meta.setdefault("chunk_id", record["id"])
+                hits.append((record["text"], min(1.0, float(scores[row]) / ceiling), meta))
+            return hits
+
+
+def _hit_key(hit: Hit) -> str:
+    return str(hit[2].get("chunk_id") or hit[0])
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[Hit]],
+    k: int = 60,
+    limit: Optional[int] = None,
+) -> List[Hit]:
+    """Fuse ranked hit lists by RRF (``sum 1 / (k + rank)``).
+
+    Ordering follows the fused RRF score. The returned score is the best
+    per-leg score of the hit (cosine or normalised BM25), for display only:
+    a normalised BM25 score is relative to its own query, so confidence
+    thresholds use the cosine the vector leg left in ``meta["vector_score"]``.
+    """
+    fused: Dict[str, float] = {}
+    best: Dict[str, Hit] = {}
+    vector_scores: Dict[str, float] = {}
+    for hits in ranked_lists:
+        for rank, hit in enumerate(hits):
+            key = _hit_key(hit)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (k + rank + 1)
+            if key not in best or hit[1] > best[key][1]:
+                best[key] = hit
+            if "vector_score" in hit[2]:
+                vector_scores[key] = max(vector_scores.get(key, 0.0), hit[2]["vector_score"])
+
+    ordered = sorted(fused, key=fused.get, reverse=True)
+    if limit is not None:
+        ordered = ordered[:limit]
+    fused_hits = []
+    for key in ordered:
+        text, score, meta = best[key]
+        if key in vector_scores:
+            # Keep the cosine even when the lexical copy was the better one.
+            meta = {**meta, "vector_score": vector_scores[key]}
+        fused_hits.append((text, score, meta))
+    return fused_hits
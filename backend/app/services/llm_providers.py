@@ -1,6 +1,19 @@
 from __future__ import annotations
 
-from langchain_ollama import ChatOllama
+import contextvars
+from contextlib import aclosing, nullcontext
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+from app.services.llm_registry import LLMRegistry
+from app.services.scheduler import PRIORITY_NORMAL, LLMScheduler
+
+
+T = TypeVar("T")
+
+# Set by the rate limiter to be told how many tokens each async call generated.
+token_listener: contextvars.ContextVar[Optional[Callable[[int], None]]] = (
+    contextvars.ContextVar("token_listener", default=None)
+)
 
 
 class LLMFactory:
@@ -12,41 +25,133 @@ class LLMFactory:
         model: str,
         temperature: float = 0.1,
         max_tokens: int | None = None,
+        scheduler: Optional[LLMScheduler] = None,
+        priority: int = PRIORITY_NORMAL,
+        registry: Optional[LLMRegistry] = None,
+        base_url: str | None = None,
+        endpoints: Optional[List[str]] = None,
         **_: object,
     ):
         self.provider = provider
         self.model = model
+        self.scheduler = scheduler
+        self.priority = priority
         self.temperature = temperature
         self.max_tokens = max_tokens
-        model_kwargs = {}
-        if max_tokens is not None:
-            model_kwargs["num_predict"] = max_tokens
-
-        if provider == "ollama":
-            kwargs = {"model": model, "temperature": temperature}
-            if model_kwargs:
-                kwargs["model_kwargs"] = model_kwargs
-            self._llm = ChatOllama(**kwargs)
-        elif provider == "gptoss":
-            raise NotImplementedError(
-                "GPT-OSS provider not yet implemented. Plug your client here."
-            )
-        else:
-            raise ValueError(f"Unknown LLM provider: {provider}")
+        self.base_url = base_url
 
-    def answer(self, system_prompt: str, user_prompt: str) -> str:
-        messages = [
+        # Factories with the same settings share one client (and its
+        # connection pool) through the registry; with several endpoints
+        # there is one client per endpoint and the pool picks among them.
+        self.registry = registry or LLMRegistry(keep_alive=None)
+        self.endpoints = [url.rstrip("/") for url in endpoints or []]
+        urls = self.endpoints or [base_url]
+        self._clients = {
+            url: self.registry.chat_model(provider, model, temperature, max_tokens, url)
+            for url in urls
+        }
+        self._llm = self._clients[urls[0]]
+        self._pool = self.registry.endpoint_pool(self.endpoints) if self.endpoints else None
+
+    @staticmethod
+    def _messages(system_prompt: str, user_prompt: str) -> List[Tuple[str, str]]:
+        return [
             ("system", system_prompt),
             ("human", user_prompt),
         ]
-        return self._llm.invoke(messages).content
+
+    def _slot(self):
+        """Scheduler slot for async calls (sync calls are not scheduled)."""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(self.model, self.priority)
+
+    # ``fn(url)`` runs on the endpoint picked by the pool, or on the single
+    # configured server when there is no pool, behind the Ollama circuit
+    # breaker when one is configured.
+
+    def _run(self, fn: Callable[[Optional[str]], T]) -> T:
+        call = lambda: fn(self.base_url) if self._pool is None else self._pool.call(fn)
+        breaker = self.registry.breaker
+        return call() if breaker is None else breaker.call(call)
+
+    def _stream(self, fn: Callable[[Optional[str]], Iterator[T]]) -> Iterator[T]:
+        call = lambda: fn(self.base_url) if self._pool is None else self._pool.stream(fn)
+        breaker = self.registry.breaker
+        return call() if breaker is None else breaker.stream(call)
+
+    async def _arun(self, fn: Callable[[Optional[str]], Awaitable[T]]) -> T:
+        call = lambda: fn(self.base_url) if self._pool is None else self._pool.acall(fn)
+        breaker = self.registry.breaker
+        return await (call() if breaker is None else breaker.acall(call))
+
+    def _astream(self, fn: Callable[[Optional[str]], AsyncIterator[T]]) -> AsyncIterator[T]:
+        call = lambda: fn(self.base_url) if self._pool is None else self._pool.astream(fn)
+        breaker = self.registry.breaker
+        return call() if breaker is None else breaker.astream(call)
+
+    def _check_circuit(self) -> None:
+        # Do not queue for a scheduler slot only to be rejected by the breaker.
+        if self.registry.breaker is not None:
+            self.registry.breaker.check()
+
+    async def _ainvoke(self, url: Optional[str], messages):
+        result = await self._clients[url].ainvoke(messages)
+        self.registry.mark_ready(self.provider, self.model, url)
+        return result
+
+    async def _achunks(self, url: Optional[str], messages):
+        async with aclosing(self._clients[url].astream(messages)) as stream:
+            loaded = False
+            async for chunk in stream:
+                if not loaded:
+                    loaded = True
+                    self.registry.mark_ready(self.provider, self.model, url)
+                yield chunk
+
+    def answer(self, system_prompt: str, user_prompt: str) -> str:
+        messages = self._messages(system_prompt, user_prompt)
+        return self._run(lambda url: self._clients[url].invoke(messages)).content
     
     def stream_answer(self, system_prompt: str, user_prompt: str):
         """Stream answer tokens from the LLM."""
-        messages = [
-            ("system", system_prompt),
-            ("human", user_prompt),
-        ]
-        for chunk in self._llm.stream(messages):
+        messages = self._messages(system_prompt, user_prompt)
+        for chunk in self._stream(lambda url: self._clients[url].stream(messages)):
             if hasattr(chunk, 'content'):
                 yield chunk.content
+
+    async def aanswer(self, system_prompt: str, user_prompt: str) -> str:
+        """Async variant of :meth:`answer` that does not block the event loop."""
+        messages = self._messages(system_prompt, user_prompt)
+        self._check_circuit()
+        async with self._slot():
+            result = await self._arun(lambda url: self._ainvoke(url, messages))
+        listener = token_listener.get()
+        if listener is not None:
+            usage = getattr(result, "usage_metadata", None) or {}
+            listener(usage.get("output_tokens") or len(result.content.split()))
+        return result.content
+
+    async def astream_answer(
+        self, system_prompt: str, user_prompt: str
+    ) -> AsyncIterator[str]:
+        """Async variant of :meth:`stream_answer`.
+
+        Closing the generator closes the HTTP stream, which makes Ollama
+        stop generating.
+        """
+        messages = self._messages(system_prompt, user_prompt)
+        self._check_circuit()
+        listener = token_listener.get()
+        generated = 0
+        try:
+            async with self._slot():
+                async with aclosing(self._astream(lambda url: self._achunks(url, messages))) as stream:
+                    async for chunk in stream:
+                        # Ollama streams one token per chunk.
+                        generated += 1
+                        if hasattr(chunk, 'content'):
+                            yield chunk.content
+        finally:
+            if listener is not None:
+                listener(generated)
@@ -0,0 +1,275 @@
+"""Process-wide registry of chat model clients.
+
+Clients are created once per ``(provider, model, base_url, temperature,
+max_tokens)`` and shared by every :class:`~app.services.llm_providers.LLMFactory`
+that asks for the same settings. All Ollama clients talking to one server
+share a keep-alive HTTP connection pool, and every request carries the
+``keep_alive`` option so Ollama keeps the models loaded between queries.
+
+Models served by several Ollama boxes list them as ``endpoints``; the
+registry keeps one :class:`~app.services.endpoint_pool.Endpoint` per URL,
+so load and health are shared by every model on the same box.
+:meth:`LLMRegistry.probe` checks every server in use; the health monitor
+calls it in the background.
+
+:meth:`LLMRegistry.warm_up` sends a one-token generation to every model in
+the background at startup, so the first user does not pay the model load.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.endpoint_pool import Endpoint, EndpointPool
+
+
+logger = logging.getLogger(__name__)
+
+
+def default_host() -> str:
+    """The server used when no base_url is configured, as the Ollama client picks it."""
+    host = os.getenv("OLLAMA_HOST") or "127.0.0.1:11434"
+    return (host if "://" in host else f"http://{host}").rstrip("/")
+
+
+@dataclass
+class ModelStatus:
+    """Warm-up state of one model: ``cold``, ``warming``, ``ready`` or ``failed``."""
+
+    state: str = "cold"
+    warmup_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "warmup_ms": self.warmup_ms,
+            "error": self.error,
+        }
+
+
+class LLMRegistry:
+    """Shared chat model clients plus their per-model readiness."""
+
+    def __init__(
+        self,
+        keep_alive: Optional[str] = "30m",
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60.0,
+        base_url: Optional[str] = None,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        connect_timeout: Optional[float] = 5.0,
+        read_timeout: Optional[float] = 120.0,
+        breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        self.keep_alive = keep_alive
+        self.base_url = base_url
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        # A hung server fails the call instead of holding it forever; the
+        # read timeout also bounds the gap between streamed tokens.
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        # Shared by every client of the registry: Ollama as one dependency.
+        self.breaker = breaker
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._pools: Dict[Tuple[str, ...], EndpointPool] = {}
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._clients: Dict[Hashable, Any] = {}
+        # One sync and one async connection pool per server.
+        self._transports: Dict[Optional[str], Tuple[httpx.HTTPTransport, httpx.AsyncHTTPTransport]] = {}
+        self._status: Dict[Tuple[str, str, Optional[str]], ModelStatus] = {}
+
+    def _transports_for(self, base_url: Optional[str]):
+        transports = self._transports.get(base_url)
+        if transports is None:
+            transports = self._transports[base_url] = (
+                httpx.HTTPTransport(limits=self._limits),
+                httpx.AsyncHTTPTransport(limits=self._limits),
+            )
+        return transports
+
+    def _ollama(self, model: str, base_url: Optional[str], **options: Any):
+        from langchain_ollama import ChatOllama
+
+        sync_transport, async_transport = self._transports_for(base_url)
+        kwargs = {
+            "model": model,
+            "keep_alive": self.keep_alive,
+            "client_kwargs": {"timeout": self.timeout},
+            "sync_client_kwargs": {"transport": sync_transport},
+            "async_client_kwargs": {"transport": async_transport},
+            **{k: v for k, v in options.items() if v is not None},
+        }
+        if base_url:
+            kwargs["base_url"] = base_url
+        return ChatOllama(**kwargs)
+
+    def chat_model(
+        self,
+        provider: str,
+        model: str,
+        temperature: float = 0.1,
+        max_tokens: Optional[int] = None,
+        base_url: Optional[str] = None,
+    ):
+        """Shared client for these settings, created on first use."""
+        base_url = base_url or self.base_url
+        key = (provider, model, base_url, temperature, max_tokens)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        if provider == "ollama":
+            client = self._ollama(
+                model, base_url, temperature=temperature, num_predict=max_tokens
+            )
+        elif provider == "gptoss":
+            raise NotImplementedError(
+                "GPT-OSS provider not yet implemented. Plug your client here."
+            )
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+        self._clients[key] = client
+        self._status.setdefault((provider, model, base_url), ModelStatus())
+        return client
+
+    def endpoint_pool(self, urls) -> EndpointPool:
+        """Pool over *urls*; endpoint state is shared with other pools."""
+        key = tuple(url.rstrip("/") for url in urls)
+        pool = self._pools.get(key)
+        if pool is None:
+            endpoints = []
+            for url in key:
+                endpoint = self._endpoints.get(url)
+                if endpoint is None:
+                    endpoint = self._endpoints[url] = Endpoint(
+                        url, self.eject_after, self.eject_seconds
+                    )
+                endpoints.append(endpoint)
+            pool = self._pools[key] = EndpointPool(endpoints)
+        return pool
+
+    def servers(self) -> List[str]:
+        """Every Ollama server URL a client of this registry talks to."""
+        urls = list(self._endpoints)
+        for base_url in self._transports:
+            url = (base_url or default_host()).rstrip("/")
+            if url not in urls:
+                urls.append(url)
+        return urls or [(self.base_url or default_host()).rstrip("/")]
+
+    async def probe(self, timeout: float = 2.0) -> Dict[str, Any]:
+        """``GET /api/tags`` on every server; returns latency (ms) or error per URL.
+
+        Pool endpoints are readmitted on success and count a failure
+        otherwise. Raises if no server answered.
+        """
+        urls = self.servers()
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            results = await asyncio.gather(*(self._probe(client, url) for url in urls))
+        details = dict(zip(urls, results))
+        if not any(isinstance(result, float) for result in results):
+            raise ConnectionError(f"No Ollama server reachable: {details}")
+        return details
+
+    async def _probe(self, client: httpx.AsyncClient, url: str):
+        endpoint = self._endpoints.get(url)
+        started = time.perf_counter()
+        try:
+            response = await client.get(f"{url}/api/tags")
+            response.raise_for_status()
+        except Exception as exc:
+            if endpoint is not None:
+                if endpoint.healthy:
+                    logger.warning("Endpoint %s failed its health probe: %s", url, exc)
+                endpoint.probed(exc)
+            return str(exc) or type(exc).__name__
+        if endpoint is not None:
+            if not endpoint.healthy:
+                logger.info("Endpoint %s is back", url)
+            endpoint.probed()
+        return round((time.perf_counter() - started) * 1000, 2)
+
+    def endpoint_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {url: endpoint.snapshot() for url, endpoint in self._endpoints.items()}
+
+    async def warm_up(self) -> None:
+        """Load every registered model with a one-token generation.
+
+        Models are warmed one after another (in registration order) so they
+        do not compete for memory while Ollama loads them.
+        """
+        for (provider, model, base_url), status in list(self._status.items()):
+            if provider != "ollama" or status.state in ("warming", "ready"):
+                continue
+            status.state = "warming"
+            started = time.perf_counter()
+            try:
+                probe = self._ollama(model, base_url, num_predict=1)
+                await probe.ainvoke([("human", ".")])
+            except Exception as exc:
+                status.state = "failed"
+                status.error = str(exc)
+                logger.warning("Warm-up of %s failed: %s", model, exc)
+                continue
+            status.warmup_ms = (time.perf_counter() - started) * 1000
+            status.state = "ready"
+            status.error = None
+            logger.info("Model %s warmed up in %.0f ms", model, status.warmup_ms)
+
+    def mark_ready(self, provider: str, model: str, base_url: Optional[str] = None) -> None:
+        """Record that *model* answered a request (it is loaded)."""
+        status = self._status.get((provider, model, base_url or self.base_url))
+        if status is not None and status.state != "ready":
+            status.state = "ready"
+            status.error = None
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            model if base_url is None else f"{model}@{base_url}": status.snapshot()
+            for (_, model, base_url), status in self._status.items()
+        }
+
+    async def aclose(self) -> None:
+        for sync_transport, async_transport in self._transports.values():
+            sync_transport.close()
+            await async_transport.aclose()
+        self._transports.clear()
+        self._clients.clear()
+
+
+def build_llm_registry(cfg: Optional[Dict], breaker: Optional[CircuitBreaker] = None) -> LLMRegistry:
+    """Create the :class:`LLMRegistry` from the optional ``llm_pool`` section."""
+    cfg = cfg or {}
+    return LLMRegistry(
+        keep_alive=cfg.get("keep_alive", "30m"),
+        max_connections=cfg.get("max_connections", 20),
+        max_keepalive_connections=cfg.get("max_keepalive_connections", 10),
+        keepalive_expiry=cfg.get("keepalive_expiry_seconds", 60.0),
+        base_url=cfg.get("base_url"),
+        eject_after=cfg.get("eject_after", 3),
+        eject_seconds=cfg.get("eject_seconds", 30.0),
+        connect_timeout=cfg.get("connect_timeout_seconds", 5.0),
+        read_timeout=cfg.get("read_timeout_seconds", 120.0),
+        breaker=breaker,
+    )
@@ -0,0 +1,429 @@
+"""In-process vector index backed by memory-mapped snapshot files.
+
+A persisted snapshot is a ``snapshot-*`` directory under ``path`` with four
+immutable files:
+
+* ``vectors.npy`` – ``(N, d)`` float32, L2-normalised, opened with ``mmap``
+* ``ids.npy``     – ``(N,)`` chunk IDs
+* ``chunks.jsonl`` – one ``{"text", "meta"}`` record per row
+* ``offsets.npy`` – ``(N + 1,)`` byte offsets of the records above
+
+Opening a snapshot maps the files instead of reading them, so cold start is
+near-instant and only the top-k records are ever decoded. Writers build a
+complete new snapshot directory and then switch the ``CURRENT`` pointer file
+to it with one ``os.replace``, so a reader always opens files of a single
+snapshot; readers that already mapped the old files keep a consistent view.
+The previous snapshot is kept for readers that are just opening it.
+
+An optional IVF index (``ivf.npz``, see :mod:`app.services.ann`) built over a
+snapshot narrows the scan to a few cells; rows added since the snapshot are
+always scanned exactly.
+
+With ``storage`` set to ``float16`` or ``int8`` the scan runs over compact
+codes held in RAM (``codes.npy``/``scales.npy``, see
+:mod:`app.services.quantization`) and only a shortlist of
+``k * rescore_factor`` rows is rescored against the memory-mapped float32
+vectors, so those stay on disk apart from the pages actually touched.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.ann import IVFIndex
+from app.services.quantization import STORAGE_MODES, approx_scores, nbytes, quantize
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise rows so that a dot product equals cosine similarity."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* highest scores, best first (O(N) selection)."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.shape[0])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class LocalVectorIndex:
+    """Cosine top-k over a float32 matrix with add/delete/persist."""
+
+    VECTORS = "vectors.npy"
+    IDS = "ids.npy"
+    CHUNKS = "chunks.jsonl"
+    OFFSETS = "offsets.npy"
+    CODES = "codes.npy"
+    SCALES = "scales.npy"
+    CURRENT = "CURRENT"
+    SNAPSHOT_PREFIX = "snapshot-"
+    COPY_BLOCK = 65536
+
+    def __init__(
+        self,
+        path: str,
+        nprobe: int = 8,
+        storage: str = "float32",
+        rescore_factor: int = 4,
+    ) -> None:
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unsupported vector storage mode: {storage}")
+        self.path = Path(path).expanduser().resolve()
+        self.nprobe = nprobe
+        self.storage = storage
+        self.rescore_factor = max(1, rescore_factor)
+        self._lock = threading.RLock()
+        self.load()
+
+    # ------------------------------------------------------------------ load
+    def _current_dir(self) -> Path:
+        """Directory of the live snapshot (``path`` itself for the old flat layout)."""
+        try:
+            name = (self.path / self.CURRENT).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return self.path
+        return self.path / name
+
+    def load(self) -> None:
+        with self._lock:
+            self._dir = self._current_dir()
+            self._base_vectors: Optional[np.ndarray] = None
+            self._base_ids: np.ndarray = np.empty(0, dtype=object)
+            self._offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+            self._records: Optional[mmap.mmap] = None
+
+            vectors_path = self._dir / self.VECTORS
+            if vectors_path.exists():
+                self._base_vectors = np.load(vectors_path, mmap_mode="r")
+                self._base_ids = np.load(self._dir / self.IDS, allow_pickle=False)
+                self._offsets = np.load(self._dir / self.OFFSETS)
+                with (self._dir / self.CHUNKS).open("rb") as handle:
+                    if self._offsets[-1] > 0:
+                        self._records = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+            self._new_vectors: List[np.ndarray] = []
+            self._new_records: List[Tuple[str, str, Dict]] = []
+            self._alive = np.ones(self._base_count, dtype=bool)
+            self._row_of: Optional[Dict[str, int]] = None
+            self._pending_cache: Optional[np.ndarray] = None
+
+            self.ann: Optional[IVFIndex] = None
+            if self._base_count:
+                ann = IVFIndex.load(self._dir)
+                if ann is not None and ann.size == self._base_count:
+                    self.ann = ann
+
+            self._codes: Optional[np.ndarray] = None
+            self._scales: Optional[np.ndarray] = None
+            if self._base_count and self.storage != "float32":
+                self._load_codes()
+
+    def _load_codes(self) -> None:
+        codes_path = self._dir / self.CODES
+        expected = np.float16 if self.storage == "float16" else np.int8
+        if codes_path.exists():
+            codes = np.load(codes_path)
+            scales_path = self._dir / self.SCALES
+            scales = np.load(scales_path) if scales_path.exists() else None
+            if (
+                codes.dtype == expected
+                and codes.shape == self._base_vectors.shape
+                and (scales is not None) == (self.storage == "int8")
+            ):
+                self._codes, self._scales = codes, scales
+                return
+        # Snapshot written with another storage mode: encode once from disk.
+        self._codes, self._scales = quantize(self._base_vectors, self.storage)
+
+    @property
+    def _base_count(self) -> int:
+        return 0 if self._base_vectors is None else int(self._base_vectors.shape[0])
+
+    @property
+    def dim(self) -> Optional[int]:
+        if self._base_vectors is not None:
+            return int(self._base_vectors.shape[1])
+        if self._new_vectors:
+            return int(self._new_vectors[0].shape[1])
+        return None
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    # ----------------------------------------------------------------- write
+    def _rows(self) -> Dict[str, int]:
+        if self._row_of is None:
+            self._row_of = {str(cid): row for row, cid in enumerate(self._base_ids)}
+            for offset, (cid, _, _) in enumerate(self._new_records):
+                self._row_of[cid] = self._base_count + offset
+            for row in np.flatnonzero(~self._alive):
+                cid = self._id_at(int(row))
+                if self._row_of.get(cid) == row:
+                    del self._row_of[cid]
+        return self._row_of
+
+    def add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metas: Sequence[Dict],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Insert or replace rows; an existing ID is tombstoned and re-added."""
+        if not ids:
+            return
+        block = normalize_rows(np.asarray(vectors, dtype=np.float32))
+        if self.dim is not None and block.shape[1] != self.dim:
+            raise ValueError(
+                f"Vector dimension {block.shape[1]} does not match index dimension {self.dim}"
+            )
+
+        with self._lock:
+            rows = self._rows()
+            start = self._base_count + len(self._new_records)
+            for cid in ids:
+                old = rows.get(cid)
+                if old is not None:
+                    self._alive[old] = False
+            for offset, (cid, text, meta) in enumerate(zip(ids, texts, metas)):
+                rows[cid] = start + offset
+                self._new_records.append((cid, text, dict(meta)))
+            self._new_vectors.append(block)
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self._pending_cache = None
+
+    def delete(self, ids: Sequence[str]) -> int:
+        deleted = 0
+        with self._lock:
+            rows = self._rows()
+            for cid in ids:
+                row = rows.pop(cid, None)
+                if row is not None and self._alive[row]:
+                    self._alive[row] = False
+                    deleted += 1
+        return deleted
+
+    def persist(self) -> None:
+        """Write live rows as a fresh snapshot and re-open it memory-mapped."""
+        with self._lock:
+            if self.dim is None:
+                return
+            live = np.flatnonzero(self._alive)
+
+            snapshot = self.path / f"{self.SNAPSHOT_PREFIX}{time.time_ns():x}"
+            snapshot.mkdir(parents=True)
+            # Copied block by block so the float32 matrix never sits in RAM.
+            vectors = np.lib.format.open_memmap(
+                snapshot / self.VECTORS, mode="w+", dtype=np.float32, shape=(len(live), self.dim)
+            )
+            for start in range(0, len(live), self.COPY_BLOCK):
+                vectors[start:start + self.COPY_BLOCK] = self._gather(live[start:start + self.COPY_BLOCK])
+            vectors.flush()
+
+            offsets = np.zeros(len(live) + 1, dtype=np.int64)
+            ids = []
+            with (snapshot / self.CHUNKS).open("wb") as handle:
+                position = 0
+                for idx, row in enumerate(live):
+                    cid, text, meta = self._record(int(row))
+                    line = json.dumps({"text": text, "meta": meta}, ensure_ascii=False)
+                    data = line.encode("utf-8") + b"\n"
+                    handle.write(data)
+                    position += len(data)
+                    offsets[idx + 1] = position
+                    ids.append(cid)
+            with (snapshot / self.IDS).open("wb") as handle:
+                np.save(handle, np.asarray(ids, dtype=str))
+            with (snapshot / self.OFFSETS).open("wb") as handle:
+                np.save(handle, offsets)
+
+            if self.storage != "float32":
+                codes, scales = quantize(vectors, self.storage)
+                with (snapshot / self.CODES).open("wb") as handle:
+                    np.save(handle, codes)
+                if scales is not None:
+                    with (snapshot / self.SCALES).open("wb") as handle:
+                        np.save(handle, scales)
+
+            del vectors
+            # The snapshot is complete; publish it with a single rename.
+            previous = self._dir
+            pointer = self.path / f"{self.CURRENT}.tmp"
+            pointer.write_text(snapshot.name, encoding="utf-8")
+            os.replace(pointer, self.path / self.CURRENT)
+            self.load()
+            self._prune_snapshots(keep=(snapshot, previous))
+
+    def _prune_snapshots(self, keep: Sequence[Path]) -> None:
+        """Remove snapshots older than the previous one and the old flat layout."""
+        for entry in self.path.glob(f"{self.SNAPSHOT_PREFIX}*"):
+            if entry.is_dir() and entry not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+        if self.path not in keep:
+            for name in (self.VECTORS, self.IDS, self.CHUNKS, self.OFFSETS,
+                         self.CODES, self.SCALES, IVFIndex.FILENAME):
+                (self.path / name).unlink(missing_ok=True)
+
+    def build_ann(self, nlist: Optional[int] = None, iters: int = 20) -> Optional[IVFIndex]:
+        """Train an IVF index over the persisted snapshot and save it alongside."""
+        with self._lock:
+            if not self._base_count:
+                return None
+            ann = IVFIndex.build(self._base_vectors, nlist=nlist, iters=iters)
+            ann.save(self._dir)
+            self.ann = ann
+            return ann
+
+    # ------------------------------------------------------------------ read
+    def _matrix(self) -> np.ndarray:
+        """The persisted float32 rows (memory-mapped)."""
+        if self._base_vectors is None:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._base_vectors
+
+    def _pending(self) -> np.ndarray:
+        """Rows added since the snapshot, kept apart from the mapped base."""
+        if self._pending_cache is None:
+            if self._new_vectors:
+                self._pending_cache = np.vstack(self._new_vectors)
+            else:
+                self._pending_cache = np.empty((0, self.dim or 0), dtype=np.float32)
+        return self._pending_cache
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        """float32 vectors of sorted *rows* across the base and pending rows."""
+        split = int(np.searchsorted(rows, self._base_count))
+        head = self._matrix()[rows[:split]]
+        if split == rows.shape[0]:
+            return head
+        return np.concatenate([head, self._pending()[rows[split:] - self._base_count]])
+
+    def _id_at(self, row: int) -> str:
+        if row < self._base_count:
+            return str(self._base_ids[row])
+        return self._new_records[row - self._base_count][0]
+
+    def _record(self, row: int) -> Tuple[str, str, Dict]:
+        if row >= self._base_count:
+            return self._new_records[row - self._base_count]
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        payload = json.loads(self._records[start:end])
+        return str(self._base_ids[row]), payload["text"], payload["meta"]
+
+    @staticmethod
+    def _unit(qvec: Sequence[float]) -> np.ndarray:
+        q = np.asarray(qvec, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        return q / norm if norm else q
+
+    def memory_bytes(self) -> int:
+        """Bytes of vector data the scan keeps resident (codes or float32)."""
+        if self._codes is not None:
+            return nbytes(self._codes, self._scales)
+        return int(self._matrix().nbytes + self._pending().nbytes)
+
+    def _scan_scores(
+        self,
+        q: np.ndarray,
+        rows: Optional[np.ndarray],
+        exact: bool,
+    ) -> np.ndarray:
+        """Scores for *rows* (sorted) or all rows; approximate when codes exist."""
+        base = self._base_count
+        approx = self._codes is not None and not exact
+        if rows is None:
+            head, tail = slice(None), self._pending()
+        else:
+            split = int(np.searchsorted(rows, base))
+            head, tail = rows[:split], self._pending()[rows[split:] - base]
+
+        if approx:
+            scales = self._scales[head] if self._scales is not None else None
+            parts = [approx_scores(self._codes[head], scales, q)]
+        else:
+            parts = [self._matrix()[head] @ q]
+        if tail.shape[0]:
+            parts.append(tail @ q)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def search_rows(
+        self,
+        qvec: Sequence[float],
+        k: int,
+        nprobe: Optional[int] = None,
+        exact: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """Top-*k* ``(row, cosine)`` pairs.
+
+        Uses the IVF cells and the compact codes unless *exact* is set, in
+        which case every live row is scored in float32.
+        """
+        with self._lock:
+            if self.dim is None or not len(self):
+                return []
+            q = self._unit(qvec)
+
+            rows: Optional[np.ndarray] = None
+            if self.ann is not None and not exact:
+                rows = self.ann.candidates(q, nprobe or self.nprobe)
+                total = self._base_count + len(self._new_records)
+                if total > self._base_count:
+                    rows = np.concatenate([rows, np.arange(self._base_count, total)])
+                # Sorted row order keeps the mmap gather mostly sequential.
+                rows = np.sort(rows[self._alive[rows]])
+
+            scores = self._scan_scores(q, rows, exact)
+            if rows is None:
+                if not self._alive.all():
+                    scores[~self._alive] = -np.inf
+                k = min(k, len(self))
+
+            if self._codes is not None and not exact:
+                shortlist = top_k(scores, k * self.rescore_factor)
+                if rows is None:
+                    # With few live rows the shortlist reaches the tombstones.
+                    shortlist = shortlist[self._alive[shortlist]]
+                candidates = np.sort(shortlist if rows is None else rows[shortlist])
+                exact_scores = self._gather(candidates) @ q
+                order = top_k(exact_scores, k)
+                return [(int(candidates[i]), float(exact_scores[i])) for i in order]
+
+            order = top_k(scores, k)
+            if rows is None:
+                return [(int(row), float(scores[row])) for row in order]
+            return [(int(rows[i]), float(scores[i])) for i in order]
+
+    def search(
+        self,
+        qvec: Sequence[float],
+        k: int,
+        nprobe: Optional[int] = None,
+    ) -> List[Tuple[str, float, Dict]]:
+        found = self.search_rows(qvec, k, nprobe=nprobe)
+        with self._lock:
+            return self.fetch([row for row, _ in found], [score for _, score in found])
+
+    def fetch(self, rows: Sequence[int], scores: Sequence[float]) -> List[Tuple[str, float, Dict]]:
+        hits = []
+        for row, score in zip(rows, scores):
+            cid, text, meta = self._record(int(row))
+            meta = dict(meta)
+            meta.setdefault("chunk_id", cid)
+            hits.append((text, float(score), meta))
+        return hits
@@ -0,0 +1,126 @@
+"""Persistent ingestion manifest for incremental, idempotent re-ingestion."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+# Fixed namespace so chunk IDs are stable across machines and runs.
+CHUNK_NAMESPACE = uuid.UUID("6f1d3c52-8a3e-4d8b-9a57-2f0c7e1b4a10")
+
+
+def file_hash(path: Path, block_size: int = 1 << 20) -> str:
+    """SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        for block in iter(lambda: handle.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(source: str, ordinal: int, text: str) -> str:
+    """Deterministic UUID for the *ordinal*-th chunk of *source*."""
+    text_hash = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    return str(uuid.uuid5(CHUNK_NAMESPACE, f"{source}\x00{ordinal}\x00{text_hash}"))
+
+
+@dataclass
+class ManifestDiff:
+    """What a re-ingestion run has to do to bring the index up to date."""
+
+    to_ingest: List[Tuple[Path, str]] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: Dict[str, List[str]] = field(default_factory=dict)
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+
+class IngestManifest:
+    """Map of corpus-relative path → content hash and stored chunk IDs."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path).expanduser().resolve()
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as handle:
+                self.entries = json.load(handle).get("files", {})
+
+    def diff(
+        self, root: Path, paths: Iterable[Path], force: bool = False
+    ) -> ManifestDiff:
+        """Compare *paths* under *root* with the manifest.
+
+        ``force`` schedules every present file for ingestion while still
+        reporting files that disappeared since the last run.
+        """
+        result = ManifestDiff()
+        seen = set()
+        for path in paths:
+            key = path.relative_to(root).as_posix()
+            seen.add(key)
+            digest = file_hash(path)
+            result.hashes[key] = digest
+            entry = self.entries.get(key)
+            if not force and entry and entry.get("hash") == digest:
+                result.unchanged.append(key)
+            else:
+                result.to_ingest.append((path, key))
+
+        for key, entry in self.entries.items():
+            if key not in seen:
+                result.removed[key] = list(entry.get("chunk_ids", []))
+        return result
+
+    def update(self, key: str, digest: str, chunk_ids: List[str]) -> None:
+        self.entries[key] = {"hash": digest, "chunk_ids": list(chunk_ids)}
+
+    def remove(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def save(self) -> None:
+        """Atomically write the manifest next to its final location."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp.open("w", encoding="utf-8") as handle:
+            json.dump({"version": 1, "files": self.entries}, handle, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class IndexGeneration:
+    """Monotonic counter in a small file, bumped whenever the index changes.
+
+    API workers compare it against the value they last saw to invalidate
+    anything derived from the index (e.g. cached answers).
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path).expanduser().resolve()
+        self._stamp = None
+        self._value = 0
+
+    def current(self) -> int:
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return 0
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp != self._stamp:
+            try:
+                self._value = int(self.path.read_text(encoding="utf-8").strip() or 0)
+            except ValueError:
+                self._value = 0
+            self._stamp = stamp
+        return self._value
+
+    def bump(self) -> int:
+        value = self.current() + 1
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(str(value), encoding="utf-8")
+        os.replace(tmp, self.path)
+        return value
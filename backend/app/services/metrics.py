@@ -0,0 +1,237 @@
+"""Per-stage latency metrics in Prometheus text format.
+
+Pipeline stages are timed with :class:`Span`. Every span is observed in the
+``hermes_stage_duration_seconds`` histogram and, when the current request
+started a timing breakdown (:func:`start_timings`), added to it in
+milliseconds. The breakdown lives in a context variable, so spans in
+tasks and threads started by the request land in the same dict.
+
+Observing a value is a bisect and a few increments under a lock; there is
+no background thread and nothing is allocated per call after the first
+observation of a label set.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.services.utils import Timer
+
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _REGISTRY.append(self)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = float(value)
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last = +Inf), sum, count].
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield from super().render()
+        with self._lock:
+            series = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, f'le="{le}"')
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total!r}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = Histogram(
+    "hermes_stage_duration_seconds",
+    "Time spent in one stage of answering a question.",
+    ("stage",),
+)
+QUERIES = Counter(
+    "hermes_queries_total",
+    "Questions answered, by how they were answered.",
+    ("mode", "label"),
+)
+DEGRADATION_LEVEL = Gauge(
+    "hermes_degradation_level",
+    "Current load degradation level (0 = normal).",
+)
+DEGRADATION_LEVEL.set(0)
+COALESCED = Counter(
+    "hermes_single_flight_coalesced_total",
+    "Requests that joined an identical question already in flight.",
+)
+COALESCED.inc(amount=0.0)
+STREAMS = Counter(
+    "hermes_streams_total",
+    "Answer streams, by whether they completed or the client abandoned them.",
+    ("outcome",),
+)
+CANCELLED_TOKENS = Counter(
+    "hermes_stream_cancelled_tokens_total",
+    "Tokens already generated for streams that were then cancelled.",
+)
+STREAMS.inc("completed", amount=0.0)
+STREAMS.inc("cancelled", amount=0.0)
+CANCELLED_TOKENS.inc(amount=0.0)
+HTTP_SECONDS = Histogram(
+    "hermes_http_request_duration_seconds",
+    "HTTP request latency until the response starts.",
+    ("method", "route", "status"),
+)
+
+
+# The stage breakdown (ms) of the request being handled, if any.
+_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_timings(timings: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Make *timings* (a new dict by default) the current request's breakdown."""
+    timings = {} if timings is None else timings
+    _timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[Dict[str, float]]:
+    return _timings.get()
+
+
+def record(stage: str, seconds: float) -> None:
+    """Observe *seconds* for *stage* and add it to the request breakdown."""
+    STAGE_SECONDS.observe(seconds, stage)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = round(timings.get(stage, 0.0) + seconds * 1000, 2)
+
+
+class Span(Timer):
+    """Times the ``with`` block as one *stage*."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+
+    def __exit__(self, *exc_info) -> None:
+        super().__exit__(*exc_info)
+        record(self.stage, self.seconds)
+
+
+async def timed(stage: str, awaitable):
+    """Await *awaitable* as one *stage*."""
+    with Span(stage):
+        return await awaitable
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """``Server-Timing`` header value for a request breakdown."""
+    return ", ".join(
+        f"{stage};dur={value}" for stage, value in timings.items() if isinstance(value, (int, float))
+    )
+
+
+def observe_http(method: str, route: str, status: int, seconds: float) -> None:
+    HTTP_SECONDS.observe(seconds, method, route, str(status))
+
@@ -0,0 +1,65 @@
+"""Compact vector codes for the local index.
+
+``float16`` halves memory; ``int8`` stores one signed byte per dimension
+plus a float32 scale per vector (``x ≈ scale * code``), a 4× reduction.
+Codes only produce a shortlist; final scores are recomputed against the
+full-precision float32 vectors.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+
+def quantize(vectors: np.ndarray, mode: str, block: int = 65536) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Encode float32 rows as ``(codes, scales)``; ``scales`` is ``None`` for float16."""
+    if mode == "float16":
+        return np.asarray(vectors, dtype=np.float16), None
+    if mode != "int8":
+        raise ValueError(f"Unsupported vector storage mode: {mode}")
+
+    n, dim = vectors.shape
+    codes = np.empty((n, dim), dtype=np.int8)
+    scales = np.empty(n, dtype=np.float32)
+    for start in range(0, n, block):
+        part = np.asarray(vectors[start:start + block], dtype=np.float32)
+        peak = np.abs(part).max(axis=1)
+        peak[peak == 0] = 1.0
+        part_scales = peak / 127.0
+        codes[start:start + block] = np.rint(part / part_scales[:, None]).astype(np.int8)
+        scales[start:start + block] = part_scales
+    return codes, scales
+
+
+def approx_scores(
+    codes: np.ndarray,
+    scales: Optional[np.ndarray],
+    q: np.ndarray,
+    block: int = 16384,
+) -> np.ndarray:
+    """Approximate ``vectors @ q`` from codes, decoding block by block.
+
+    NumPy has no BLAS kernels for float16/int8, so each block is widened to
+    float32 just before the product; peak extra memory is one block. The
+    widening dominates the cost, and float16 conversion is notably slower
+    than int8 on CPUs where NumPy lacks half-precision SIMD.
+    """
+    n = codes.shape[0]
+    out = np.empty(n, dtype=np.float32)
+    buffer = np.empty((min(block, n), codes.shape[1]), dtype=np.float32)
+    for start in range(0, n, block):
+        size = min(block, n - start)
+        np.copyto(buffer[:size], codes[start:start + size], casting="unsafe")
+        out[start:start + size] = buffer[:size] @ q
+    if scales is not None:
+        out *= scales
+    return out
+
+
+def nbytes(codes: np.ndarray, scales: Optional[np.ndarray]) -> int:
+    return int(codes.nbytes + (scales.nbytes if scales is not None else 0))
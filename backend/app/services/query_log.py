@@ -0,0 +1,195 @@
+"""Structured JSONL access and query log, written off the request path.
+
+Records are plain dicts handed to the ``hermes.query`` and ``hermes.access``
+loggers. While a :class:`QueryLog` is running, both loggers only put the
+record on an in-memory queue; a :class:`logging.handlers.QueueListener`
+thread serialises it to one JSON line in a rotating file. Without one,
+the records go to the normal log output.
+
+Each query record carries the question hash (and, only with
+``include_question``, its text for ``scripts/replay.py``), how it was
+routed, the chunk IDs and scores retrieved and the stage timings.
+``sample_rate`` keeps a fraction of the successful, fast answers; errors,
+cancellations and answers slower than ``slow_ms`` are always written.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+query_logger = logging.getLogger("hermes.query")
+access_logger = logging.getLogger("hermes.access")
+
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(question.encode("utf-8")).hexdigest()[:16]
+
+
+class _RecordQueueHandler(QueueHandler):
+    """Queues the record untouched; formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.msg if isinstance(record.msg, dict) else {"message": record.getMessage()}
+        return json.dumps(message, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class QueryLog:
+    """Rotating JSONL sink for the query and access loggers."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 10,
+        sample_rate: float = 1.0,
+        slow_ms: Optional[float] = None,
+        include_question: bool = False,
+        access: bool = True,
+    ) -> None:
+        self.path = Path(path)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.include_question = include_question
+        self.access = access
+        self.written = 0
+        self.sampled_out = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        file_handler.setFormatter(_JsonFormatter())
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._handler = _RecordQueueHandler(self._queue)
+        self._listener = QueueListener(self._queue, file_handler)
+        self._loggers = [query_logger] + ([access_logger] if access else [])
+
+    def start(self) -> None:
+        self._listener.start()
+        for logger in self._loggers:
+            logger.addHandler(self._handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def stop(self) -> None:
+        """Detach from the loggers and flush what is still queued."""
+        for logger in self._loggers:
+            logger.removeHandler(self._handler)
+            logger.propagate = True
+        self._listener.stop()
+
+    def keep(self, status: str, total_ms: Optional[float]) -> bool:
+        if status != "ok" or self.sample_rate >= 1.0:
+            return True
+        if self.slow_ms is not None and total_ms is not None and total_ms >= self.slow_ms:
+            return True
+        return random.random() < self.sample_rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "written": self.written,
+            "sampled_out": self.sampled_out,
+            "sample_rate": self.sample_rate,
+        }
+
+
+# The running log, if any; set by :func:`build_query_log` callers at startup.
+_active: Optional[QueryLog] = None
+
+
+def log_query(
+    question: str,
+    transport: str,
+    mode: str,
+    label: str,
+    metas: Optional[List[Dict]] = None,
+    scores: Optional[List[float]] = None,
+    timings: Optional[Dict[str, float]] = None,
+    cached: bool = False,
+    status: str = "ok",
+    **extra: Any,
+) -> None:
+    """Write one query record (subject to sampling)."""
+    timings = dict(timings or {})
+    log = _active
+    if log is not None:
+        if not log.keep(status, timings.get("total")):
+            log.sampled_out += 1
+            return
+        log.written += 1
+    record = {
+        "type": "query",
+        "ts": round(time.time(), 3),
+        "transport": transport,
+        "question_hash": question_hash(question),
+        "mode": mode,
+        "label": label,
+        "cached": cached,
+        "status": status,
+        "chunk_ids": [meta.get("chunk_id") for meta in metas or []],
+        "scores": [round(float(score), 4) for score in scores or []],
+        "timings": timings,
+        **extra,
+    }
+    if log is not None and log.include_question:
+        record["question"] = question
+    query_logger.info(record)
+
+
+def access_log_enabled() -> bool:
+    """Whether a running :class:`QueryLog` is writing access records."""
+    return _active is not None and _active.access
+
+
+def log_access(method: str, path: str, status: int, duration: float, client: str) -> None:
+    access_logger.info({
+        "type": "access",
+        "ts": round(time.time(), 3),
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 2),
+        "client": client,
+    })
+
+
+def build_query_log(cfg: Optional[Dict]) -> Optional[QueryLog]:
+    """Create and start the :class:`QueryLog` from the ``query_log`` section."""
+    global _active
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    log = QueryLog(
+        cfg.get("path", "data/logs/queries.jsonl"),
+        max_bytes=int(cfg.get("max_mb", 50) * 1024 * 1024),
+        backups=cfg.get("backups", 10),
+        sample_rate=cfg.get("sample_rate", 1.0),
+        slow_ms=cfg.get("slow_ms"),
+        include_question=cfg.get("include_question", False),
+        access=cfg.get("access", True),
+    )
+    log.start()
+    _active = log
+    return log
+
+
+def stop_query_log(log: Optional[QueryLog]) -> None:
+    global _active
+    if log is not None:
+        log.stop()
+        if _active is log:
+            _active = None
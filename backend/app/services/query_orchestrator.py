@@ -1,16 +1,41 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import asyncio
+import logging
+import re
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field, replace
 from fnmatch import fnmatch
-from typing import Dict, Generator, List, Optional
+from typing import AsyncIterator, Dict, Generator, List, Optional
 
+from app.services.answer_cache import CachedAnswer, build_answer_cache, cache_key
+from app.services.circuit_breaker import CircuitOpen
 from app.services.llm_providers import LLMFactory
+from app.services.metrics import (
+    CANCELLED_TOKENS,
+    QUERIES,
+    STREAMS,
+    Span,
+    record,
+    start_timings,
+    timed,
+)
 from app.services.constants import NO_CONTEXT_RESPONSE
+from app.services.degradation import DegradationProfile, build_degradation
 from app.services.preprocessor import preprocess_query
 from app.services.rag_service import RAGService
+from app.services.router_classifier import RouterStats, build_router_classifier
+from app.services.scheduler import PRIORITY_HIGH
+from app.services.single_flight import Flight, build_single_flight
 from app.services.utils import load_cfg
 
 
+logger = logging.getLogger(__name__)
+
+# Seconds between "dependency unavailable" warnings for the same dependency.
+UNAVAILABLE_LOG_INTERVAL = 60.0
+
 CLASSIFY_SYSTEM_PROMPT = (
     "You are a security-focused routing assistant for a military knowledge base. "
     "Always return ONLY one of the allowed labels."
@@ -49,6 +74,9 @@ FALLBACK_RESPONSE = (
 
 VALID_LABELS = {"NEED_RAG", "NO_RAG", "OUT_OF_SCOPE", "UNSAFE"}
 
+# Word-sized pieces (with trailing whitespace) for replaying cached answers.
+_REPLAY_RE = re.compile(r"\S+\s*|\s+")
+
 
 @dataclass
 class QueryPlan:
@@ -59,6 +87,22 @@ class QueryPlan:
     scores: List[float] = field(default_factory=list)
     metas: List[Dict] = field(default_factory=list)
     message: Optional[str] = None
+    cached_answer: Optional[str] = None
+    generation: Optional[int] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    # Shared stream when the plan was coalesced with identical requests.
+    flight: Optional[Flight] = field(default=None, repr=False, compare=False)
+    coalesced: bool = False
+    # Cheaper pipeline settings chosen under load (RAG plans only).
+    degradation: Optional[DegradationProfile] = field(default=None, repr=False, compare=False)
+
+    @property
+    def cached(self) -> bool:
+        return self.cached_answer is not None
+
+    @property
+    def degradation_level(self) -> int:
+        return self.degradation.level if self.degradation is not None else 0
 
 
 @dataclass
@@ -69,6 +113,24 @@ class QueryOutcome:
     metas: List[Dict]
     mode: str
     label: str
+    cached: bool = False
+
+
+@dataclass
+class StreamStats:
+    """Answer streams that finished vs. were abandoned by their client."""
+
+    completed: int = 0
+    cancelled: int = 0
+    # Tokens already generated when the stream was cancelled.
+    cancelled_tokens: int = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "cancelled_tokens": self.cancelled_tokens,
+        }
 
 
 class QueryOrchestrator:
@@ -84,26 +146,93 @@ class QueryOrchestrator:
         self.router_enabled = router_cfg.get("enabled", True)
         self.min_score = router_cfg.get("min_score", 0.4)
         self.router_rules = router_cfg.get("rules", [])
+        self.speculative_retrieval = router_cfg.get("speculative_retrieval", False)
         self.router_llm = None
         router_llm_cfg = router_cfg.get("llm")
         if self.router_enabled and router_llm_cfg:
             try:
-                self.router_llm = LLMFactory(**router_llm_cfg)
+                self.router_llm = LLMFactory(
+                    **router_llm_cfg,
+                    scheduler=self.rag_service.scheduler,
+                    registry=self.rag_service.llm_registry,
+                    priority=PRIORITY_HIGH,
+                )
             except Exception as e:
                 print("ROUTER LLM FAILED TO LOAD:", e)
                 self.router_llm = None
 
+        classifier_cfg = router_cfg.get("classifier") or {}
+        self.classifier_min_confidence = classifier_cfg.get("min_confidence", 0.6)
+        self.router_classifier = None
+        if self.router_enabled:
+            try:
+                self.router_classifier = build_router_classifier(
+                    classifier_cfg, self.rag_service.emb_factory.embed_texts
+                )
+            except Exception as e:
+                print("ROUTER CLASSIFIER FAILED TO LOAD:", e)
+                self.router_classifier = None
+        self.router_stats = RouterStats()
+        self._unavailable_logged: Dict[str, float] = {}
+
         chat_llm_cfg = self.cfg.get("chat_llm")
         if chat_llm_cfg:
             try:
-                self.chat_llm = LLMFactory(**chat_llm_cfg)
+                self.chat_llm = LLMFactory(
+                    **chat_llm_cfg,
+                    scheduler=self.rag_service.scheduler,
+                    registry=self.rag_service.llm_registry,
+                )
             except Exception as e:
                 print("CHAT LLM FAILED:", e)
                 self.chat_llm = None
         else:
             self.chat_llm = None
 
+        # Create the RAG model client now so it is warmed up with the others.
+        try:
+            self.rag_service._ensure_llm()
+        except Exception as e:
+            print("RAG LLM FAILED:", e)
+
+        self.answer_cache = build_answer_cache(
+            self.cfg.get("answer_cache"), self.rag_service.generation
+        )
+        self.single_flight = build_single_flight(self.cfg.get("single_flight"))
+        self.stream_stats = StreamStats()
+
+        scheduler = self.rag_service.scheduler
+        self.degradation = build_degradation(
+            self.cfg.get("degradation"),
+            scheduler.waiting if scheduler is not None else (lambda: 0),
+        )
+        if self.degradation is not None:
+            # Register the cheaper answer models now so they are warmed up too.
+            for profile in self.degradation.profiles:
+                try:
+                    self.rag_service._llm_for(profile)
+                except Exception as e:
+                    print("DEGRADED LLM FAILED:", e)
+
+    def _classifier_label(self, vector, started: float) -> Optional[str]:
+        """Label from the embedding classifier if it is confident enough."""
+        label, confidence = self.router_classifier.predict(vector)
+        if confidence >= self.classifier_min_confidence or not self.router_llm:
+            self.router_stats.record("classifier", time.perf_counter() - started)
+            return label
+        return None
+
     def _classify_query(self, question: str) -> str:
+        started = time.perf_counter()
+        if self.router_classifier:
+            try:
+                vector = self.rag_service.emb_factory.embed_query(question)
+                label = self._classifier_label(vector, started)
+                if label:
+                    return label
+            except Exception as e:
+                print("ROUTER CLASSIFIER FAILED:", e)
+
         if not self.router_llm:
             return "NEED_RAG"
 
@@ -111,6 +240,38 @@ class QueryOrchestrator:
             CLASSIFY_SYSTEM_PROMPT,
             CLASSIFY_PROMPT.format(question=question),
         )
+        self.router_stats.record("llm", time.perf_counter() - started)
+        return self._parse_label(result)
+
+    async def _embedding(self, question: str, embedding: Optional["asyncio.Future"]):
+        """The question's vector, from the shared *embedding* future if given."""
+        if embedding is not None:
+            return await asyncio.shield(embedding)
+        return await self.rag_service.emb_factory.aembed_query(question)
+
+    async def _aclassify_query(self, question: str, embedding: Optional["asyncio.Future"] = None) -> str:
+        started = time.perf_counter()
+        if self.router_classifier:
+            try:
+                vector = await self._embedding(question, embedding)
+                label = self._classifier_label(vector, started)
+                if label:
+                    return label
+            except Exception as e:
+                print("ROUTER CLASSIFIER FAILED:", e)
+
+        if not self.router_llm:
+            return "NEED_RAG"
+
+        result = await self.router_llm.aanswer(
+            CLASSIFY_SYSTEM_PROMPT,
+            CLASSIFY_PROMPT.format(question=question),
+        )
+        self.router_stats.record("llm", time.perf_counter() - started)
+        return self._parse_label(result)
+
+    @staticmethod
+    def _parse_label(result: Optional[str]) -> str:
         label = (result or "").strip().upper()
         if label not in VALID_LABELS:
             return "NEED_RAG"
@@ -128,33 +289,51 @@ class QueryOrchestrator:
                     return "NO_RAG"
         return None
 
-    def _chat_response(self, question: str, label: str) -> str:
-        if not self.chat_llm:
-            return FALLBACK_RESPONSE
-
-        prompt = (
+    @staticmethod
+    def _chat_prompt(question: str, label: str) -> str:
+        return (
             f"Κατηγορία αιτήματος: {label}.\n"
             f"Ερώτηση: {question}\n"
             "Απάντησε συνοπτικά στα ελληνικά και χωρίς πρόσβαση στα έγγραφα."
         )
-        return self.chat_llm.answer(CHAT_SYSTEM_PROMPT, prompt)
 
-    def plan_question(self, question: str) -> QueryPlan:
-        preprocessed = preprocess_query(question)
-        normalized_question = preprocessed["query"]
-        force_no_answer = preprocessed.get("force_no_answer", False)
+    @staticmethod
+    def _chat_stream_prompt(question: str, label: str) -> str:
+        return (
+            f"Κατηγορία αιτήματος: {label}.\n"
+            f"Ερώτηση: {question}\n"
+            "Απάντησε συνοπτικά στα ελληνικά και με φιλικό τόνο."
+        )
+
+    def _chat_response(self, question: str, label: str) -> str:
+        if not self.chat_llm:
+            return FALLBACK_RESPONSE
+
+        return self.chat_llm.answer(CHAT_SYSTEM_PROMPT, self._chat_prompt(question, label))
+
+    async def _achat_response(self, question: str, label: str) -> str:
+        if not self.chat_llm:
+            return FALLBACK_RESPONSE
 
-        label = (
-            self._apply_rules(normalized_question)
-            if self.router_enabled
-            else "NEED_RAG"
+        return await self.chat_llm.aanswer(
+            CHAT_SYSTEM_PROMPT, self._chat_prompt(question, label)
         )
-        if not label:
-            if not self.router_llm:
-                label = "NEED_RAG"
-            else:
-                label = self._classify_query(normalized_question)
 
+    def _rule_label(self, normalized_question: str) -> Optional[str]:
+        """Label from the static rules, or ``None`` if the router must decide."""
+        if not self.router_enabled:
+            return "NEED_RAG"
+        started = time.perf_counter()
+        label = self._apply_rules(normalized_question)
+        if label:
+            self.router_stats.record("rule", time.perf_counter() - started)
+        if not label and not self.router_llm and not self.router_classifier:
+            return "NEED_RAG"
+        return label
+
+    @staticmethod
+    def _plan_for_label(question: str, label: str) -> Optional[QueryPlan]:
+        """Plans that need no retrieval; ``None`` means go to the RAG pipeline."""
         if label == "UNSAFE":
             return QueryPlan(question=question, mode="unsafe", label=label, message=UNSAFE_RESPONSE)
         if label == "OUT_OF_SCOPE":
@@ -166,9 +345,17 @@ class QueryOrchestrator:
             )
         if label != "NEED_RAG":
             return QueryPlan(question=question, mode="chat", label=label)
+        return None
 
-        ctx_texts, scores, metas = self.rag_service.retrieve(normalized_question)
-
+    def _plan_from_hits(
+        self,
+        normalized_question: str,
+        label: str,
+        force_no_answer: bool,
+        ctx_texts: List[str],
+        scores: List[float],
+        metas: List[Dict],
+    ) -> QueryPlan:
         if force_no_answer and not ctx_texts:
             return QueryPlan(
                 question=normalized_question,
@@ -185,7 +372,8 @@ class QueryOrchestrator:
                 message=NO_CONTEXT_RESPONSE,
             )
 
-        max_score = max(scores) if scores else 0.0
+        # Hits found only by the lexical leg have no cosine and count as 0.
+        max_score = max((meta.get("vector_score", 0.0) for meta in metas), default=0.0)
         if max_score < self.min_score:
             return QueryPlan(
                 question=normalized_question,
@@ -203,20 +391,300 @@ class QueryOrchestrator:
             metas=metas,
         )
 
-    def fulfill_plan(self, plan: QueryPlan) -> QueryOutcome:
-        if plan.mode == "rag":
-            answer, ctx, scores, metas = self.rag_service.answer(
-                plan.question,
-                ctx_texts=plan.ctx_texts,
-                scores=plan.scores,
-                metas=plan.metas,
-            )
-            return QueryOutcome(answer, ctx, scores, metas, "rag", plan.label)
+    # ----------------------------------------------------------- answer cache
+    @staticmethod
+    def _cached_plan(question: str, entry: CachedAnswer) -> QueryPlan:
+        return QueryPlan(
+            question=question,
+            mode=entry.mode,
+            label=entry.label,
+            ctx_texts=entry.ctx_texts,
+            scores=entry.scores,
+            metas=entry.metas,
+            cached_answer=entry.answer,
+        )
+
+    def _cache_applies(self, rule_label: Optional[str]) -> bool:
+        # Only RAG answers are cached; rule-routed chat/blocked queries skip it.
+        return self.answer_cache is not None and rule_label in (None, "NEED_RAG")
+
+    def _lookup_exact(self, question: str) -> Optional[QueryPlan]:
+        # The same text was routed NEED_RAG before, so this may skip routing.
+        entry = self.answer_cache.get_exact(question)
+        return self._cached_plan(question, entry) if entry else None
+
+    # A similar question can still be routed differently (UNSAFE,
+    # OUT_OF_SCOPE), so the similarity lookup runs only once the label is
+    # known to be NEED_RAG.
+    def _lookup_similar(self, question: str) -> Optional[QueryPlan]:
+        vector = self.rag_service.emb_factory.embed_query(question)
+        entry = self.answer_cache.get_similar(vector)
+        return self._cached_plan(question, entry) if entry else None
+
+    async def _alookup_similar(
+        self, question: str, embedding: Optional["asyncio.Future"] = None
+    ) -> Optional[QueryPlan]:
+        vector = await self._embedding(question, embedding)
+        entry = self.answer_cache.get_similar(vector)
+        return self._cached_plan(question, entry) if entry else None
+
+    @staticmethod
+    def _cacheable(plan: QueryPlan, answer: str) -> bool:
+        # Degraded answers (fast model, fewer chunks, shorter) must not be
+        # served from the cache once the load has passed.
+        return plan.mode == "rag" and not plan.cached and plan.degradation_level == 0 and bool(answer)
+
+    def _store_answer(self, plan: QueryPlan, answer: str) -> None:
+        if self.answer_cache is None or not self._cacheable(plan, answer):
+            return
+        try:
+            vector = self.rag_service.emb_factory.embed_query(plan.question)
+        except CircuitOpen:
+            return
+        self.answer_cache.put(
+            plan.question, answer, plan.mode, plan.label,
+            plan.ctx_texts, plan.scores, plan.metas,
+            vector=vector, generation=plan.generation,
+        )
+
+    async def _astore_answer(self, plan: QueryPlan, answer: str) -> None:
+        if self.answer_cache is None or not self._cacheable(plan, answer):
+            return
+        try:
+            vector = await self.rag_service.emb_factory.aembed_query(plan.question)
+        except CircuitOpen:
+            return
+        self.answer_cache.put(
+            plan.question, answer, plan.mode, plan.label,
+            plan.ctx_texts, plan.scores, plan.metas,
+            vector=vector, generation=plan.generation,
+        )
+
+    @staticmethod
+    def _replay(answer: str) -> List[str]:
+        return _REPLAY_RE.findall(answer)
+
+    def _profile(self) -> Optional[DegradationProfile]:
+        return self.degradation.profile() if self.degradation is not None else None
 
-        if plan.mode == "chat":
-            answer = plan.message or self._chat_response(plan.question, plan.label)
-            return QueryOutcome(answer, [], [], [], "chat", plan.label)
+    def _unavailable_plan(self, question: str, exc: CircuitOpen) -> QueryPlan:
+        """Fast-fail plan while a dependency's circuit is open."""
+        now = time.monotonic()
+        if now - self._unavailable_logged.get(exc.name, float("-inf")) >= UNAVAILABLE_LOG_INTERVAL:
+            # Once per interval: every request fails here while the circuit is open.
+            self._unavailable_logged[exc.name] = now
+            logger.warning("Dependency unavailable: %s", exc)
+        return QueryPlan(
+            question=question,
+            mode="guardrail",
+            label="UNAVAILABLE",
+            message=NO_CONTEXT_RESPONSE,
+        )
+
+    def plan_question(self, question: str) -> QueryPlan:
+        timings = start_timings()
+        try:
+            plan = self._plan_question(question)
+        except CircuitOpen as exc:
+            plan = self._unavailable_plan(question, exc)
+        plan.timings = timings
+        QUERIES.inc(plan.mode, plan.label)
+        return plan
+
+    def _plan_question(self, question: str) -> QueryPlan:
+        with Span("preprocess"):
+            preprocessed = preprocess_query(question)
+        normalized_question = preprocessed["query"]
+        force_no_answer = preprocessed.get("force_no_answer", False)
+
+        label = self._rule_label(normalized_question)
+        generation = None
+        if self._cache_applies(label):
+            generation = self.answer_cache.current_generation()
+            cached = self._lookup_exact(normalized_question)
+            if cached is not None:
+                return cached
+        if not label:
+            with Span("route"):
+                label = self._classify_query(normalized_question)
+        if generation is not None and label == "NEED_RAG":
+            with Span("cache"):
+                cached = self._lookup_similar(normalized_question)
+            if cached is not None:
+                return cached
+
+        plan = self._plan_for_label(question, label)
+        if plan is not None:
+            return plan
+
+        profile = self._profile()
+        with Span("retrieve"):
+            ctx_texts, scores, metas = self.rag_service.retrieve(normalized_question, profile)
+        plan = self._plan_from_hits(
+            normalized_question, label, force_no_answer, ctx_texts, scores, metas
+        )
+        plan.generation = generation
+        plan.degradation = profile
+        return plan
+
+    @staticmethod
+    def _discard(*tasks: Optional["asyncio.Task"]) -> None:
+        """Cancel speculative tasks and swallow whatever they end with."""
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def aplan_question(self, question: str) -> QueryPlan:
+        """Async variant of :meth:`plan_question` used by the API routes.
+
+        With ``single_flight`` enabled, concurrent identical questions (same
+        normalized text and index generation) share one plan and, for RAG
+        plans, one model stream.
+
+        ``plan.timings`` is the request's stage breakdown (ms); the stages
+        of answering the plan in the same task are added to it.
+        """
+        if self.single_flight is None:
+            plan = await self._aplan_question(question)
+        else:
+            plan = await self._ajoin_flight(question)
+        start_timings(plan.timings)
+        QUERIES.inc(plan.mode, plan.label)
+        return plan
+
+    async def _ajoin_flight(self, question: str) -> QueryPlan:
+        key = (
+            cache_key(preprocess_query(question)["query"]),
+            self.rag_service.generation.current(),
+        )
+        flight, leader = self.single_flight.join(key)
+        if leader:
+            try:
+                plan = await self._aplan_question(question)
+            except asyncio.CancelledError:
+                flight.plan.cancel()
+                self.single_flight.forget(flight)
+                raise
+            except Exception as exc:
+                flight.plan.set_exception(exc)
+                self.single_flight.forget(flight)
+                raise
+            flight.plan.set_result(plan)
+            if not self._shareable(plan):
+                self.single_flight.forget(flight)
+        else:
+            try:
+                plan = await asyncio.shield(flight.plan)
+            except asyncio.CancelledError:
+                if not flight.plan.cancelled():
+                    raise
+                # The leader went away mid-plan; plan on our own.
+                return await self._ajoin_flight(question)
+
+        if not self._shareable(plan):
+            return plan if leader else replace(plan, timings=dict(plan.timings))
+        return replace(plan, timings=dict(plan.timings), flight=flight, coalesced=not leader)
+
+    @staticmethod
+    def _shareable(plan: QueryPlan) -> bool:
+        return plan.mode == "rag" and not plan.cached
+
+    async def _aplan_question(self, question: str) -> QueryPlan:
+        try:
+            return await self._abuild_plan(question)
+        except CircuitOpen as exc:
+            return self._unavailable_plan(question, exc)
+
+    async def _abuild_plan(self, question: str) -> QueryPlan:
+        """Plan one question.
+
+        With ``router.speculative_retrieval`` the retrieval for NEED_RAG is
+        started alongside classification and discarded for other labels.
+        """
+        started = time.perf_counter()
+        timings = start_timings()
+        with Span("preprocess"):
+            preprocessed = preprocess_query(question)
+        normalized_question = preprocessed["query"]
+        force_no_answer = preprocessed.get("force_no_answer", False)
 
+        label = self._rule_label(normalized_question)
+        generation = None
+        if self._cache_applies(label):
+            generation = self.answer_cache.current_generation()
+            with Span("cache"):
+                cached = self._lookup_exact(normalized_question)
+            if cached is not None:
+                return self._with_timings(cached, timings, started)
+
+        profile = self._profile()
+        retrieval = None
+        embedding = None
+        if label == "NEED_RAG" or (not label and (self.speculative_retrieval or self.router_classifier)):
+            # The classifier, the similar-answer lookup and retrieval all
+            # need the question's vector: embed it once for all of them.
+            embedding = asyncio.create_task(
+                self.rag_service.emb_factory.aembed_query(normalized_question)
+            )
+            embedding.add_done_callback(lambda t: t.cancelled() or t.exception())
+        if not label:
+            if self.speculative_retrieval:
+                retrieval = asyncio.create_task(
+                    timed(
+                        "retrieve",
+                        self.rag_service.aretrieve(normalized_question, profile, embedding=embedding),
+                    )
+                )
+            try:
+                label = await timed("route", self._aclassify_query(normalized_question, embedding))
+            except BaseException:
+                self._discard(retrieval, embedding)
+                raise
+        if generation is not None and label == "NEED_RAG":
+            try:
+                cached = await timed("cache", self._alookup_similar(normalized_question, embedding))
+            except BaseException:
+                self._discard(retrieval, embedding)
+                raise
+            if cached is not None:
+                self._discard(retrieval, embedding)
+                return self._with_timings(cached, timings, started)
+
+        plan = self._plan_for_label(question, label)
+        if plan is not None:
+            self._discard(retrieval, embedding)
+            if retrieval is not None:
+                timings["retrieve_discarded"] = 1
+            return self._with_timings(plan, timings, started)
+
+        if retrieval is None:
+            retrieval = timed(
+                "retrieve",
+                self.rag_service.aretrieve(normalized_question, profile, embedding=embedding),
+            )
+        try:
+            ctx_texts, scores, metas = await retrieval
+        except BaseException:
+            self._discard(embedding)
+            raise
+        plan = self._plan_from_hits(
+            normalized_question, label, force_no_answer, ctx_texts, scores, metas
+        )
+        plan.generation = generation
+        plan.degradation = profile
+        return self._with_timings(plan, timings, started)
+
+    @staticmethod
+    def _with_timings(plan: QueryPlan, timings: Dict[str, float], started: float) -> QueryPlan:
+        # With speculation, plan < route + retrieve shows the overlap.
+        record("plan", time.perf_counter() - started)
+        plan.timings = timings
+        return plan
+
+    @staticmethod
+    def _static_outcome(plan: QueryPlan) -> QueryOutcome:
+        """Outcome for plans that are answered without calling a model."""
         if plan.mode == "guardrail":
             return QueryOutcome(plan.message or NO_CONTEXT_RESPONSE, [], [], [], "guardrail", plan.label)
 
@@ -237,18 +705,98 @@ class QueryOrchestrator:
         answer = plan.message or FALLBACK_RESPONSE
         return QueryOutcome(answer, [], [], [], "chat", plan.label)
 
+    def fulfill_plan(self, plan: QueryPlan) -> QueryOutcome:
+        if plan.cached:
+            return QueryOutcome(
+                plan.cached_answer, plan.ctx_texts, plan.scores, plan.metas,
+                plan.mode, plan.label, cached=True,
+            )
+
+        try:
+            if plan.mode == "rag":
+                answer, ctx, scores, metas = self.rag_service.answer(
+                    plan.question,
+                    ctx_texts=plan.ctx_texts,
+                    scores=plan.scores,
+                    metas=plan.metas,
+                    profile=plan.degradation,
+                )
+                self._store_answer(plan, answer)
+                return QueryOutcome(answer, ctx, scores, metas, "rag", plan.label)
+
+            if plan.mode == "chat":
+                answer = plan.message or self._chat_response(plan.question, plan.label)
+                return QueryOutcome(answer, [], [], [], "chat", plan.label)
+        except CircuitOpen as exc:
+            return self._static_outcome(self._unavailable_plan(plan.question, exc))
+
+        return self._static_outcome(plan)
+
+    async def afulfill_plan(self, plan: QueryPlan) -> QueryOutcome:
+        """Async variant of :meth:`fulfill_plan`."""
+        if plan.cached:
+            return QueryOutcome(
+                plan.cached_answer, plan.ctx_texts, plan.scores, plan.metas,
+                plan.mode, plan.label, cached=True,
+            )
+
+        if plan.flight is not None:
+            answer = "".join([token async for token in self.astream_plan(plan)])
+            return QueryOutcome(
+                answer, plan.ctx_texts, plan.scores, plan.metas, "rag", plan.label
+            )
+
+        try:
+            if plan.mode == "rag":
+                with Span("generate"):
+                    answer, ctx, scores, metas = await self.rag_service.aanswer(
+                        plan.question,
+                        ctx_texts=plan.ctx_texts,
+                        scores=plan.scores,
+                        metas=plan.metas,
+                        profile=plan.degradation,
+                    )
+                await self._astore_answer(plan, answer)
+                return QueryOutcome(answer, ctx, scores, metas, "rag", plan.label)
+
+            if plan.mode == "chat":
+                answer = plan.message or await timed(
+                    "generate", self._achat_response(plan.question, plan.label)
+                )
+                return QueryOutcome(answer, [], [], [], "chat", plan.label)
+        except CircuitOpen as exc:
+            return self._static_outcome(self._unavailable_plan(plan.question, exc))
+
+        return self._static_outcome(plan)
+
     def answer_question(self, question: str) -> QueryOutcome:
         plan = self.plan_question(question)
         return self.fulfill_plan(plan)
 
+    async def aanswer_question(self, question: str) -> QueryOutcome:
+        plan = await self.aplan_question(question)
+        return await self.afulfill_plan(plan)
+
     def stream_plan(self, plan: QueryPlan) -> Generator[str, None, None]:
-        if plan.mode == "rag":
-            yield from self.rag_service.stream_answer(
-                plan.question,
-                ctx_texts=plan.ctx_texts,
-                scores=plan.scores,
-                metas=plan.metas,
-            )
+        if plan.cached:
+            yield from self._replay(plan.cached_answer)
+        elif plan.mode == "rag":
+            tokens: List[str] = []
+            try:
+                for token in self.rag_service.stream_answer(
+                    plan.question,
+                    ctx_texts=plan.ctx_texts,
+                    scores=plan.scores,
+                    metas=plan.metas,
+                    profile=plan.degradation,
+                ):
+                    tokens.append(token)
+                    yield token
+            except CircuitOpen as exc:
+                # Open circuits fail before the first token.
+                yield self._unavailable_plan(plan.question, exc).message
+                return
+            self._store_answer(plan, "".join(tokens))
         elif plan.mode == "chat":
             # Stream chat response token by token
             if plan.message:
@@ -256,15 +804,111 @@ class QueryOrchestrator:
                 yield plan.message
             elif self.chat_llm:
                 # Stream from chat_llm
-                prompt = (
-                    f"Κατηγορία αιτήματος: {plan.label}.\n"
-                    f"Ερώτηση: {plan.question}\n"
-                    "Απάντησε συνοπτικά στα ελληνικά και με φιλικό τόνο."
-                )
-                yield from self.chat_llm.stream_answer(CHAT_SYSTEM_PROMPT, prompt)
+                prompt = self._chat_stream_prompt(plan.question, plan.label)
+                try:
+                    yield from self.chat_llm.stream_answer(CHAT_SYSTEM_PROMPT, prompt)
+                except CircuitOpen as exc:
+                    yield self._unavailable_plan(plan.question, exc).message
             else:
                 yield FALLBACK_RESPONSE
         else:
             # For unsafe/out_of_scope, yield the message
             outcome = self.fulfill_plan(plan)
             yield outcome.answer
+
+    async def astream_plan(self, plan: QueryPlan) -> AsyncIterator[str]:
+        """Async variant of :meth:`stream_plan`."""
+        if plan.flight is not None:
+            # The leader's plan drives the single producer; every request
+            # (leader included) reads the shared token log.
+            flight = plan.flight
+            # Only requests that are reading hold the flight, so a plan that
+            # is never streamed cannot keep the producer alive; the producer
+            # is cancelled once every reader has gone.
+            flight.hold()
+            try:
+                if flight.abandoned:
+                    # The readers before us left and stopped the shared
+                    # stream: answer on our own.
+                    async for token in self._astream_plan(plan):
+                        yield token
+                    return
+                flight.start(lambda: self._astream_plan(flight.plan.result()))
+                async for token in flight.subscribe():
+                    yield token
+            finally:
+                flight.release()
+            return
+
+        async for token in self._astream_plan(plan):
+            yield token
+
+    async def _astream_plan(self, plan: QueryPlan) -> AsyncIterator[str]:
+        """Stream *plan*; closing or cancelling it closes the model stream."""
+        produced = 0
+        started = time.perf_counter()
+        generated = not plan.cached and plan.mode in ("rag", "chat")
+        try:
+            async with aclosing(self._agenerate(plan)) as stream:
+                async for token in stream:
+                    if not produced:
+                        if generated:
+                            record("ttft", time.perf_counter() - started)
+                        self._record_ttft(plan, started)
+                    produced += 1
+                    yield token
+        except (asyncio.CancelledError, GeneratorExit):
+            self.stream_stats.cancelled += 1
+            self.stream_stats.cancelled_tokens += produced
+            STREAMS.inc("cancelled")
+            CANCELLED_TOKENS.inc(amount=produced)
+            raise
+        if generated:
+            record("generate", time.perf_counter() - started)
+        self.stream_stats.completed += 1
+        STREAMS.inc("completed")
+
+    def _record_ttft(self, plan: QueryPlan, started: float) -> None:
+        """Feed the degradation controller: planning time plus time to first token."""
+        if self.degradation is None or plan.mode != "rag" or plan.cached:
+            return
+        planning = plan.timings.get("plan", 0.0) / 1000.0
+        self.degradation.record_ttft(planning + time.perf_counter() - started)
+
+    async def _agenerate(self, plan: QueryPlan) -> AsyncIterator[str]:
+        if plan.cached:
+            for piece in self._replay(plan.cached_answer):
+                yield piece
+        elif plan.mode == "rag":
+            tokens: List[str] = []
+            try:
+                async for token in self.rag_service.astream_answer(
+                    plan.question,
+                    ctx_texts=plan.ctx_texts,
+                    scores=plan.scores,
+                    metas=plan.metas,
+                    profile=plan.degradation,
+                ):
+                    tokens.append(token)
+                    yield token
+            except CircuitOpen as exc:
+                # Open circuits fail before the first token.
+                yield self._unavailable_plan(plan.question, exc).message
+                return
+            # Only answers streamed to completion reach the cache.
+            await self._astore_answer(plan, "".join(tokens))
+        elif plan.mode == "chat":
+            if plan.message:
+                yield plan.message
+            elif self.chat_llm:
+                prompt = self._chat_stream_prompt(plan.question, plan.label)
+                try:
+                    async for token in self.chat_llm.astream_answer(CHAT_SYSTEM_PROMPT, prompt):
+                        yield token
+                except CircuitOpen as exc:
+                    yield self._unavailable_plan(plan.question, exc).message
+            else:
+                yield FALLBACK_RESPONSE
+        else:
+            outcome = self._static_outcome(plan)
+            yield outcome.answer
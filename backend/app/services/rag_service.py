@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
+from contextlib import aclosing
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from langchain_core.documents import Document
 
+from app.services.circuit_breaker import build_breakers
+from app.services.degradation import DegradationProfile
 from app.services.embeddings import EmbeddingFactory
-from app.services.loaders import load_doc
+from app.services.endpoint_pool import is_endpoint_failure
+from app.services.ingest_pipeline import IngestPipeline, IngestStats
+from app.services.lexical import LexicalIndex, reciprocal_rank_fusion
+from app.services.manifest import IndexGeneration, IngestManifest
+from app.services.metrics import Span, timed
 from app.services.reranker import Reranker
+from app.services.llm_registry import build_llm_registry
+from app.services.scheduler import build_scheduler
 from app.services.splitter import TitleSplitter
 from app.services.utils import iter_files, load_cfg
 from app.services.vectordb import VectorDB
@@ -32,8 +43,47 @@ class RAGService:
             ),
         )
 
-        self.emb_factory = EmbeddingFactory(**self.cfg["embeddings"])
-        self.vector_db = VectorDB(self.cfg["vector_db"], self.emb_factory)
+        ingest_cfg = self.cfg.get("ingest", {})
+        self.generation = IndexGeneration(
+            Path(ingest_cfg.get("generation_path", "data/index_generation"))
+        )
+        # Generation of the index files this process has open.
+        self._index_generation = self.generation.current()
+        self._reload_lock = threading.Lock()
+
+        # Fail fast while Ollama or Weaviate is down, by dependency name.
+        self.breakers = build_breakers(
+            self.cfg.get("circuit_breakers"), failures={"ollama": is_endpoint_failure}
+        )
+
+        # Shared model clients, connection pools and endpoint health for
+        # every model user.
+        self.llm_registry = build_llm_registry(
+            self.cfg.get("llm_pool"), breaker=self.breakers.get("ollama")
+        )
+
+        emb_cfg = self.cfg["embeddings"]
+        emb_kwargs = {}
+        if emb_cfg.get("provider") == "ollama":
+            emb_kwargs = {
+                "breaker": self.breakers.get("ollama"),
+                "timeout": self.llm_registry.timeout,
+            }
+            if emb_cfg.get("endpoints"):
+                emb_kwargs["pool"] = self.llm_registry.endpoint_pool(emb_cfg["endpoints"])
+        self.emb_factory = EmbeddingFactory(**emb_cfg, **emb_kwargs)
+        self.vector_db = VectorDB(
+            self.cfg["vector_db"], self.emb_factory, breaker=self.breakers.get("weaviate")
+        )
+
+        self.lexical = None
+        self.hybrid_cfg = self.cfg.get("hybrid", {})
+        if self.hybrid_cfg.get("enabled"):
+            self.lexical = LexicalIndex(
+                self.hybrid_cfg.get("path", "data/lexical_index"),
+                k1=self.hybrid_cfg.get("k1", 1.2),
+                b=self.hybrid_cfg.get("b", 0.75),
+            )
 
         self.reranker = None
         reranker_cfg = self.cfg.get("reranker", {})
@@ -46,13 +96,19 @@ class RAGService:
                     use_fp16=reranker_cfg.get("use_fp16", True),
                     device=reranker_cfg.get("device", "cpu"),
                     trust_remote_code=reranker_cfg.get("trust_remote_code", False),
+                    max_workers=reranker_cfg.get("max_workers", 1),
                 )
                 self.logger.info("Reranker loaded: %s", reranker_cfg["model"])
             except Exception as exc:
                 self.logger.warning("Reranker disabled due to init error: %s", exc)
                 self.reranker = None
 
+        # Shared by every LLM client so each model has one concurrency limit.
+        self.scheduler = build_scheduler(self.cfg.get("scheduler"))
+
         self._llm = None
+        # Cheaper answer models used under load, by degradation level.
+        self._degraded_llms: Dict[int, Any] = {}
         self.llm_cfg = self.cfg["llm"]
         self.system_prompt = self.llm_cfg.get(
             "system_prompt",
@@ -60,50 +116,199 @@ class RAGService:
             "Απάντησε μόνο με βάση τα παρεχόμενα αποσπάσματα.",
         )
 
-    def ingest_corpus(self) -> None:
+    def ingest_corpus(self, full: bool = False) -> IngestStats:
+        """Bring the vector store in line with the corpus directory.
+
+        Unchanged files (by content hash) are skipped, changed files are
+        upserted under deterministic chunk IDs and chunks of removed or
+        shrunk files are deleted. ``full=True`` ignores the manifest.
+        """
         corpus_cfg = self.cfg["corpus"]
         root = Path(corpus_cfg["input_dir"]).expanduser().resolve()
         if not root.exists():
             raise FileNotFoundError(f"Corpus directory not found: {root}")
 
         extensions = corpus_cfg.get("file_types", [])
-        batch_texts: List[str] = []
-        batch_meta: List[Dict] = []
-
-        for path in iter_files(root, extensions):
-            documents = load_doc(path)
-            chunks = self.splitter.split_documents(documents)
-            for chunk in chunks:
-                metadata = dict(chunk.metadata)
-                metadata.setdefault("source", str(path))
-                batch_texts.append(chunk.page_content)
-                batch_meta.append(metadata)
-
-                if len(batch_texts) >= 1000:
-                    self.vector_db.add_documents(batch_texts, batch_meta)
-                    batch_texts.clear()
-                    batch_meta.clear()
-
-        if batch_texts:
-            self.vector_db.add_documents(batch_texts, batch_meta)
+        ingest_cfg = self.cfg.get("ingest", {})
+        manifest = IngestManifest(
+            Path(ingest_cfg.get("manifest_path", "data/ingest_manifest.json"))
+        )
+        previous = dict(manifest.entries)
+        if self.lexical is not None and not len(self.lexical) and previous:
+            # Hybrid search was switched on after an earlier ingestion: the
+            # lexical index has never seen the unchanged files.
+            self.logger.info("Lexical index is empty; re-ingesting the full corpus")
+            full = True
+
+        diff = manifest.diff(root, iter_files(root, extensions), force=full)
+        pipeline = IngestPipeline(
+            splitter_cfg=self.cfg["splitter"],
+            emb_factory=self.emb_factory,
+            vector_db=self.vector_db,
+            lexical=self.lexical,
+            parse_workers=ingest_cfg.get("parse_workers", 2),
+            embed_workers=ingest_cfg.get("embed_workers", 1),
+            write_workers=ingest_cfg.get("write_workers", 1),
+            batch_size=ingest_cfg.get("batch_size", 1000),
+            queue_size=ingest_cfg.get("queue_size", 4),
+        )
+        stats = pipeline.run(diff.to_ingest)
+        stats.files_skipped = len(diff.unchanged)
+
+        # Only now that every new chunk is written, drop the ones that are
+        # no longer produced by the corpus.
+        stale: List[str] = []
+        for key, new_ids in stats.chunk_ids.items():
+            old_ids = previous.get(key, {}).get("chunk_ids", [])
+            keep = set(new_ids)
+            stale.extend(cid for cid in old_ids if cid not in keep)
+            manifest.update(key, diff.hashes[key], new_ids)
+        for key, old_ids in diff.removed.items():
+            stale.extend(old_ids)
+            manifest.remove(key)
+        stats.files_removed = len(diff.removed)
+        stats.chunks_deleted = self.vector_db.delete(stale)
+        self.vector_db.apply_index_tuning()
+        changed = bool(diff.to_ingest or diff.removed or stats.chunks_deleted)
+        if not changed:
+            # Nothing to write: keep the snapshot and the trained ANN cells.
+            manifest.save()
+            return stats
+
+        if self.lexical is not None:
+            self.lexical.delete(stale)
+            self.lexical.persist()
 
         self.vector_db.persist()
+        stats.ann_built = self.vector_db.build_ann()
+        manifest.save()
+        # Tell API workers that answers derived from the old index are stale.
+        self._index_generation = self.generation.bump()
+        return stats
+
+    def _indexes_stale(self) -> bool:
+        return self.generation.current() != self._index_generation
+
+    def _reload_indexes(self) -> None:
+        """Re-open the on-disk indexes after another process re-ingested."""
+        with self._reload_lock:
+            generation = self.generation.current()
+            if generation == self._index_generation:
+                return
+            self.vector_db.reload()
+            if self.lexical is not None:
+                self.lexical.load()
+            self._index_generation = generation
+        self.logger.info("Reloaded indexes at generation %s", generation)
 
     def _ensure_llm(self) -> None:
         if self._llm is None:
             from app.services.llm_providers import LLMFactory
 
-            self._llm = LLMFactory(**self.llm_cfg)
+            self._llm = LLMFactory(
+                **self.llm_cfg, scheduler=self.scheduler, registry=self.llm_registry
+            )
 
-    def retrieve(self, question: str) -> Tuple[List[str], List[float], List[Dict]]:
+    def _llm_for(self, profile: Optional[DegradationProfile]):
+        """Answer model for *profile*: the configured one or a cheaper variant."""
+        self._ensure_llm()
+        if profile is None or not profile.changes_llm:
+            return self._llm
+        llm = self._degraded_llms.get(profile.level)
+        if llm is None:
+            from app.services.llm_providers import LLMFactory
+
+            llm_cfg = {**self.llm_cfg, **(profile.llm or {})}
+            if profile.max_tokens is not None:
+                limit = llm_cfg.get("max_tokens")
+                llm_cfg["max_tokens"] = min(limit, profile.max_tokens) if limit else profile.max_tokens
+            llm = self._degraded_llms[profile.level] = LLMFactory(
+                **llm_cfg, scheduler=self.scheduler, registry=self.llm_registry
+            )
+        return llm
+
+    def _search_sizes(self, profile: Optional[DegradationProfile] = None) -> Tuple[int, int]:
+        """Final top-k and the per-leg candidate count for hybrid fusion."""
         k = self.cfg["vector_db"].get("top_k", 6)
-        hits = self.vector_db.similarity_search(question, k=k)
+        if self.reranker is not None and self.reranker.top_k and not self._rerank(profile):
+            # Without the reranker, keep the prompt as short as it would have made it.
+            k = min(k, self.reranker.top_k)
+        if profile is not None and profile.top_k is not None:
+            k = min(k, profile.top_k)
+        if self.lexical is None:
+            return k, k
+        return k, max(k, self.hybrid_cfg.get("candidates", 2 * k))
+
+    @staticmethod
+    def _with_vector_scores(hits):
+        """Keep each hit's cosine in its meta; fusion and reranking replace the
+        score, but ``router.min_score`` is checked against the cosine."""
+        return [(text, score, {**meta, "vector_score": score}) for text, score, meta in hits]
+
+    def _fuse(self, vector_hits, lexical_hits, k: int):
+        return reciprocal_rank_fusion(
+            [vector_hits, lexical_hits],
+            k=self.hybrid_cfg.get("rrf_k", 60),
+            limit=k,
+        )
+
+    def _rerank(self, profile: Optional[DegradationProfile]) -> bool:
+        return self.reranker is not None and (profile is None or profile.rerank)
+
+    def retrieve(
+        self, question: str, profile: Optional[DegradationProfile] = None
+    ) -> Tuple[List[str], List[float], List[Dict]]:
+        if self._indexes_stale():
+            self._reload_indexes()
+        k, candidates = self._search_sizes(profile)
+        hits = self._with_vector_scores(self.vector_db.similarity_search(question, k=candidates))
+        if self.lexical is not None:
+            with Span("lexical"):
+                lexical_hits = self.lexical.search(question, candidates)
+            hits = self._fuse(hits, lexical_hits, k)
         if not hits:
             return [], [], []
 
-        if self.reranker:
-            hits = self.reranker.rerank(question, hits)
+        if self._rerank(profile):
+            with Span("rerank"):
+                hits = self.reranker.rerank(question, hits)
+
+        return self._unpack_hits(hits)
+
+    async def aretrieve(
+        self,
+        question: str,
+        profile: Optional[DegradationProfile] = None,
+        embedding: Optional["asyncio.Future"] = None,
+    ) -> Tuple[List[str], List[float], List[Dict]]:
+        """Async variant of :meth:`retrieve`; both legs of hybrid search run concurrently.
+
+        *embedding* is a shared future of the question's embedding, if the
+        caller started one.
+        """
+        if self._indexes_stale():
+            await asyncio.to_thread(self._reload_indexes)
+        k, candidates = self._search_sizes(profile)
+        if self.lexical is not None:
+            hits, lexical_hits = await asyncio.gather(
+                self.vector_db.asimilarity_search(question, k=candidates, embedding=embedding),
+                timed("lexical", asyncio.to_thread(self.lexical.search, question, candidates)),
+            )
+            hits = self._fuse(self._with_vector_scores(hits), lexical_hits, k)
+        else:
+            hits = self._with_vector_scores(
+                await self.vector_db.asimilarity_search(question, k=k, embedding=embedding)
+            )
+        if not hits:
+            return [], [], []
+
+        if self._rerank(profile):
+            hits = await timed("rerank", self.reranker.arerank(question, hits))
+
+        return self._unpack_hits(hits)
 
+    @staticmethod
+    def _unpack_hits(hits) -> Tuple[List[str], List[float], List[Dict]]:
         texts = [hit[0] for hit in hits]
         scores = [hit[1] for hit in hits]
         metas = [hit[2] for hit in hits]
@@ -131,17 +336,19 @@ class RAGService:
         ctx_texts: Optional[List[str]] = None,
         scores: Optional[List[float]] = None,
         metas: Optional[List[Dict]] = None,
+        profile: Optional[DegradationProfile] = None,
     ) -> Tuple[str, List[str], List[float], List[Dict]]:
-        self._ensure_llm()
+        llm = self._llm_for(profile)
 
         if ctx_texts is None or scores is None or metas is None:
-            ctx_texts, scores, metas = self.retrieve(question)
+            ctx_texts, scores, metas = self.retrieve(question, profile)
 
         if not ctx_texts:
             return NO_CONTEXT_RESPONSE, [], [], []
 
-        prompt = self._build_prompt(question, ctx_texts)
-        response = self._llm.answer(self.system_prompt, prompt)
+        with Span("prompt"):
+            prompt = self._build_prompt(question, ctx_texts)
+        response = llm.answer(self.system_prompt, prompt)
         return response, ctx_texts, scores, metas
 
     def stream_answer(
@@ -150,18 +357,67 @@ class RAGService:
         ctx_texts: Optional[List[str]] = None,
         scores: Optional[List[float]] = None,
         metas: Optional[List[Dict]] = None,
+        profile: Optional[DegradationProfile] = None,
     ):
         """Stream answer tokens from the RAG system."""
-        self._ensure_llm()
+        llm = self._llm_for(profile)
 
         if ctx_texts is None or scores is None or metas is None:
-            ctx_texts, scores, metas = self.retrieve(question)
+            ctx_texts, scores, metas = self.retrieve(question, profile)
 
         if not ctx_texts:
             yield NO_CONTEXT_RESPONSE
             return
 
-        prompt = self._build_prompt(question, ctx_texts)
+        with Span("prompt"):
+            prompt = self._build_prompt(question, ctx_texts)
 
-        for token in self._llm.stream_answer(self.system_prompt, prompt):
+        for token in llm.stream_answer(self.system_prompt, prompt):
             yield token
+
+    async def aanswer(
+        self,
+        question: str,
+        ctx_texts: Optional[List[str]] = None,
+        scores: Optional[List[float]] = None,
+        metas: Optional[List[Dict]] = None,
+        profile: Optional[DegradationProfile] = None,
+    ) -> Tuple[str, List[str], List[float], List[Dict]]:
+        """Async variant of :meth:`answer`."""
+        llm = self._llm_for(profile)
+
+        if ctx_texts is None or scores is None or metas is None:
+            ctx_texts, scores, metas = await self.aretrieve(question, profile)
+
+        if not ctx_texts:
+            return NO_CONTEXT_RESPONSE, [], [], []
+
+        with Span("prompt"):
+            prompt = self._build_prompt(question, ctx_texts)
+        response = await llm.aanswer(self.system_prompt, prompt)
+        return response, ctx_texts, scores, metas
+
+    async def astream_answer(
+        self,
+        question: str,
+        ctx_texts: Optional[List[str]] = None,
+        scores: Optional[List[float]] = None,
+        metas: Optional[List[Dict]] = None,
+        profile: Optional[DegradationProfile] = None,
+    ) -> AsyncIterator[str]:
+        """Async variant of :meth:`stream_answer`."""
+        llm = self._llm_for(profile)
+
+        if ctx_texts is None or scores is None or metas is None:
+            ctx_texts, scores, metas = await self.aretrieve(question, profile)
+
+        if not ctx_texts:
+            yield NO_CONTEXT_RESPONSE
+            return
+
+        with Span("prompt"):
+            prompt = self._build_prompt(question, ctx_texts)
+
+        async with aclosing(llm.astream_answer(self.system_prompt, prompt)) as stream:
+            async for token in stream:
+                yield token
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Sequence, Tuple
 
 
@@ -14,9 +16,17 @@ class Reranker:
         use_fp16: bool = True,
         device: str = "cpu",
         trust_remote_code: bool = False,
+        max_workers: int = 1,
     ):
         self.top_k = top_k
         self.provider = provider
+        # Cross-encoder scoring is CPU/GPU bound. A small dedicated pool keeps
+        # it off the event loop without letting concurrent requests oversubscribe
+        # the device.
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers),
+            thread_name_prefix="reranker",
+        )
 
         if provider == "sentence-transformers":
             from sentence_transformers import CrossEncoder
@@ -52,3 +62,15 @@ class Reranker:
         limit = self.top_k if self.top_k else len(reranked)
         trimmed = reranked[:limit]
         return [(doc[0], float(score), doc[2]) for doc, score in trimmed]
+
+    async def arerank(
+        self,
+        query: str,
+        docs: Sequence[Tuple[str, float, Dict]],
+    ) -> List[Tuple[str, float, Dict]]:
+        """Run :meth:`rerank` on the bounded reranker executor."""
+        if not docs:
+            return []
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.rerank, query, docs)
@@ -0,0 +1,117 @@
+"""Embedding-based query router (nearest centroid).
+
+Each label's centroid is the normalised mean embedding of its labelled
+examples. A query is assigned to the closest centroid by cosine
+similarity; the softmax over the similarities gives a confidence that the
+orchestrator compares against a threshold before falling back to the LLM.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import yaml
+
+
+logger = logging.getLogger(__name__)
+
+
+class RouterClassifier:
+    """Nearest-centroid classifier over query embeddings."""
+
+    def __init__(self, labels: Sequence[str], centroids: np.ndarray, temperature: float = 20.0) -> None:
+        self.labels = list(labels)
+        self.centroids = centroids.astype(np.float32)
+        self.temperature = temperature
+
+    @staticmethod
+    def load_examples(path: str) -> Dict[str, List[str]]:
+        """Read ``{label: [question, ...]}`` from a YAML file."""
+        with Path(path).expanduser().resolve().open("r", encoding="utf-8") as handle:
+            data = yaml.safe_load(handle) or {}
+        return {str(label): [str(q) for q in questions or []] for label, questions in data.items()}
+
+    @classmethod
+    def train(
+        cls,
+        examples: Dict[str, List[str]],
+        embed_texts,
+        temperature: float = 20.0,
+    ) -> "RouterClassifier":
+        """Embed every example with *embed_texts* and average per label."""
+        labels = [label for label, questions in examples.items() if questions]
+        if not labels:
+            raise ValueError("Router examples file contains no labelled questions")
+        texts = [q for label in labels for q in examples[label]]
+        vectors = np.asarray(embed_texts(texts), dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        centroids = []
+        start = 0
+        for label in labels:
+            count = len(examples[label])
+            mean = vectors[start:start + count].mean(axis=0)
+            centroids.append(mean / max(float(np.linalg.norm(mean)), 1e-12))
+            start += count
+        return cls(labels, np.stack(centroids), temperature=temperature)
+
+    def predict(self, vector: Sequence[float]) -> Tuple[str, float]:
+        """Return ``(label, confidence)`` for a query embedding."""
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        sims = self.centroids @ q
+        logits = (sims - sims.max()) * self.temperature
+        probs = np.exp(logits)
+        probs /= probs.sum()
+        best = int(np.argmax(probs))
+        return self.labels[best], float(probs[best])
+
+
+class RouterStats:
+    """Counts and latency of routing decisions by source (rule/classifier/llm)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+
+    def record(self, source: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[source] = self.counts.get(source, 0) + 1
+            self.seconds[source] = self.seconds.get(source, 0.0) + seconds
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            total = sum(self.counts.values())
+            routed = self.counts.get("classifier", 0) + self.counts.get("llm", 0)
+            return {
+                "decisions": dict(self.counts),
+                "avg_latency_ms": {
+                    source: self.seconds[source] / count * 1000
+                    for source, count in self.counts.items()
+                },
+                "fallback_rate": self.counts.get("llm", 0) / routed if routed else 0.0,
+                "total": total,
+            }
+
+
+def build_router_classifier(cfg: Optional[Dict], embed_texts) -> Optional[RouterClassifier]:
+    """Train the classifier from ``router.classifier`` at startup."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    start = time.perf_counter()
+    examples = RouterClassifier.load_examples(cfg.get("examples_path", "config/router_examples.yml"))
+    classifier = RouterClassifier.train(
+        examples, embed_texts, temperature=cfg.get("temperature", 20.0)
+    )
+    logger.info(
+        "Router classifier trained on %d examples in %.2fs",
+        sum(map(len, examples.values())),
+        time.perf_counter() - start,
+    )
+    return classifier
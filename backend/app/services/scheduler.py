@@ -0,0 +1,184 @@
+"""Admission control for LLM calls: per-model concurrency with priorities.
+
+Every model has a fixed number of slots. Callers that find no free slot
+wait in a priority queue (router calls ahead of generations, FIFO within a
+priority) and are rejected with :class:`AdmissionRejected` once they have
+waited longer than ``max_wait``. Waiters can be told their queue position
+through the :data:`queue_listener` context variable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.services.metrics import Span
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+_SEQUENCE = itertools.count()
+
+# Set by a request handler to receive queue positions (1 = next in line).
+queue_listener: contextvars.ContextVar[Optional[Callable[[int], None]]] = (
+    contextvars.ContextVar("queue_listener", default=None)
+)
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a call waited longer than the scheduler deadline."""
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "future", "listener", "position")
+
+    def __init__(self, priority: int, seq: int, listener) -> None:
+        self.priority = priority
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.listener = listener
+        self.position = 0
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class ModelQueue:
+    """Slots and waiters for a single model."""
+
+    def __init__(self, model: str, concurrency: int) -> None:
+        self.model = model
+        self.concurrency = max(1, concurrency)
+        self.active = 0
+        self._waiters: List[_Waiter] = []
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for w in self._waiters if not w.future.done())
+
+    def _notify_positions(self) -> None:
+        for position, waiter in enumerate(sorted(self._waiters), start=1):
+            if waiter.listener is not None and waiter.position != position:
+                waiter.position = position
+                try:
+                    waiter.listener(position)
+                except Exception:
+                    pass
+
+    def _wake_next(self) -> None:
+        while self._waiters and self.active < self.concurrency:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():
+                continue
+            self.active += 1
+            waiter.future.set_result(None)
+        self._notify_positions()
+
+    async def acquire(self, priority: int, deadline: Optional[float]) -> None:
+        started = time.perf_counter()
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+
+        waiter = _Waiter(priority, next(_SEQUENCE), queue_listener.get())
+        heapq.heappush(self._waiters, waiter)
+        self._notify_positions()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), deadline)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"{self.model}: waited more than {deadline:.0f}s for a free slot"
+            ) from None
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+        self.wait_seconds += time.perf_counter() - started
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        if waiter.future.done() and not waiter.future.cancelled():
+            # Admitted just as we gave up: hand the slot back.
+            self.release()
+            return
+        waiter.future.cancel()
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+        self._notify_positions()
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake_next()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "concurrency": self.concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.wait_seconds / self.admitted * 1000 if self.admitted else 0.0,
+        }
+
+
+class LLMScheduler:
+    """Per-model :class:`ModelQueue` registry shared by all LLM clients."""
+
+    def __init__(
+        self,
+        concurrency: Optional[Dict[str, int]] = None,
+        default_concurrency: int = 1,
+        max_wait: Optional[float] = 30.0,
+    ) -> None:
+        self.concurrency = dict(concurrency or {})
+        self.default_concurrency = default_concurrency
+        self.max_wait = max_wait
+        self._queues: Dict[str, ModelQueue] = {}
+
+    def queue(self, model: str) -> ModelQueue:
+        queue = self._queues.get(model)
+        if queue is None:
+            limit = self.concurrency.get(model, self.default_concurrency)
+            queue = self._queues[model] = ModelQueue(model, limit)
+        return queue
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: int = PRIORITY_NORMAL) -> AsyncIterator[None]:
+        """Hold one of *model*'s slots for the duration of the block."""
+        queue = self.queue(model)
+        with Span("queue"):
+            await queue.acquire(priority, self.max_wait)
+        try:
+            yield
+        finally:
+            queue.release()
+
+    def waiting(self) -> int:
+        """LLM calls waiting for a slot, over all models."""
+        return sum(queue.waiting for queue in self._queues.values())
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {model: queue.stats() for model, queue in self._queues.items()}
+
+
+def build_scheduler(cfg: Optional[Dict]) -> Optional[LLMScheduler]:
+    """Create an :class:`LLMScheduler` from the ``scheduler`` section."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    return LLMScheduler(
+        concurrency=cfg.get("concurrency"),
+        default_concurrency=cfg.get("default_concurrency", 1),
+        max_wait=cfg.get("max_wait_seconds", 30.0),
+    )
@@ -0,0 +1,145 @@
+"""Single-flight coalescing of identical in-flight questions.
+
+The first request for a key becomes the leader: it plans the question and,
+once someone streams, drives one producer task over the model stream.
+Concurrent requests with the same key wait for the leader's plan and then
+subscribe to the shared token log; late joiners replay the tokens already
+produced before receiving new ones. The producer is cancelled as soon as
+every request holding the flight has stopped reading.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app.services.metrics import COALESCED
+
+
+class Flight:
+    """One shared plan plus an append-only log of streamed tokens."""
+
+    def __init__(self, key: Hashable, on_done: Callable[["Flight"], None]) -> None:
+        self.key = key
+        self.created = time.monotonic()
+        self.plan: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Nobody may await the plan (no followers); keep failures quiet.
+        self.plan.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self.tokens: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        # Requests reading this flight that have not finished yet.
+        self.holders = 0
+        # Set once the producer was stopped because every reader left.
+        self.abandoned = False
+        self._on_done = on_done
+        self._signal = asyncio.Event()
+        self._producer: Optional[asyncio.Task] = None
+
+    @property
+    def started(self) -> bool:
+        return self._producer is not None
+
+    def hold(self) -> None:
+        self.holders += 1
+
+    def release(self) -> None:
+        self.holders -= 1
+        if self.holders <= 0 and self._producer is not None and not self._producer.done():
+            # Nobody is left to read the answer: stop generating it.
+            self.abandoned = True
+            self._producer.cancel()
+
+    def start(self, source: Callable[[], AsyncIterator[str]]) -> None:
+        """Start the producer on first subscription; later calls are no-ops."""
+        if self._producer is None:
+            self._producer = asyncio.create_task(self._produce(source()))
+
+    def _notify(self) -> None:
+        signal, self._signal = self._signal, asyncio.Event()
+        signal.set()
+
+    async def _produce(self, stream: AsyncIterator[str]) -> None:
+        try:
+            async for token in stream:
+                self.tokens.append(token)
+                self._notify()
+        except asyncio.CancelledError:
+            self.error = RuntimeError("Shared stream was cancelled")
+            raise
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.done = True
+            self._notify()
+            self._on_done(self)
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield every token from the start of the stream, then live ones.
+
+        Readers :meth:`hold` the flight first and :meth:`release` it
+        once they stop reading.
+        """
+        self.subscribers += 1
+        index = 0
+        while True:
+            if index < len(self.tokens):
+                yield self.tokens[index]
+                index += 1
+                continue
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._signal.wait()
+
+
+class SingleFlight:
+    """Registry of in-flight :class:`Flight` objects keyed by question."""
+
+    def __init__(self, max_age: float = 120.0) -> None:
+        self.max_age = max_age
+        self._flights: Dict[Hashable, Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def join(self, key: Hashable) -> Tuple[Flight, bool]:
+        """Return ``(flight, is_leader)`` for *key*."""
+        self._sweep()
+        flight = self._flights.get(key)
+        if flight is not None and not flight.done:
+            self.coalesced += 1
+            COALESCED.inc()
+            return flight, False
+        flight = Flight(key, self.forget)
+        self._flights[key] = flight
+        self.leaders += 1
+        return flight, True
+
+    def forget(self, flight: Flight) -> None:
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+
+    def _sweep(self) -> None:
+        # Plans that were never streamed (client left between plan and
+        # stream) must not be joined forever.
+        now = time.monotonic()
+        for flight in list(self._flights.values()):
+            if not flight.started and now - flight.created > self.max_age:
+                self.forget(flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+def build_single_flight(cfg: Optional[Dict]) -> Optional[SingleFlight]:
+    """Create a :class:`SingleFlight` from the ``single_flight`` section."""
+    if not cfg or not cfg.get("enabled", False):
+        return None
+    return SingleFlight(max_age=cfg.get("max_age_seconds", 120.0))
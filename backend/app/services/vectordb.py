@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
+import uuid
 from pathlib import Path
-from typing import Dict, List, Sequence, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
 import weaviate
 from weaviate.classes.config import DataType, Property
-from weaviate.classes.query import MetadataQuery
+from weaviate.classes.init import AdditionalConfig, Timeout
+from weaviate.classes.query import Filter, MetadataQuery
+
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.metrics import Span, timed
 
 try:
     from weaviate.classes.config import Configure
@@ -17,14 +23,20 @@ except Exception:
 
 
 class VectorDB:
-    """Abstraction layer over Weaviate."""
+    """Abstraction layer over Weaviate or the in-process local index."""
 
-    def __init__(self, cfg: Dict, emb_factory) -> None:
+    def __init__(self, cfg: Dict, emb_factory, breaker: Optional[CircuitBreaker] = None) -> None:
         self.cfg = cfg
         self.emb_factory = emb_factory
         self.backend = cfg["backend"]
+        # Only a remote store can be down; the local index is in-process.
+        self.breaker = breaker if self.backend == "weaviate" else None
 
         if self.backend == "weaviate":
+            # Bound every query so a hung Weaviate fails the request instead
+            # of holding it.
+            timeout = cfg["weaviate"].get("timeout_seconds", 30)
+            additional_config = AdditionalConfig(timeout=Timeout(query=timeout, init=timeout))
             # Prefer env var (for Docker) over config file
             url = os.getenv("WEAVIATE_URL") or cfg["weaviate"].get("url")
             if url:
@@ -33,12 +45,25 @@ class VectorDB:
                 parsed = urlparse(url)
                 host = parsed.hostname or "localhost"
                 port = parsed.port or 8080
-                self.client = weaviate.connect_to_local(host=host, port=port)
+                self.client = weaviate.connect_to_local(
+                    host=host, port=port, additional_config=additional_config
+                )
             else:
-                self.client = weaviate.connect_to_local()
+                self.client = weaviate.connect_to_local(additional_config=additional_config)
             self.class_name = cfg["weaviate"]["class_name"]
             self.text_key = cfg["weaviate"].get("text_key", "text")
             self._ensure_class()
+        elif self.backend == "local":
+            from app.services.local_index import LocalVectorIndex
+
+            local_cfg = cfg.get("local", {})
+            self.ann_cfg = local_cfg.get("ann", {})
+            self.index = LocalVectorIndex(
+                local_cfg.get("path", "data/local_index"),
+                nprobe=self.ann_cfg.get("nprobe", 8),
+                storage=local_cfg.get("storage", "float32"),
+                rescore_factor=local_cfg.get("rescore_factor", 4),
+            )
         else:
             raise ValueError(f"Unsupported vector backend: {self.backend}")
 
@@ -59,50 +84,180 @@ class VectorDB:
             **kwargs,
         )
 
-    def add_documents(self, texts: Sequence[str], metas: Sequence[Dict]) -> None:
+    def apply_index_tuning(self) -> bool:
+        """Set the configured HNSW ``ef`` on the Weaviate collection.
+
+        This changes the shared collection schema, so it runs as part of
+        ingestion rather than whenever a process connects, and only when
+        the stored value differs. Returns True when the schema was updated.
+        """
+        if self.backend != "weaviate":
+            return False
+        ef = self.cfg["weaviate"].get("ef")
+        if ef is None:
+            return False
+        from weaviate.classes.config import Reconfigure
+
+        coll = self.client.collections.get(self.class_name)
+        current = getattr(coll.config.get().vector_index_config, "ef", None)
+        if current == ef:
+            return False
+        coll.config.update(vector_index_config=Reconfigure.VectorIndex.hnsw(ef=ef))
+        return True
+
+    def add_documents(
+        self,
+        texts: Sequence[str],
+        metas: Sequence[Dict],
+        ids: Optional[Sequence[str]] = None,
+    ) -> None:
+        embeddings = self.emb_factory.embed_texts(list(texts))
+        self.add_embeddings(texts, metas, embeddings, ids=ids)
+
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        metas: Sequence[Dict],
+        embeddings: Sequence[Sequence[float]],
+        ids: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Store chunks whose vectors were already computed by the caller.
+
+        When *ids* are given, objects are written under those UUIDs, so a
+        chunk that already exists is replaced instead of duplicated.
+        """
+        if self.backend == "local":
+            if ids is None:
+                ids = [str(uuid.uuid4()) for _ in texts]
+            self.index.add(list(ids), list(texts), list(metas), embeddings)
+            return
+
+        if ids is None:
+            ids = [None] * len(texts)
+
         if self.backend == "weaviate":
-            embeddings = self.emb_factory.embed_texts(list(texts))
             coll = self.client.collections.get(self.class_name)
             with coll.batch.dynamic() as batch:
-                for text, meta, vec in zip(texts, metas, embeddings):
+                for text, meta, vec, obj_id in zip(texts, metas, embeddings, ids):
                     props = {self.text_key: text, **meta}
-                    batch.add_object(properties=props, vector=vec)
+                    batch.add_object(properties=props, vector=vec, uuid=obj_id)
             return
 
+    def delete(self, ids: Sequence[str], batch_size: int = 1000) -> int:
+        """Delete objects by UUID in batches and return how many were removed."""
+        ids = list(ids)
+        if not ids:
+            return 0
+
+        if self.backend == "local":
+            return self.index.delete(ids)
+
+        deleted = 0
+        if self.backend == "weaviate":
+            coll = self.client.collections.get(self.class_name)
+            for start in range(0, len(ids), batch_size):
+                chunk = ids[start:start + batch_size]
+                result = coll.data.delete_many(where=Filter.by_id().contains_any(chunk))
+                deleted += getattr(result, "successful", len(chunk))
+        return deleted
+
     def persist(self) -> None:
-        pass
+        if self.backend == "local":
+            self.index.persist()
+
+    def reload(self) -> None:
+        """Re-open the local snapshot written by another process (ingestion).
+
+        Weaviate serves its own latest data, so this is a no-op there.
+        """
+        if self.backend == "local":
+            self.index.load()
+
+    def build_ann(self) -> bool:
+        """Build the approximate index for the local backend, if configured.
+
+        Weaviate maintains its own HNSW graph, so this is a no-op there.
+        """
+        if self.backend != "local" or not self.ann_cfg.get("enabled", False):
+            return False
+        if len(self.index) < self.ann_cfg.get("min_vectors", 20000):
+            return False
+        self.index.build_ann(
+            nlist=self.ann_cfg.get("nlist") or None,
+            iters=self.ann_cfg.get("iters", 20),
+        )
+        return True
 
     def similarity_search(
         self,
         query: str,
         k: int,
     ) -> List[Tuple[str, float, Dict]]:
-        if self.backend == "weaviate":
-            coll = self.client.collections.get(self.class_name)
+        with Span("embed"):
             qvec = self.emb_factory.embed_query(query)
-            result = coll.query.near_vector(
-                near_vector=qvec,
-                limit=k,
-                return_metadata=MetadataQuery(distance=True, score=True, certainty=True),
-            )
-            hits = []
-            for obj in result.objects:
-                text = obj.properties.get(self.text_key, "")
-                md = getattr(obj, "metadata", None)
-                score = 0.0
-                if md is not None:
-                    distance = getattr(md, "distance", None)
-                    raw_score = getattr(md, "score", None)
-                    certainty = getattr(md, "certainty", None)
-
-                    if distance is not None:
-                        # Convert cosine distance (lower is better) to similarity
-                        score = max(0.0, 1.0 - float(distance))
-                    elif raw_score is not None:
-                        score = float(raw_score)
-                    elif certainty is not None:
-                        score = float(certainty)
-                hits.append((text, float(score), obj.properties))
-            return hits
-
-        return []
+        with Span("search"):
+            if self.breaker is not None:
+                return self.breaker.call(lambda: self._search_by_vector(qvec, k))
+            return self._search_by_vector(qvec, k)
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int,
+        embedding: Optional["asyncio.Future"] = None,
+    ) -> List[Tuple[str, float, Dict]]:
+        """Async variant of :meth:`similarity_search`.
+
+        The query embedding is awaited natively, or taken from *embedding*
+        when the caller already started it; the search itself runs in the
+        default executor so the event loop stays free.
+        """
+        if embedding is not None:
+            qvec = await timed("embed", asyncio.shield(embedding))
+        else:
+            qvec = await timed("embed", self.emb_factory.aembed_query(query))
+        with Span("search"):
+            if self.breaker is not None:
+                return await self.breaker.acall(
+                    lambda: asyncio.to_thread(self._search_by_vector, qvec, k)
+                )
+            return await asyncio.to_thread(self._search_by_vector, qvec, k)
+
+    def ping(self) -> None:
+        """Raise if the vector store cannot serve queries."""
+        if self.backend == "weaviate" and not self.client.is_ready():
+            raise ConnectionError("Weaviate is not ready")
+
+    def _search_by_vector(
+        self,
+        qvec: Sequence[float],
+        k: int,
+    ) -> List[Tuple[str, float, Dict]]:
+        if self.backend == "local":
+            return self.index.search(qvec, k)
+
+        coll = self.client.collections.get(self.class_name)
+        result = coll.query.near_vector(
+            near_vector=qvec,
+            limit=k,
+            return_metadata=MetadataQuery(distance=True, score=True, certainty=True),
+        )
+        hits = []
+        for obj in result.objects:
+            text = obj.properties.get(self.text_key, "")
+            md = getattr(obj, "metadata", None)
+            score = 0.0
+            if md is not None:
+                distance = getattr(md, "distance", None)
+                raw_score = getattr(md, "score", None)
+                certainty = getattr(md, "certainty", None)
+
+                if distance is not None:
+                    # Convert cosine distance (lower is better) to similarity
+                    score = max(0.0, 1.0 - float(distance))
+                elif raw_score is not None:
+                    score = float(raw_score)
+                elif certainty is not None:
+                    score = float(certainty)
+            hits.append((text, float(score), obj.properties))
+        return hits
@@ -8,15 +8,19 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from pathlib import Path
 import os
+import asyncio
 import logging
 
 from app.core.config import settings
+from app.core.rate_limit import RateLimiter
 from app.core.middleware import (
     RateLimitMiddleware,
     SecurityHeadersMiddleware,
     RequestLoggingMiddleware
 )
 from app.api.routes import auth, query, health, upload
+from app.services.health_monitor import build_health_monitor
+from app.services.query_log import build_query_log, stop_query_log
 from app.services.query_orchestrator import QueryOrchestrator
 
 # Setup logging
@@ -42,9 +46,17 @@ app.add_middleware(SecurityHeadersMiddleware)
 # Add request logging
 app.add_middleware(RequestLoggingMiddleware)
 
-# Add rate limiting (adjust limits for production)
+# Add rate limiting (adjust limits for production); /api/status reports it.
+app.state.rate_limiter = None
 if not settings.DEBUG:
-    app.add_middleware(RateLimitMiddleware, calls=100, period=60)
+    app.state.rate_limiter = RateLimiter(
+        calls=settings.RATE_LIMIT_CALLS,
+        period=settings.RATE_LIMIT_PERIOD_SECONDS,
+        llm_tokens=settings.RATE_LIMIT_LLM_TOKENS or None,
+        llm_period=settings.RATE_LIMIT_LLM_PERIOD_SECONDS,
+        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+    )
+    app.add_middleware(RateLimitMiddleware, limiter=app.state.rate_limiter)
 
 # Add trusted host protection (production)
 if not settings.DEBUG:
@@ -91,17 +103,38 @@ async def startup_event():
         app.state.rag_service = rag_service
         app.state.query_orchestrator = query_orchestrator
         
+        # Load the models in the background; /api/health reports progress.
+        if query_orchestrator.cfg.get("llm_pool", {}).get("warm_up", True):
+            app.state.warm_up = asyncio.create_task(rag_service.llm_registry.warm_up())
+        # Probe Ollama and Weaviate in the background; /api/health serves
+        # the cached results and a good probe closes a half-open circuit.
+        monitor = build_health_monitor(query_orchestrator.cfg.get("health"), rag_service)
+        app.state.health_monitor = monitor
+        app.state.health_probes = asyncio.create_task(monitor.run())
+        # JSONL access/query log, written by a background thread.
+        app.state.query_log = build_query_log(query_orchestrator.cfg.get("query_log"))
+        
     except Exception as e:
         logger.warning(f"⚠ Could not initialize RAG services: {e}")
         logger.warning("  The API will run in demo mode.")
         app.state.rag_service = None
         app.state.query_orchestrator = None
+        app.state.health_monitor = None
+        app.state.query_log = None
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down Ερμής RAG API...")
+    for name in ("warm_up", "health_probes"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    if rag_service is not None:
+        await rag_service.llm_registry.aclose()
+    # Flush the records still queued.
+    stop_query_log(getattr(app.state, "query_log", None))
 
 
 # Include routers
@@ -0,0 +1,60 @@
+"""
+Recall@k vs latency of the local IVF index against exact search.
+Run after ingesting with vector_db.backend: "local".
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.ann import IVFIndex, recall_at_k
+from app.services.local_index import LocalVectorIndex
+from app.services.utils import load_cfg
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200, help="number of probe queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--nlist", type=int, default=0, help="rebuild in memory with this many cells")
+    parser.add_argument("--noise", type=float, default=0.05, help="perturbation applied to sampled rows")
+    args = parser.parse_args()
+
+    env_cfg = os.getenv("RAG_CONFIG_PATH") or os.getenv("CONFIG_PATH")
+    config_path = env_cfg or str(Path(__file__).resolve().parent.parent / "config" / "config.yml")
+    local_cfg = load_cfg(config_path)["vector_db"].get("local", {})
+
+    index = LocalVectorIndex(local_cfg.get("path", "data/local_index"))
+    if not len(index):
+        print("❌ Local index is empty. Ingest with vector_db.backend: local first.")
+        sys.exit(1)
+
+    if args.nlist or index.ann is None:
+        print("🧭 Building IVF index in memory...")
+        index.ann = IVFIndex.build(index._matrix(), nlist=args.nlist or None)
+
+    # Probe with perturbed stored vectors so queries land near real chunks.
+    rng = np.random.default_rng(0)
+    matrix = index._matrix()
+    rows = rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False)
+    queries = np.asarray(matrix[np.sort(rows)], dtype=np.float32)
+    queries += rng.normal(scale=args.noise, size=queries.shape).astype(np.float32)
+
+    print(f"📊 {len(index)} vectors, nlist={index.ann.nlist}, k={args.k}, {len(queries)} queries")
+    print(f"   {'nprobe':>6}  {'recall@k':>8}  {'latency':>10}")
+    for row in recall_at_k(index, queries, k=args.k, nprobes=args.nprobe):
+        label = "exact" if row["nprobe"] == 0 else str(row["nprobe"])
+        print(f"   {label:>6}  {row['recall']:8.3f}  {row['latency_ms']:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Login storm: logins/s and the latency of other requests while bcrypt runs,
+before (bcrypt on the event loop, JWT decoded on every request) and after
+(bcrypt in the password-hash thread pool, verified claims cached).
+
+"before" reproduces the previous login and /me handlers; "after" is
+app.api.routes.auth. Both are driven in-process through ASGI. While
+--logins logins run at --concurrency, a cheap GET is sent every
+--ping-ms and its latency from when it was due is recorded: with bcrypt
+on the loop it waits for the hash in progress. Then --me authenticated
+requests are timed with one token, and token verification on its own.
+
+    python scripts/bench_login.py --logins 40 --concurrency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError, jwt
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.routes import auth
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    decode_claims,
+    get_password_hash,
+    oauth2_scheme,
+    token_cache,
+    verify_password,
+)
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    if stack == "after":
+        app.include_router(auth.router, prefix="/api/auth")
+        return app
+
+    @app.post("/api/auth/login")
+    async def login(form_data: OAuth2PasswordRequestForm = Depends()):
+        user = auth.get_user(form_data.username)
+        if not user or not verify_password(form_data.password, user["hashed_password"]):
+            raise HTTPException(status_code=401)
+        return {"access_token": create_access_token(data={"sub": user["username"]})}
+
+    @app.get("/api/auth/me")
+    async def me(token: str = Depends(oauth2_scheme)):
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            raise HTTPException(status_code=401)
+        return {"username": auth.get_user(payload["sub"])["username"]}
+
+    return app
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def storm(client: httpx.AsyncClient, logins: int, concurrency: int, ping_ms: float) -> dict:
+    remaining = iter(range(logins))
+    latencies = []
+    pings = []
+    done = asyncio.Event()
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/auth/login", data={"username": "admin", "password": "1234"}
+            )
+            assert response.status_code == 200, response.text
+            latencies.append(time.perf_counter() - started)
+
+    async def pinger():
+        # Latency from when the ping was due, so a blocked loop counts.
+        due = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/ping")
+            pings.append(time.perf_counter() - due)
+            due = max(due + ping_ms / 1000.0, time.perf_counter())
+
+    ping_task = asyncio.create_task(pinger())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ping_task
+    return {
+        "logins/s": logins / elapsed,
+        "login p50": percentile(latencies, 0.5) * 1000,
+        "ping p50": percentile(pings, 0.5) * 1000,
+        "ping p99": percentile(pings, 0.99) * 1000,
+    }
+
+
+async def bench_me(client: httpx.AsyncClient, requests: int) -> float:
+    token = create_access_token(data={"sub": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+    started = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get("/api/auth/me", headers=headers)
+        assert response.status_code == 200, response.text
+    return requests / (time.perf_counter() - started)
+
+
+async def run(args) -> None:
+    started = time.perf_counter()
+    get_password_hash("1234")
+    print(f"📊 admin seeding at import: before {(time.perf_counter() - started) * 1000:.0f} ms, "
+          f"after 0 ms (precomputed hash)")
+    print(f"📊 {args.logins} logins x{args.concurrency}, ping every {args.ping_ms:g} ms; "
+          f"{args.me} /me requests")
+    print(f"   {'stack':<8} {'logins/s':>9} {'login p50':>10} {'ping p50':>9} {'ping p99':>9} {'/me req/s':>10}")
+    for stack in ("before", "after"):
+        app = build_app(stack)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+            result = await storm(client, args.logins, args.concurrency, args.ping_ms)
+            token_cache.hits = token_cache.misses = 0
+            me_rate = await bench_me(client, args.me)
+        print(f"   {stack:<8} {result['logins/s']:9.1f} {result['login p50']:8.0f}ms "
+              f"{result['ping p50']:7.1f}ms {result['ping p99']:7.1f}ms {me_rate:10.0f}")
+    print(f"   token cache (after): {token_cache.stats()}")
+
+    token = create_access_token(data={"sub": "admin"})
+    rounds = 20000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    decode_us = (time.perf_counter() - started) / rounds * 1e6
+    started = time.perf_counter()
+    for _ in range(rounds):
+        decode_claims(token)
+    cached_us = (time.perf_counter() - started) / rounds * 1e6
+    print(f"   token check: jwt.decode {decode_us:.1f} us, cached {cached_us:.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--ping-ms", type=float, default=10.0)
+    parser.add_argument("--me", type=int, default=2000, help="authenticated /me requests")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Requests/s and streaming throughput of the middleware stack, before
+(BaseHTTPMiddleware) and after (plain ASGI).
+
+The "before" stack reproduces the previous BaseHTTPMiddleware versions of
+the security-header, request-logging and rate-limit middleware; "after"
+is app.core.middleware. Both wrap the same FastAPI app and are driven
+in-process through ASGI (no sockets, log lines discarded), so the numbers
+isolate the cost of the middleware itself:
+
+    python scripts/bench_middleware.py --requests 5000 --streams 50 --chunks 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.middleware import (
+    RateLimitMiddleware,
+    RequestLoggingMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.core.rate_limit import RateLimiter
+
+
+class LegacyRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app, calls: int = 100, period: int = 60):
+        super().__init__(app)
+        self.calls = calls
+        self.period = period
+        self.clients = defaultdict(list)
+
+    async def dispatch(self, request: Request, call_next):
+        client_ip = request.client.host
+        now = datetime.now()
+        self.clients[client_ip] = [
+            t for t in self.clients[client_ip] if now - t < timedelta(seconds=self.period)
+        ]
+        if len(self.clients[client_ip]) >= self.calls:
+            return JSONResponse({"error": "rate_limit_exceeded"}, status_code=429)
+        self.clients[client_ip].append(now)
+        return await call_next(request)
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        if "Server" in response.headers:
+            del response.headers["Server"]
+        return response
+
+
+class LegacyRequestLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        print(f"[{datetime.now().isoformat()}] {request.method} {request.url.path} "
+              f"- Status: {response.status_code} - Duration: {duration:.3f}s "
+              f"- Client: {request.client.host}")
+        return response
+
+
+def build_app(stack: str, chunks: int, chunk_bytes: int) -> FastAPI:
+    app = FastAPI()
+    payload = ("α" * (chunk_bytes // 2)).encode("utf-8")
+
+    @app.get("/api/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    @app.get("/api/stream")
+    async def stream():
+        async def body():
+            for _ in range(chunks):
+                yield payload
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    limit = 10 ** 9  # never hit; only the bookkeeping is measured
+    if stack == "before":
+        app.add_middleware(LegacySecurityHeaders)
+        app.add_middleware(LegacyRequestLogging)
+        app.add_middleware(LegacyRateLimit, calls=limit, period=60)
+    else:
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(RequestLoggingMiddleware)
+        app.add_middleware(RateLimitMiddleware, limiter=RateLimiter(calls=limit, period=60))
+    return app
+
+
+# Spread requests over many client addresses so the per-IP request log of
+# the old rate limiter stays short and does not swamp the comparison.
+_CLIENTS = itertools.cycle(f"10.0.{i // 256}.{i % 256}" for i in range(4096))
+
+
+async def call(app, path: str) -> tuple:
+    """One GET through the ASGI app; returns (status, body chunks, body bytes)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost")],
+        "client": (next(_CLIENTS), 50000),
+        "server": ("localhost", 80),
+    }
+    sent = False
+    status = 0
+    chunks = 0
+    nbytes = 0
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Stay connected until the response is done.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status, chunks, nbytes
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            chunks += 1
+            nbytes += len(message["body"])
+
+    await app(scope, receive, send)
+    return status, chunks, nbytes
+
+
+async def bench_requests(app, total: int, concurrency: int) -> float:
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            await call(app, "/api/ping")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - started)
+
+
+async def bench_streams(app, streams: int) -> tuple:
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(app, "/api/stream") for _ in range(streams)))
+    elapsed = time.perf_counter() - started
+    chunks = sum(r[1] for r in results)
+    nbytes = sum(r[2] for r in results)
+    return chunks / elapsed, nbytes / elapsed / 1e6
+
+
+async def run(args) -> None:
+    print(f"📊 {args.requests} requests x{args.concurrency}, "
+          f"{args.streams} streams x {args.chunks} chunks of {args.chunk_bytes} B")
+    print(f"   {'stack':<8} {'req/s':>10} {'chunks/s':>12} {'MB/s':>8}")
+    for stack in ("before", "after"):
+        app = build_app(stack, args.chunks, args.chunk_bytes)
+        # Warm up, then measure with the log lines discarded.
+        with contextlib.redirect_stdout(io.StringIO()):
+            await bench_requests(app, 200, args.concurrency)
+        sink = io.StringIO()
+        with contextlib.redirect_stdout(sink):
+            rps = await bench_requests(app, args.requests, args.concurrency)
+            chunk_rate, mb_rate = await bench_streams(app, args.streams)
+        print(f"   {stack:<8} {rps:10.0f} {chunk_rate:12.0f} {mb_rate:8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=500, help="body chunks per stream")
+    parser.add_argument("--chunk-bytes", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Frames/s and CPU per stream of the SSE/WebSocket token writers,
+one frame per token vs. time/byte micro-batching.
+
+A fake orchestrator emits --tokens tokens per stream at --token-ms
+intervals (0 = as fast as possible) for --streams concurrent streams.
+Frames are encoded and written to a loopback TCP socket, so the numbers
+cover the serving path (events, encoding, one send per frame) but not
+the model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.streaming import FlushPolicy, query_events, sse_frame
+
+
+@dataclass
+class _Plan:
+    mode: str = "rag"
+    label: str = "NEED_RAG"
+
+
+class FakeOrchestrator:
+    def __init__(self, tokens: int, token_ms: float) -> None:
+        self.tokens = tokens
+        self.delay = token_ms / 1000.0
+
+    async def aplan_question(self, question: str) -> _Plan:
+        return _Plan()
+
+    async def astream_plan(self, plan: _Plan):
+        for i in range(self.tokens):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            else:
+                await asyncio.sleep(0)
+            yield "λέξη\n" if i % 40 == 39 else f" λέξη{i}"
+
+
+async def _discard(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    while await reader.read(65536):
+        pass
+    writer.close()
+
+
+async def run_stream(orchestrator, policy: FlushPolicy, transport: str, port: int) -> tuple:
+    _, writer = await asyncio.open_connection("127.0.0.1", port)
+    frames = 0
+    nbytes = 0
+    plan = None
+    async for kind, payload in query_events(orchestrator, "q", policy):
+        if kind == "plan":
+            plan = payload
+            continue
+        if transport == "sse":
+            frame = sse_frame(payload)
+        elif policy.enabled:
+            frame = json.dumps({"type": "token", "content": payload})
+        else:
+            # Unbatched WebSocket baseline repeats the metadata per token.
+            frame = json.dumps({"type": "token", "content": payload, "mode": plan.mode, "label": plan.label})
+        data = frame.encode("utf-8")
+        writer.write(data)
+        await writer.drain()
+        frames += 1
+        nbytes += len(data)
+    writer.close()
+    await writer.wait_closed()
+    return frames, nbytes
+
+
+async def bench(args, policy: FlushPolicy, transport: str) -> dict:
+    orchestrator = FakeOrchestrator(args.tokens, args.token_ms)
+    server = await asyncio.start_server(_discard, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_stream(orchestrator, policy, transport, port) for _ in range(args.streams))
+    )
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    server.close()
+    await server.wait_closed()
+    frames = sum(r[0] for r in results)
+    return {
+        "frames": frames / args.streams,
+        "frames_per_s": frames / wall,
+        "kib": sum(r[1] for r in results) / args.streams / 1024,
+        "cpu_ms_per_stream": cpu / args.streams * 1000,
+        "wall_s": wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=512)
+    parser.add_argument("--token-ms", type=float, default=2.0, help="delay between tokens")
+    parser.add_argument("--interval-ms", type=float, default=30.0)
+    parser.add_argument("--max-bytes", type=int, default=1024)
+    args = parser.parse_args()
+
+    policies = {
+        "per-token": FlushPolicy(interval=0.0, max_bytes=0),
+        f"batched {args.interval_ms:g}ms/{args.max_bytes}B": FlushPolicy(
+            interval=args.interval_ms / 1000.0, max_bytes=args.max_bytes
+        ),
+    }
+    print(
+        f"🧪 {args.streams} streams × {args.tokens} tokens, "
+        f"{args.token_ms:g} ms between tokens\n"
+    )
+    print(f"{'transport':<10} {'policy':<22} {'frames/stream':>14} {'frames/s':>10} {'KiB/stream':>11} {'CPU ms/stream':>14}")
+    for transport in ("sse", "ws"):
+        for name, policy in policies.items():
+            row = asyncio.run(bench(args, policy, transport))
+            print(
+                f"{transport:<10} {name:<22} {row['frames']:>14.0f} {row['frames_per_s']:>10.0f} "
+                f"{row['kib']:>11.1f} {row['cpu_ms_per_stream']:>14.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
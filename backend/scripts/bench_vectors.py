@@ -0,0 +1,92 @@
+"""
+Memory / recall / latency of the local index storage modes
+(float32, float16, int8 + float32 rescoring).
+
+Uses the configured local index, or a synthetic clustered corpus with
+--synthetic N so the numbers can be reproduced without ingesting.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.local_index import LocalVectorIndex
+from app.services.quantization import STORAGE_MODES
+from app.services.utils import load_cfg
+
+
+def synthetic_index(path: Path, n: int, dim: int) -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.standard_normal((max(8, n // 500), dim))
+    labels = rng.integers(0, centers.shape[0], n)
+    vectors = (centers[labels] + 0.4 * rng.standard_normal((n, dim))).astype(np.float32)
+    index = LocalVectorIndex(str(path))
+    index.add([str(i) for i in range(n)], [""] * n, [{}] * n, vectors)
+    index.persist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N random vectors instead")
+    parser.add_argument("--dim", type=int, default=384)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        path = Path(tempfile.mkdtemp(prefix="bench_vectors_"))
+        print(f"🧪 Generating {args.synthetic} synthetic vectors (d={args.dim}) in {path}")
+        synthetic_index(path, args.synthetic, args.dim)
+    else:
+        env_cfg = os.getenv("RAG_CONFIG_PATH") or os.getenv("CONFIG_PATH")
+        config_path = env_cfg or str(Path(__file__).resolve().parent.parent / "config" / "config.yml")
+        local_cfg = load_cfg(config_path)["vector_db"].get("local", {})
+        path = Path(local_cfg.get("path", "data/local_index"))
+
+    baseline = LocalVectorIndex(str(path))
+    if not len(baseline):
+        print("❌ Local index is empty. Ingest with vector_db.backend: local or use --synthetic.")
+        sys.exit(1)
+
+    rng = np.random.default_rng(1)
+    matrix = baseline._matrix()
+    rows = np.sort(rng.choice(matrix.shape[0], size=min(args.queries, matrix.shape[0]), replace=False))
+    queries = np.asarray(matrix[rows], dtype=np.float32)
+    queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    truth = [{row for row, _ in baseline.search_rows(q, args.k, exact=True)} for q in queries]
+
+    print(f"📊 {len(baseline)} vectors, k={args.k}, rescore_factor={args.rescore_factor}")
+    print(f"   {'storage':<8} {'RAM':>10} {'ratio':>6} {'recall@k':>9} {'latency':>10}")
+    full_bytes = None
+    for mode in STORAGE_MODES:
+        index = LocalVectorIndex(str(path), storage=mode, rescore_factor=args.rescore_factor)
+        index.ann = None  # isolate the effect of the storage mode
+        index.search_rows(queries[0], args.k)  # warm-up
+        start = time.perf_counter()
+        hits = 0
+        for q, expected in zip(queries, truth):
+            found = index.search_rows(q, args.k)
+            hits += len(expected & {row for row, _ in found})
+        latency = (time.perf_counter() - start) / len(queries) * 1000
+        memory = index.memory_bytes()
+        full_bytes = full_bytes or memory
+        recall = hits / max(1, sum(len(t) for t in truth))
+        print(
+            f"   {mode:<8} {memory / 2**20:8.1f}MB {full_bytes / memory:5.1f}x "
+            f"{recall:9.3f} {latency:8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Minimal stand-in for an Ollama server, for testing endpoint balancing,
+failover and warm-up without GPUs.
+
+Implements GET /api/tags, POST /api/chat (streaming and not) and
+POST /api/embed. Replies are canned Greek text; embeddings are
+deterministic per text. Extra control routes:
+
+    POST /fake/down   every route answers 503 (simulated outage)
+    POST /fake/up     back to normal
+    GET  /fake/stats  request counts and requests in flight
+
+Run several on different ports and list them as `endpoints:` in config.yml:
+
+    python scripts/fake_ollama.py --port 11501 --latency-ms 50
+    python scripts/fake_ollama.py --port 11502 --latency-ms 200 --fail-rate 0.1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timezone
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+
+REPLY = "Σύμφωνα με τα έγγραφα, η απάντηση βρίσκεται στο σχετικό άρθρο του κανονισμού."
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _vector(text: str, dims: int) -> list:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    rng = random.Random(digest)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dims)]
+
+
+def create_app(args: argparse.Namespace) -> Starlette:
+    state = {"down": False, "requests": 0, "in_flight": 0, "failed": 0}
+
+    def unavailable():
+        if state["down"]:
+            return JSONResponse({"error": "fake outage"}, status_code=503)
+        if args.fail_rate and random.random() < args.fail_rate:
+            state["failed"] += 1
+            return JSONResponse({"error": "fake failure"}, status_code=500)
+        return None
+
+    async def tags(request: Request):
+        if state["down"]:
+            return JSONResponse({"error": "fake outage"}, status_code=503)
+        return JSONResponse({"models": [{"name": name, "model": name} for name in args.models]})
+
+    async def chat(request: Request):
+        error = unavailable()
+        if error is not None:
+            return error
+        body = await request.json()
+        model = body.get("model", "fake")
+        limit = (body.get("options") or {}).get("num_predict") or args.tokens
+        words = [f"{word} " for word in REPLY.split()]
+        words = (words * (limit // len(words) + 1))[: max(1, min(limit, args.tokens))]
+        if args.name:
+            words[0] = f"[{args.name}] {words[0]}"
+
+        def message(content: str, done: bool) -> dict:
+            msg = {
+                "model": model,
+                "created_at": _now(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+            if done:
+                msg["done_reason"] = "stop"
+            return msg
+
+        state["requests"] += 1
+        state["in_flight"] += 1
+        if not body.get("stream", True):
+            try:
+                await asyncio.sleep(args.latency_ms / 1000 + len(words) * args.token_ms / 1000)
+            finally:
+                state["in_flight"] -= 1
+            return JSONResponse(message("".join(words), True))
+
+        async def stream():
+            try:
+                await asyncio.sleep(args.latency_ms / 1000)
+                for word in words:
+                    yield json.dumps(message(word, False), ensure_ascii=False) + "\n"
+                    await asyncio.sleep(args.token_ms / 1000)
+                yield json.dumps(message("", True)) + "\n"
+            finally:
+                state["in_flight"] -= 1
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    async def embed(request: Request):
+        error = unavailable()
+        if error is not None:
+            return error
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        state["requests"] += 1
+        state["in_flight"] += 1
+        try:
+            await asyncio.sleep(args.latency_ms / 1000)
+        finally:
+            state["in_flight"] -= 1
+        return JSONResponse({
+            "model": body.get("model", "fake"),
+            "embeddings": [_vector(text, args.dims) for text in inputs],
+        })
+
+    async def down(request: Request):
+        state["down"] = True
+        return JSONResponse({"down": True})
+
+    async def up(request: Request):
+        state["down"] = False
+        return JSONResponse({"down": False})
+
+    async def stats(request: Request):
+        return JSONResponse(state)
+
+    return Starlette(routes=[
+        Route("/api/tags", tags, methods=["GET"]),
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/embed", embed, methods=["POST"]),
+        Route("/fake/down", down, methods=["POST"]),
+        Route("/fake/up", up, methods=["POST"]),
+        Route("/fake/stats", stats, methods=["GET"]),
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--name", default="", help="tag prefixed to every reply")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=10.0, help="delay between tokens")
+    parser.add_argument("--tokens", type=int, default=64, help="maximum tokens per reply")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--dims", type=int, default=384, help="embedding size")
+    parser.add_argument(
+        "--models",
+        nargs="*",
+        default=["gpt-oss:20b", "mistral-nemo", "all-minilm:l6-v2"],
+        help="models listed by /api/tags",
+    )
+    args = parser.parse_args()
+
+    print(f"🧪 Fake Ollama on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ Run this to index documents from the corpus directory
 
 from __future__ import annotations
 
+import argparse
 import sys
 import os
 from pathlib import Path
@@ -15,7 +16,31 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.services.rag_service import RAGService
 
 
+def print_stats(stats) -> None:
+    """Print per-stage throughput of the ingestion pipeline."""
+    print(
+        f"📁 Files: {len(stats.chunk_ids)} ingested, {stats.files_skipped} unchanged, "
+        f"{stats.files_removed} removed ({stats.chunks_deleted} stale chunks deleted)"
+    )
+    if stats.ann_built:
+        print("🧭 Approximate (IVF) index rebuilt")
+    print(f"⏱  Total: {stats.wall_seconds:.1f}s")
+    for stage in stats.stages:
+        print(
+            f"   {stage.name:<6} {stage.items:>8} {stage.unit:<8} "
+            f"in {stage.seconds:7.1f}s  →  {stage.rate:8.1f} {stage.unit}/s"
+        )
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Index the corpus directory")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="re-ingest every file, ignoring the content-hash manifest",
+    )
+    args = parser.parse_args()
+
     env_cfg = os.getenv("RAG_CONFIG_PATH") or os.getenv("CONFIG_PATH")
     if env_cfg:
         config_path = Path(env_cfg).expanduser().resolve()
@@ -28,8 +53,9 @@ def main() -> None:
     
     try:
         service = RAGService(config_path)
-        service.ingest_corpus()
+        stats = service.ingest_corpus(full=args.full)
         print("✓ Ingestion complete!")
+        print_stats(stats)
         
     except FileNotFoundError as e:
         print(f"❌ Error: {e}")
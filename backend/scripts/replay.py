@@ -0,0 +1,188 @@
+"""
+Replay questions captured by the query log against the current build.
+
+Reads the JSONL written by the ``query_log`` section (rotated files
+included when passed), re-answers every logged question through an
+in-process QueryOrchestrator and compares the result with what was
+logged: p50/p95 per stage, how many route labels changed and how much the
+retrieved chunks overlap. Only records logged with ``include_question``
+(off by default) carry the question text and can be replayed.
+
+    python scripts/replay.py data/logs/queries.jsonl* --concurrency 4
+
+--speed 1 keeps the original arrival times (2 = twice as fast); the
+default sends the questions back to back. With --max-regression 1.2 the
+exit status is 1 when the replayed p95 total is over 1.2x the logged one.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import aclosing
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add backend to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.query_orchestrator import QueryOrchestrator
+
+
+def load_records(paths: List[str], statuses: List[str], include_cached: bool) -> List[Dict]:
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # half-written line at a rotation boundary
+                if record.get("type") != "query" or not record.get("question"):
+                    continue
+                if record.get("status") not in statuses:
+                    continue
+                if record.get("cached") and not include_cached:
+                    continue
+                records.append(record)
+    records.sort(key=lambda r: r.get("ts", 0.0))
+    return records
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def overlap(before: List, after: List) -> Optional[float]:
+    """Jaccard overlap of two chunk ID lists (None when both are empty)."""
+    a, b = set(before), set(after)
+    if not a and not b:
+        return None
+    return len(a & b) / len(a | b)
+
+
+async def replay_one(orchestrator: QueryOrchestrator, record: Dict) -> Dict:
+    started = time.perf_counter()
+    plan = None
+    try:
+        plan = await orchestrator.aplan_question(record["question"])
+        async with aclosing(orchestrator.astream_plan(plan)) as stream:
+            async for _ in stream:
+                pass
+        status = "ok"
+    except Exception as exc:
+        print(f"   ❌ {record.get('question_hash')}: {exc}")
+        status = "error"
+    timings = dict(plan.timings) if plan is not None else {}
+    timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+    return {
+        "status": status,
+        "label": plan.label if plan is not None else None,
+        "chunk_ids": [meta.get("chunk_id") for meta in plan.metas] if plan is not None else [],
+        "timings": timings,
+    }
+
+
+async def replay(orchestrator: QueryOrchestrator, records: List[Dict], concurrency: int, speed: float) -> List[Dict]:
+    results: List[Optional[Dict]] = [None] * len(records)
+    slots = asyncio.Semaphore(concurrency)
+    first_ts = records[0].get("ts", 0.0)
+    started = time.monotonic()
+
+    async def run(index: int, record: Dict) -> None:
+        if speed > 0:
+            delay = (record.get("ts", first_ts) - first_ts) / speed
+            await asyncio.sleep(max(0.0, delay - (time.monotonic() - started)))
+        async with slots:
+            results[index] = await replay_one(orchestrator, record)
+
+    try:
+        await asyncio.gather(*(run(i, r) for i, r in enumerate(records)))
+    finally:
+        await orchestrator.rag_service.llm_registry.aclose()
+    return results
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def report(records: List[Dict], results: List[Dict]) -> Dict[str, Optional[float]]:
+    stages = []
+    for item in records + results:
+        for stage in item["timings"]:
+            if stage not in stages and stage != "total":
+                stages.append(stage)
+    stages.append("total")
+
+    print(f"   {'stage':<18} {'log p50':>10} {'log p95':>10} {'now p50':>10} {'now p95':>10} {'p95 x':>7}")
+    p95 = {}
+    for stage in stages:
+        before = [r["timings"][stage] for r in records if stage in r["timings"]]
+        after = [r["timings"][stage] for r in results if r["status"] == "ok" and stage in r["timings"]]
+        b95, a95 = percentile(before, 0.95), percentile(after, 0.95)
+        ratio = f"{a95 / b95:7.2f}" if b95 and a95 is not None else f"{'-':>7}"
+        print(f"   {stage:<18} {_fmt(percentile(before, 0.5))} {_fmt(b95)} "
+              f"{_fmt(percentile(after, 0.5))} {_fmt(a95)} {ratio}")
+        p95[stage] = a95 / b95 if b95 and a95 is not None else None
+
+    errors = sum(1 for r in results if r["status"] != "ok")
+    changed = sum(1 for b, a in zip(records, results) if a["status"] == "ok" and a["label"] != b.get("label"))
+    overlaps = [
+        o for b, a in zip(records, results)
+        if a["status"] == "ok" and (o := overlap(b.get("chunk_ids", []), a["chunk_ids"])) is not None
+    ]
+    line = f"   errors: {errors}/{len(results)}   label changed: {changed}"
+    if overlaps:
+        line += f"   chunk overlap: {sum(overlaps) / len(overlaps):.2f}"
+    print(line)
+    return p95
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("logs", nargs="+", help="query log files (JSONL)")
+    parser.add_argument("--config", default=str(Path(__file__).parent.parent / "config" / "config.yml"))
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=0.0, help="0 = back to back")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--status", nargs="+", default=["ok"], help="logged statuses to replay")
+    parser.add_argument("--include-cached", action="store_true", help="also replay answers served from cache")
+    parser.add_argument("--no-cache", action="store_true", help="disable the answer cache while replaying")
+    parser.add_argument("--max-regression", type=float, default=0.0, help="fail over this p95 total ratio")
+    args = parser.parse_args()
+
+    records = load_records(args.logs, args.status, args.include_cached)
+    if args.limit:
+        records = records[: args.limit]
+    if not records:
+        print("❌ No replayable query records (is include_question enabled?)")
+        sys.exit(1)
+
+    orchestrator = QueryOrchestrator(args.config)
+    if args.no_cache:
+        orchestrator.answer_cache = None
+    print(f"📊 Replaying {len(records)} questions x{args.concurrency}"
+          + (f" at {args.speed}x" if args.speed > 0 else ""))
+    results = asyncio.run(replay(orchestrator, records, args.concurrency, args.speed))
+    p95 = report(records, results)
+
+    ratio = p95.get("total")
+    if args.max_regression and ratio is not None and ratio > args.max_regression:
+        print(f"❌ p95 total is {ratio:.2f}x the logged one (limit {args.max_regression}x)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
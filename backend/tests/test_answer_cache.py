@@ -0,0 +1,69 @@
+"""Tests for the exact and semantic answer cache."""
+
+from types import SimpleNamespace
+
+from app.services import answer_cache
+from app.services.answer_cache import AnswerCache, build_answer_cache
+from app.services.manifest import IndexGeneration
+
+
+def _put(cache, question, vector=None, generation=None):
+    cache.put(question, f"answer: {question}", "rag", "NEED_RAG", [], [], [],
+              vector=vector, generation=generation)
+
+
+def _cache(tmp_path, **kwargs):
+    return AnswerCache(IndexGeneration(tmp_path / "generation"), **kwargs)
+
+
+def test_exact_lookup_normalizes_case_and_whitespace(tmp_path):
+    cache = _cache(tmp_path)
+    _put(cache, "Τι λέει το  Άρθρο 12;")
+
+    assert cache.get_exact("τι λέει το άρθρο 12;").answer == "answer: Τι λέει το  Άρθρο 12;"
+    assert cache.get_exact("Τι λέει το Άρθρο 13;") is None
+
+
+def test_similar_lookup_respects_the_threshold(tmp_path):
+    cache = _cache(tmp_path, similarity_threshold=0.9)
+    _put(cache, "q", vector=[1.0, 0.0])
+
+    assert cache.get_similar([0.99, 0.05]).question == "q"
+    assert cache.get_similar([0.6, 0.8]) is None
+    assert cache.get_similar([1.0, 0.0, 0.0]) is None
+    stats = cache.stats()
+    assert (stats["semantic_hits"], stats["misses"]) == (1, 2)
+
+
+def test_entries_expire_and_lru_is_evicted(tmp_path, monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    cache = _cache(tmp_path, max_entries=2, ttl_seconds=10)
+    _put(cache, "a")
+    _put(cache, "b")
+    cache.get_exact("a")
+    _put(cache, "c")
+    assert cache.get_exact("b") is None
+    assert cache.get_exact("a") is not None
+
+    clock.now += 11
+    assert cache.get_exact("c") is None
+
+
+def test_generation_bump_drops_entries_and_stale_puts(tmp_path):
+    generation = IndexGeneration(tmp_path / "generation")
+    cache = AnswerCache(generation)
+    before = cache.current_generation()
+    _put(cache, "a")
+
+    generation.bump()
+    assert cache.get_exact("a") is None
+    _put(cache, "b", generation=before)
+    assert cache.get_exact("b") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_build_answer_cache_is_off_by_default(tmp_path):
+    generation = IndexGeneration(tmp_path / "generation")
+    assert build_answer_cache(None, generation) is None
+    assert build_answer_cache({"enabled": True, "max_entries": 5}, generation).max_entries == 5
@@ -0,0 +1,155 @@
+"""Tests for the circuit breaker state machine."""
+
+import asyncio
+
+import pytest
+
+from app.services import circuit_breaker
+from app.services.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpen,
+    build_breakers,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    return clock
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("dep", failure_threshold=3, reset_seconds=10.0)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.stats()["consecutive_failures"] == 0
+
+    trip(breaker)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.call(lambda: "not called")
+    assert breaker.stats()["opened"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_admits_one_trial(clock):
+    breaker = CircuitBreaker("dep", failure_threshold=1, reset_seconds=10.0)
+    trip(breaker)
+    clock.now += 10.0
+    assert breaker.state == HALF_OPEN
+
+    breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("dep", failure_threshold=2, reset_seconds=10.0)
+    trip(breaker)
+    clock.now += 10.0
+
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == OPEN
+    clock.now += 9.0
+    assert breaker.state == OPEN
+    clock.now += 1.0
+    assert breaker.state == HALF_OPEN
+
+
+def test_errors_that_are_not_failures_release_the_trial(clock):
+    breaker = CircuitBreaker(
+        "dep", failure_threshold=1, reset_seconds=10.0,
+        is_failure=lambda exc: not isinstance(exc, ValueError),
+    )
+    trip(breaker)
+    clock.now += 10.0
+
+    def bad_request():
+        raise ValueError("caller error")
+
+    with pytest.raises(ValueError):
+        breaker.call(bad_request)
+    assert breaker.state == HALF_OPEN
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_probe_closes_only_when_half_open(clock):
+    breaker = CircuitBreaker("dep", failure_threshold=1, reset_seconds=10.0)
+    trip(breaker)
+    breaker.record_probe()
+    assert breaker.state == OPEN
+
+    clock.now += 10.0
+    breaker.record_probe()
+    assert breaker.state == CLOSED
+
+    breaker.record_probe(ConnectionError("down"))
+    assert breaker.state == OPEN
+
+
+def test_async_stream_counts_first_item_as_success(clock):
+    breaker = CircuitBreaker("dep", failure_threshold=1, reset_seconds=10.0)
+    trip(breaker)
+    clock.now += 10.0
+
+    async def tokens():
+        yield "a"
+        yield "b"
+
+    async def consume():
+        return [item async for item in breaker.astream(tokens)]
+
+    assert asyncio.run(consume()) == ["a", "b"]
+    assert breaker.state == CLOSED
+
+
+def test_acall_timeout_counts_as_failure():
+    breaker = CircuitBreaker("dep", failure_threshold=1, timeout=0.01)
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(breaker.acall(slow))
+    assert breaker.state == OPEN
+
+
+def test_build_breakers_merges_defaults():
+    breakers = build_breakers({
+        "enabled": True,
+        "failure_threshold": 4,
+        "ollama": {"reset_seconds": 5},
+        "weaviate": {"failure_threshold": 2},
+    })
+
+    assert breakers["ollama"].failure_threshold == 4
+    assert breakers["ollama"].reset_seconds == 5
+    assert breakers["weaviate"].failure_threshold == 2
+    assert build_breakers({"enabled": False}) == {}
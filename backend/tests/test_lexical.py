@@ -0,0 +1,41 @@
+"""Tests for the Greek BM25 index and reciprocal rank fusion."""
+
+from app.services.lexical import LexicalIndex, greek_analyzer, reciprocal_rank_fusion
+
+
+def test_greek_analyzer_folds_accents_and_final_sigma():
+    assert greek_analyzer("Ο Νόμος ΝΟΜΟΣ") == ["ο", "νομοσ", "νομοσ"]
+
+
+def test_search_matches_unaccented_query(tmp_path):
+    index = LexicalIndex(str(tmp_path))
+    index.add(["a", "b"], ["Άρθρο 12 του νόμου", "Κανονισμός υπηρεσίας"], [{}, {}])
+    index.persist()
+
+    hits = index.search("αρθρο 12", 5)
+
+    assert [meta["chunk_id"] for _, _, meta in hits] == ["a"]
+    assert 0 < hits[0][1] <= 1.0
+
+
+def test_rrf_keeps_vector_score_when_lexical_copy_wins():
+    vector_hit = ("text", 0.55, {"chunk_id": "c1", "vector_score": 0.55})
+    lexical_hit = ("text", 0.9, {"chunk_id": "c1"})
+
+    fused = reciprocal_rank_fusion([[vector_hit], [lexical_hit]])
+
+    assert len(fused) == 1
+    _, score, meta = fused[0]
+    assert score == 0.9
+    assert meta["vector_score"] == 0.55
+    assert "vector_score" not in lexical_hit[2]
+
+
+def test_rrf_orders_by_fused_rank():
+    a = ("a", 0.9, {"chunk_id": "a"})
+    b = ("b", 0.8, {"chunk_id": "b"})
+    c = ("c", 0.7, {"chunk_id": "c"})
+
+    fused = reciprocal_rank_fusion([[a, b], [b, c]], limit=2)
+
+    assert [meta["chunk_id"] for _, _, meta in fused] == ["b", "a"]
@@ -0,0 +1,67 @@
+"""Tests for the memory-mapped local vector index."""
+
+import numpy as np
+
+from app.services.local_index import LocalVectorIndex
+
+
+def _build(path, storage):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(10, 16)).astype(np.float32)
+    index = LocalVectorIndex(str(path), storage=storage)
+    ids = [str(i) for i in range(10)]
+    index.add(ids, [f"t{i}" for i in ids], [{} for _ in ids], vectors)
+    index.persist()
+    return index, vectors
+
+
+def test_quantized_search_skips_deleted_rows(tmp_path):
+    float_index, vectors = _build(tmp_path / "float32", "float32")
+    int8_index, _ = _build(tmp_path / "int8", "int8")
+    deleted = [str(i) for i in range(5)]
+    for index in (float_index, int8_index):
+        index.delete(deleted)
+
+    query = vectors[0] + 0.1 * vectors[7]
+    expected = [text for text, _, _ in float_index.search(query, 3)]
+    found = [text for text, _, _ in int8_index.search(query, 3)]
+
+    assert found == expected
+    assert not {f"t{i}" for i in deleted} & set(found)
+
+
+def test_persist_publishes_whole_snapshots(tmp_path):
+    index, vectors = _build(tmp_path, "int8")
+    reader = LocalVectorIndex(str(tmp_path), storage="int8")
+
+    for round_ in range(3):
+        index.add([f"n{round_}"], [f"new{round_}"], [{}], vectors[:1])
+        index.persist()
+
+    snapshots = sorted(p.name for p in tmp_path.glob("snapshot-*"))
+    assert len(snapshots) == 2
+    assert (tmp_path / "CURRENT").read_text() == snapshots[-1]
+
+    reader.load()
+    assert len(reader) == 13
+    found = reader.search(vectors[0], 4)
+    assert {text for text, _, _ in found} == {"t0", "new0", "new1", "new2"}
+
+
+def test_search_covers_pending_rows_without_copying_base(tmp_path):
+    for storage in ("float32", "int8"):
+        index, vectors = _build(tmp_path / storage, storage)
+        extra = np.random.default_rng(1).normal(size=(3, 16)).astype(np.float32)
+        index.add(["a", "b", "c"], ["ta", "tb", "tc"], [{}, {}, {}], extra)
+        index.delete(["1"])
+
+        assert isinstance(index._matrix(), np.memmap)
+        query = extra[1] + 0.2 * vectors[2]
+        found = [text for text, _, _ in index.search(query, 3)]
+        exact = [index._record(row)[1] for row, _ in index.search_rows(query, 3, exact=True)]
+        assert found == exact
+        assert found[0] == "tb"
+
+        index.persist()
+        assert len(index) == 12
+        assert [text for text, _, _ in index.search(query, 3)] == found
@@ -0,0 +1,87 @@
+"""Tests for the JSONL query log and the replay loader."""
+
+import json
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RequestLoggingMiddleware
+from app.services import query_log
+from app.services.query_log import build_query_log, log_query, question_hash, stop_query_log
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+import replay  # noqa: E402
+
+
+def _write(tmp_path, **cfg):
+    path = tmp_path / "queries.jsonl"
+    log = build_query_log({"enabled": True, "path": str(path), "access": False, **cfg})
+    try:
+        log_query("Τι λέει το Άρθρο 12;", "sse", "rag", "NEED_RAG",
+                  metas=[{"chunk_id": "c1"}], scores=[0.81234], timings={"total": 12.0})
+        log_query("slow", "ws", "rag", "NEED_RAG", timings={"total": 900.0})
+        log_query("broken", "ws", "none", "none", status="error")
+    finally:
+        stop_query_log(log)
+    return path, log, [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_records_carry_the_hash_but_not_the_question_by_default(tmp_path):
+    _, log, records = _write(tmp_path)
+
+    first = records[0]
+    assert first["question_hash"] == question_hash("Τι λέει το Άρθρο 12;")
+    assert "question" not in first
+    assert first["chunk_ids"] == ["c1"]
+    assert first["scores"] == [0.8123]
+    assert log.written == 3
+    assert query_log._active is None
+
+
+def test_sampling_keeps_errors_and_slow_answers(tmp_path):
+    _, log, records = _write(tmp_path, sample_rate=0.0, slow_ms=500)
+
+    assert [r["status"] for r in records] == ["ok", "error"]
+    assert records[0]["timings"]["total"] == 900.0
+    assert log.sampled_out == 1
+
+
+def test_replay_loads_only_records_with_questions(tmp_path):
+    without, _, _ = _write(tmp_path / "off")
+    with_question, _, _ = _write(tmp_path / "on", include_question=True)
+
+    assert replay.load_records([str(without)], ["ok"], include_cached=False) == []
+    records = replay.load_records([str(with_question)], ["ok", "error"], include_cached=False)
+    assert [r["question"] for r in records] == ["Τι λέει το Άρθρο 12;", "slow", "broken"]
+
+
+def test_replay_report_helpers():
+    assert replay.percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert replay.percentile([], 0.5) is None
+    assert replay.overlap(["a", "b"], ["b", "c"]) == 1 / 3
+    assert replay.overlap([], []) is None
+
+
+def test_access_records_only_while_the_access_log_runs(tmp_path, caplog):
+    app = FastAPI()
+    app.add_middleware(RequestLoggingMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    client = TestClient(app)
+    with caplog.at_level("DEBUG", logger="hermes.access"):
+        client.get("/ping")
+    assert not [r for r in caplog.records if r.name == "hermes.access"]
+
+    path = tmp_path / "access.jsonl"
+    log = build_query_log({"enabled": True, "path": str(path)})
+    try:
+        client.get("/ping")
+    finally:
+        stop_query_log(log)
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert (record["type"], record["path"], record["status"]) == ("access", "/ping", 200)
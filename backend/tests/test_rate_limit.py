@@ -0,0 +1,85 @@
+"""Tests for the token-bucket rate limiter."""
+
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import RateLimiter
+from app.core.security import create_access_token
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_bucket_empties_then_refills(clock):
+    limiter = RateLimiter(calls=2, period=10.0)
+
+    assert limiter.admit("a") == (True, 0.0)
+    assert limiter.admit("a") == (True, 0.0)
+    allowed, retry_after = limiter.admit("a")
+    assert not allowed
+    assert retry_after == pytest.approx(5.0)
+    # Other keys have their own bucket.
+    assert limiter.admit("b")[0]
+
+    clock.now += 5.0
+    assert limiter.admit("a")[0]
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_llm_token_debt_blocks_until_repaid(clock):
+    limiter = RateLimiter(calls=100, period=60.0, llm_tokens=100, llm_period=10.0)
+
+    assert limiter.admit("a")[0]
+    limiter.charge("a", 150)
+    allowed, retry_after = limiter.admit("a")
+    assert not allowed
+    # 50 tokens of debt plus one token at 10 tokens/s.
+    assert retry_after == pytest.approx(5.1)
+
+    clock.now += 5.1
+    assert limiter.admit("a")[0]
+    assert limiter.stats()["llm_tokens_charged"] == 150
+
+
+def test_idle_keys_are_forgotten(clock):
+    limiter = RateLimiter(calls=2, period=10.0)
+    limiter.admit("a")
+
+    clock.now += 10.0
+    limiter.admit("b")
+
+    assert limiter.stats()["keys"] == 1
+    assert limiter.stats()["evicted"] == 1
+
+
+def test_max_keys_evicts_least_recently_used(clock):
+    limiter = RateLimiter(calls=2, period=10.0, max_keys=2)
+    limiter.admit("a")
+    limiter.admit("b")
+    limiter.admit("a")
+    limiter.admit("c")
+
+    assert list(limiter._keys) == ["a", "c"]
+
+
+def test_key_prefers_token_subject_over_address():
+    limiter = RateLimiter()
+    token = create_access_token(data={"sub": "admin"})
+    scope = {"headers": [(b"authorization", f"Bearer {token}".encode())], "client": ("10.0.0.1", 1)}
+
+    assert limiter.key(scope) == "user:admin"
+    scope["headers"] = [(b"authorization", b"Bearer not-a-token")]
+    assert limiter.key(scope) == "ip:10.0.0.1"
+    assert limiter.key({"headers": []}) == "ip:unknown"
@@ -0,0 +1,135 @@
+"""Tests for per-model LLM admission control."""
+
+import asyncio
+
+import pytest
+
+from app.services.scheduler import (
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    AdmissionRejected,
+    LLMScheduler,
+    build_scheduler,
+    queue_listener,
+)
+
+
+def test_waiters_are_admitted_by_priority_then_fifo():
+    async def scenario():
+        scheduler = LLMScheduler(default_concurrency=1)
+        order = []
+        release = asyncio.Event()
+
+        async def call(name, priority):
+            async with scheduler.slot("m", priority):
+                order.append(name)
+                if name == "holder":
+                    await release.wait()
+
+        holder = asyncio.create_task(call("holder", PRIORITY_NORMAL))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(call("gen-1", PRIORITY_NORMAL)),
+            asyncio.create_task(call("gen-2", PRIORITY_NORMAL)),
+            asyncio.create_task(call("router", PRIORITY_HIGH)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.waiting() == 3
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, scheduler.stats()["m"]
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["holder", "router", "gen-1", "gen-2"]
+    assert stats["active"] == 0
+    assert stats["admitted"] == 4
+
+
+def test_waiting_past_the_deadline_is_rejected_and_frees_nothing():
+    async def scenario():
+        scheduler = LLMScheduler(default_concurrency=1, max_wait=0.01)
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("m"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            async with scheduler.slot("m"):
+                pass
+        stats = scheduler.stats()["m"]
+        release.set()
+        await holder
+        return stats, scheduler.stats()["m"]
+
+    during, after = asyncio.run(scenario())
+    assert during["active"] == 1
+    assert during["waiting"] == 0
+    assert during["rejected"] == 1
+    assert after["active"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = LLMScheduler(default_concurrency=1)
+        release = asyncio.Event()
+
+        async def hold():
+            async with scheduler.slot("m"):
+                await release.wait()
+
+        async def wait_for_slot():
+            async with scheduler.slot("m"):
+                pass
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(wait_for_slot())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        waiting = scheduler.waiting()
+        release.set()
+        await holder
+        return waiting, scheduler.stats()["m"]
+
+    waiting, stats = asyncio.run(scenario())
+    assert waiting == 0
+    assert stats["active"] == 0
+
+
+def test_queue_listener_receives_positions():
+    async def scenario():
+        scheduler = LLMScheduler(default_concurrency=1)
+        release = asyncio.Event()
+        positions = []
+
+        async def hold():
+            async with scheduler.slot("m"):
+                await release.wait()
+
+        async def listen():
+            queue_listener.set(positions.append)
+            async with scheduler.slot("m"):
+                pass
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        listener = asyncio.create_task(listen())
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, listener)
+        return positions
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_build_scheduler_reads_per_model_limits():
+    assert build_scheduler(None) is None
+    assert build_scheduler({"enabled": False}) is None
+    scheduler = build_scheduler({"enabled": True, "concurrency": {"big": 2}, "default_concurrency": 3})
+    assert scheduler.queue("big").concurrency == 2
+    assert scheduler.queue("other").concurrency == 3
@@ -0,0 +1,109 @@
+"""Tests for single-flight coalescing of identical questions."""
+
+import asyncio
+
+import pytest
+
+from app.services.metrics import COALESCED
+from app.services.single_flight import SingleFlight
+
+
+async def _tokens(gate: asyncio.Event, produced: list):
+    for token in ("a", "b", "c"):
+        if token == "c":
+            await gate.wait()
+        produced.append(token)
+        yield token
+
+
+def _set_event() -> asyncio.Event:
+    event = asyncio.Event()
+    event.set()
+    return event
+
+
+async def _read(flight):
+    flight.hold()
+    try:
+        return [token async for token in flight.subscribe()]
+    finally:
+        flight.release()
+
+
+def test_followers_share_one_producer_and_replay_the_log():
+    coalesced_before = COALESCED._values[()]
+
+    async def scenario():
+        registry = SingleFlight()
+        gate = asyncio.Event()
+        produced = []
+
+        flight, leader = registry.join("q")
+        same, follower = registry.join("q")
+        assert leader and not follower and same is flight
+
+        flight.start(lambda: _tokens(gate, produced))
+        first = asyncio.create_task(_read(flight))
+        await asyncio.sleep(0.01)
+        # A late joiner still receives the tokens already produced.
+        late = asyncio.create_task(_read(flight))
+        await asyncio.sleep(0)
+        flight.start(lambda: pytest.fail("second producer started"))
+        gate.set()
+        return await first, await late, produced, registry.stats()
+
+    first, late, produced, stats = asyncio.run(scenario())
+    assert first == late == ["a", "b", "c"]
+    assert produced == ["a", "b", "c"]
+    assert stats == {"in_flight": 0, "leaders": 1, "coalesced": 1}
+    assert COALESCED._values[()] == coalesced_before + 1
+
+
+def test_producer_is_cancelled_when_every_reader_leaves():
+    async def scenario():
+        registry = SingleFlight()
+        flight, _ = registry.join("q")
+        flight.start(lambda: _tokens(asyncio.Event(), []))
+        reader = asyncio.create_task(_read(flight))
+        await asyncio.sleep(0.01)
+        reader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await reader
+        await asyncio.sleep(0)
+        return flight, registry.stats()
+
+    flight, stats = asyncio.run(scenario())
+    assert flight.abandoned
+    assert flight.done
+    assert flight.holders == 0
+    assert stats["in_flight"] == 0
+
+
+def test_producer_error_reaches_every_reader():
+    async def failing():
+        yield "a"
+        raise ConnectionError("model went away")
+
+    async def scenario():
+        flight, _ = SingleFlight().join("q")
+        flight.start(failing)
+        return await asyncio.gather(_read(flight), _read(flight), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_finished_and_stale_flights_are_not_joined():
+    async def scenario():
+        registry = SingleFlight(max_age=10.0)
+        done, _ = registry.join("done")
+        done.start(lambda: _tokens(_set_event(), []))
+        await _read(done)
+        _, leader_after_done = registry.join("done")
+
+        stale, _ = registry.join("stale")
+        stale.created -= 11.0
+        _, leader_after_stale = registry.join("stale")
+        return leader_after_done, leader_after_stale
+
+    assert asyncio.run(scenario()) == (True, True)
@@ -0,0 +1,147 @@
+"""Tests for token batching and stream cancellation."""
+
+import asyncio
+from contextlib import aclosing
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.streaming import ClientDisconnected, FlushPolicy, query_events, read_events
+from app.services.metrics import CANCELLED_TOKENS, STREAMS
+from app.services.query_orchestrator import QueryOrchestrator, StreamStats
+
+
+async def _collect(events, policy):
+    return [event async for event in read_events(events, policy)]
+
+
+def _queue(*items):
+    events = asyncio.Queue()
+    for item in items:
+        events.put_nowait(item)
+    return events
+
+
+def test_first_batch_is_not_delayed_and_later_tokens_coalesce():
+    async def scenario():
+        events = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        seen = []
+
+        async def feed():
+            for token in "abcd":
+                events.put_nowait(("token", token))
+                await asyncio.sleep(0.005)
+            events.put_nowait(("end", None))
+
+        feeder = asyncio.create_task(feed())
+        async for kind, payload in read_events(events, FlushPolicy(interval=0.05, max_bytes=0)):
+            seen.append((payload, loop.time() - started))
+        await feeder
+        return seen
+
+    seen = asyncio.run(scenario())
+    assert [payload for payload, _ in seen] == ["a", "bcd"]
+    assert seen[0][1] < 0.02
+
+
+def test_byte_threshold_and_other_events_flush_the_batch():
+    events = _queue(
+        ("token", "aa"), ("token", "bb"), ("token", "cc"),
+        ("queued", 1), ("token", "d"), ("end", None),
+    )
+    policy = FlushPolicy(interval=0.05, max_bytes=4)
+
+    assert asyncio.run(_collect(events, policy)) == [
+        ("token", "aabb"), ("token", "cc"), ("queued", 1), ("token", "d"),
+    ]
+
+
+def test_batching_disabled_sends_one_frame_per_token():
+    events = _queue(("token", "a"), ("token", "b"), ("end", None))
+
+    assert asyncio.run(_collect(events, FlushPolicy(interval=0, max_bytes=0))) == [
+        ("token", "a"), ("token", "b"),
+    ]
+
+
+def test_error_and_disconnect_events_raise():
+    with pytest.raises(ValueError):
+        asyncio.run(_collect(_queue(("error", ValueError("boom"))), FlushPolicy()))
+    with pytest.raises(ClientDisconnected):
+        asyncio.run(_collect(_queue(("disconnected", None)), FlushPolicy()))
+
+
+class _Orchestrator:
+    """Plans instantly and streams until closed."""
+
+    def __init__(self) -> None:
+        self.closed = asyncio.Event()
+
+    async def aplan_question(self, question):
+        return SimpleNamespace(mode="rag")
+
+    async def astream_plan(self, plan):
+        try:
+            while True:
+                yield "token"
+                await asyncio.sleep(0.001)
+        finally:
+            self.closed.set()
+
+
+def test_closing_query_events_closes_the_model_stream():
+    async def scenario():
+        orchestrator = _Orchestrator()
+        async with aclosing(query_events(orchestrator, "q", FlushPolicy())) as stream:
+            async for kind, _ in stream:
+                if kind == "token":
+                    break
+        await asyncio.wait_for(orchestrator.closed.wait(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_client_disconnect_cancels_the_answer():
+    async def scenario():
+        orchestrator = _Orchestrator()
+        gone = asyncio.Event()
+        stream = query_events(orchestrator, "q", FlushPolicy(), wait_disconnect=gone.wait)
+        async with aclosing(stream):
+            with pytest.raises(ClientDisconnected):
+                async for kind, _ in stream:
+                    if kind == "token":
+                        gone.set()
+        await asyncio.wait_for(orchestrator.closed.wait(), 1)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_stream_counts_generated_tokens():
+    orchestrator = QueryOrchestrator.__new__(QueryOrchestrator)
+    orchestrator.stream_stats = StreamStats()
+    orchestrator.degradation = None
+
+    async def generate(plan):
+        for token in ("a", "b", "c"):
+            yield token
+
+    orchestrator._agenerate = generate
+    plan = SimpleNamespace(cached=True, mode="rag")
+    cancelled_before = STREAMS._values[("cancelled",)]
+    tokens_before = CANCELLED_TOKENS._values[()]
+
+    async def scenario():
+        async with aclosing(orchestrator._astream_plan(plan)) as stream:
+            async for _ in stream:
+                break
+        async with aclosing(orchestrator._astream_plan(plan)) as stream:
+            return [token async for token in stream]
+
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+    assert orchestrator.stream_stats.snapshot() == {
+        "completed": 1, "cancelled": 1, "cancelled_tokens": 1,
+    }
+    assert STREAMS._values[("cancelled",)] == cancelled_before + 1
+    assert CANCELLED_TOKENS._values[()] == tokens_before + 1
@@ -0,0 +1,88 @@
+"""Tests for request_id multiplexing on the chat WebSocket."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import query
+
+
+class _Orchestrator:
+    """Answers "slow" only when cancelled; any other question at once."""
+
+    cfg = {"streaming": {"flush_interval_ms": 0, "flush_bytes": 0, "ws_max_concurrent": 2}}
+
+    async def aplan_question(self, question):
+        return SimpleNamespace(
+            question=question, mode="rag", label="NEED_RAG", ctx_texts=[], scores=[], metas=[],
+            cached=False, timings={}, degradation_level=0, coalesced=False,
+        )
+
+    async def astream_plan(self, plan):
+        if plan.question == "slow":
+            await asyncio.Event().wait()
+        yield f"answer to {plan.question}"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(query.router, prefix="/api")
+    app.state.query_orchestrator = _Orchestrator()
+    return TestClient(app)
+
+
+def _until(ws, kind, request_id):
+    messages = []
+    while True:
+        message = ws.receive_json()
+        messages.append(message)
+        if message["type"] == kind and message["request_id"] == request_id:
+            return messages
+
+
+def test_answers_are_tagged_and_cancel_targets_one_request(client):
+    with client.websocket_connect("/api/ws/chat") as ws:
+        ws.send_json({"question": "slow", "request_id": "s"})
+        ws.send_json({"question": "fast", "request_id": 7})
+        messages = _until(ws, "done", "7")
+        assert {"type": "token", "content": "answer to fast", "request_id": "7"} in messages
+
+        ws.send_json({"type": "cancel", "request_id": "s"})
+        _until(ws, "cancelled", "s")
+
+
+def test_invalid_request_id_does_not_close_the_socket(client):
+    with client.websocket_connect("/api/ws/chat") as ws:
+        ws.send_json({"question": "slow", "request_id": "s"})
+        _until(ws, "sources", "s")
+        for bad in ([1], {"a": 1}, True):
+            ws.send_json({"question": "fast", "request_id": bad})
+            message = ws.receive_json()
+            assert message["type"] == "error"
+            assert message["request_id"] is None
+        ws.send_json({"type": "cancel", "request_id": [1]})
+        assert ws.receive_json()["type"] == "error"
+
+        ws.send_json({"question": "fast", "request_id": "f"})
+        _until(ws, "done", "f")
+        ws.send_json({"type": "cancel"})
+        _until(ws, "cancelled", "s")
+
+
+def test_duplicate_and_excess_requests_are_refused(client):
+    with client.websocket_connect("/api/ws/chat") as ws:
+        ws.send_json({"question": "slow", "request_id": "a"})
+        _until(ws, "sources", "a")
+        ws.send_json({"question": "slow", "request_id": "a"})
+        assert ws.receive_json() == {"type": "error", "content": "Duplicate request_id", "request_id": "a"}
+
+        ws.send_json({"question": "slow", "request_id": "b"})
+        _until(ws, "sources", "b")
+        ws.send_json({"question": "slow", "request_id": "c"})
+        message = ws.receive_json()
+        assert message["type"] == "error" and message["request_id"] == "c"
+        ws.send_json({"type": "cancel"})
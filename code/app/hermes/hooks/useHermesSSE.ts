@@ -7,6 +7,7 @@ type Handlers = {
   onToken: (content: string, mode?: string) => void
   onDone: (data?: any) => void
   onError: (msg: string) => void
+  onQueued?: (position: number) => void
 }
 
 export function useHermesSSE(backendUrl: string, handlers: Handlers) {
@@ -48,8 +49,53 @@ export function useHermesSSE(backendUrl: string, handlers: Handlers) {
         const decoder = new TextDecoder()
         let buffer = ""
         let currentEvent = ""
+        let dataLines: string[] = []
         let fullAnswer = "" // Accumulate the full answer
 
+        // Handle one complete SSE message (terminated by a blank line)
+        const dispatch = (event: string, data: string) => {
+          if (event === "queued") {
+            // Waiting for a free model slot
+            try {
+              handlersRef.current.onQueued?.(JSON.parse(data).position)
+            } catch (e) {
+              console.error("Failed to parse queue position:", e)
+            }
+          } else if (event === "sources") {
+            // Parse sources JSON
+            try {
+              const sources = JSON.parse(data)
+              handlersRef.current.onSources(sources, "rag")
+            } catch (e) {
+              console.error("Failed to parse sources:", e)
+            }
+          } else if (event === "done") {
+            // Parse done event
+            try {
+              const doneData = JSON.parse(data)
+              handlersRef.current.onDone(doneData)
+            } catch (e) {
+              handlersRef.current.onDone()
+            }
+            setIsLoading(false)
+          } else if (event === "error") {
+            // Handle error
+            try {
+              const errorData = JSON.parse(data)
+              handlersRef.current.onError(errorData.error || "Unknown error")
+            } catch (e) {
+              handlersRef.current.onError(data)
+            }
+            setIsLoading(false)
+          } else if (data && data !== "[DONE]") {
+            // Regular token batch (no event prefix means it's a token)
+            fullAnswer += data
+            // Send the FULL accumulated answer, not just the token
+            // This ensures smooth rendering without jumps
+            handlersRef.current.onToken(fullAnswer, "rag")
+          }
+        }
+
         while (true) {
           const { done, value } = await reader.read()
 
@@ -64,53 +110,22 @@ export function useHermesSSE(backendUrl: string, handlers: Handlers) {
             const line = buffer.slice(0, newlineIndex)
             buffer = buffer.slice(newlineIndex + 1)
 
-            // Skip empty lines (they mark end of SSE message)
-            if (!line.trim()) {
-              currentEvent = "" // Reset event type after empty line
+            // A blank line ends the message; multi-line data is joined with \n
+            if (line === "") {
+              if (dataLines.length) {
+                dispatch(currentEvent, dataLines.join("\n"))
+              }
+              currentEvent = ""
+              dataLines = []
               continue
             }
 
             // Parse SSE format
-            if (line.startsWith("event: ")) {
-              currentEvent = line.slice(7).trim()
-            } else if (line.startsWith("data: ")) {
-              const data = line.slice(6)
-
-              if (currentEvent === "sources") {
-                // Parse sources JSON
-                try {
-                  const sources = JSON.parse(data)
-                  handlersRef.current.onSources(sources, "rag")
-                } catch (e) {
-                  console.error("Failed to parse sources:", e)
-                }
-              } else if (currentEvent === "done") {
-                // Parse done event
-                try {
-                  const doneData = JSON.parse(data)
-                  handlersRef.current.onDone(doneData)
-                } catch (e) {
-                  handlersRef.current.onDone()
-                }
-                setIsLoading(false)
-              } else if (currentEvent === "error") {
-                // Handle error
-                try {
-                  const errorData = JSON.parse(data)
-                  handlersRef.current.onError(errorData.error || "Unknown error")
-                } catch (e) {
-                  handlersRef.current.onError(data)
-                }
-                setIsLoading(false)
-              } else {
-                // Regular token data (no event prefix means it's a token)
-                if (data && data !== "[DONE]") {
-                  fullAnswer += data
-                  // Send the FULL accumulated answer, not just the token
-                  // This ensures smooth rendering without jumps
-                  handlersRef.current.onToken(fullAnswer, "rag")
-                }
-              }
+            if (line.startsWith("event:")) {
+              currentEvent = line.slice(6).trim()
+            } else if (line.startsWith("data:")) {
+              const data = line.slice(5)
+              dataLines.push(data.startsWith(" ") ? data.slice(1) : data)
             }
           }
         }
@@ -1,10 +1,17 @@
 import { useEffect, useRef, useState } from "react"
 
 type Handlers = {
-  onSources: (sources: string[], mode?: string) => void
-  onToken: (content: string, mode?: string) => void
-  onDone: () => void
-  onError: (msg: string) => void
+  onSources: (sources: string[], mode?: string, requestId?: string) => void
+  onToken: (content: string, mode?: string, requestId?: string) => void
+  onDone: (requestId?: string) => void
+  onError: (msg: string, requestId?: string) => void
+  onQueued?: (position: number, requestId?: string) => void
+}
+
+// Per-question state; several questions can stream on one socket
+type Stream = {
+  mode?: string
+  answer: string
 }
 
 export function useHermesWS(backendUrl: string, handlers: Handlers) {
@@ -12,6 +19,8 @@ export function useHermesWS(backendUrl: string, handlers: Handlers) {
   const [isConnected, setIsConnected] = useState(false)
   const [isLoading, setIsLoading] = useState(false)
   const reconnectAttempts = useRef(0)
+  const streams = useRef(new Map<string, Stream>())
+  const nextId = useRef(0)
   const maxReconnectAttempts = 3
   const handlersRef = useRef<Handlers>(handlers)
 
@@ -36,6 +45,8 @@ export function useHermesWS(backendUrl: string, handlers: Handlers) {
 
         socket.onclose = () => {
           setIsConnected(false)
+          streams.current.clear()
+          setIsLoading(false)
           reconnectAttempts.current += 1
           setTimeout(connect, 3000)
         }
@@ -47,19 +58,42 @@ export function useHermesWS(backendUrl: string, handlers: Handlers) {
         socket.onmessage = (event) => {
           const data = JSON.parse(event.data)
           const h = handlersRef.current
-          if (data.type === "sources") {
-            h.onSources(data.sources || [], data.mode)
+          const id: string | undefined = data.request_id
+          const stream = id !== undefined ? streams.current.get(id) : undefined
+          if (id !== undefined && !stream) {
+            // Stopped locally; drop what was already in flight
+            return
+          }
+          const finish = () => {
+            if (id !== undefined) streams.current.delete(id)
+            setIsLoading(streams.current.size > 0)
+          }
+          if (data.type === "queued") {
+            h.onQueued?.(data.position, id)
+          } else if (data.type === "sources") {
+            // mode/label are sent once per answer, with the sources
+            if (stream) {
+              stream.mode = data.mode
+              stream.answer = ""
+            }
+            h.onSources(data.sources || [], data.mode, id)
           } else if (data.type === "token") {
-            h.onToken(data.content, data.mode)
-            if (data.mode !== "rag") {
-              setIsLoading(false)
+            // Token batches are incremental; hand over the full answer like SSE
+            const mode = data.mode ?? stream?.mode
+            const answer = (stream?.answer ?? "") + data.content
+            if (stream) stream.answer = answer
+            h.onToken(answer, mode, id)
+            if (mode !== "rag") {
+              finish()
             }
+          } else if (data.type === "cancelled") {
+            finish()
           } else if (data.type === "done") {
-            setIsLoading(false)
-            h.onDone()
+            finish()
+            h.onDone(id)
           } else if (data.type === "error") {
-            setIsLoading(false)
-            h.onError(data.content || "Σφάλμα backend")
+            finish()
+            h.onError(data.content || "Σφάλμα backend", id)
           }
         }
 
@@ -80,8 +114,10 @@ export function useHermesWS(backendUrl: string, handlers: Handlers) {
     setIsLoading(true)
 
     if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify({ question }))
-      return
+      const requestId = `q${++nextId.current}`
+      streams.current.set(requestId, { answer: "" })
+      ws.send(JSON.stringify({ question, request_id: requestId }))
+      return requestId
     }
 
     // REST fallback
@@ -106,10 +142,16 @@ export function useHermesWS(backendUrl: string, handlers: Handlers) {
     }
   }
 
-  const stopGeneration = () => {
-    setIsLoading(false)
+  // Cancels one question, or every question on the socket without an id
+  const stopGeneration = (requestId?: string) => {
+    if (requestId === undefined) {
+      streams.current.clear()
+    } else {
+      streams.current.delete(requestId)
+    }
+    setIsLoading(streams.current.size > 0)
     if (ws && ws.readyState === WebSocket.OPEN) {
-      ws.send(JSON.stringify({ type: "stop" }))
+      ws.send(JSON.stringify(requestId === undefined ? { type: "cancel" } : { type: "cancel", request_id: requestId }))
     }
   }
 
@@ -46,6 +46,10 @@ export default function HermesChat() {
   const wsHandlers = useMemo(
     () => ({
       onSources: (sources: string[], mode?: string) => {
+        // Planning finished: drop the queue placeholder before tokens arrive
+        updateAssistantMessage(currentConversationId, (msg) =>
+          msg.mode === "queued" ? { ...msg, content: "" } : msg,
+        )
         setSources(currentConversationId, sources, mode)
       },
       onToken: (content: string, mode?: string) => {
@@ -54,13 +58,21 @@ export default function HermesChat() {
         updateAssistantMessage(currentConversationId, (msg) => {
           // SSE sends full content, WS sends incremental tokens
           // Check if this looks like a full replacement (longer than current + token)
-          const isFullContent = content.length > msg.content.length + 50 || msg.content === ""
+          const isFullContent = content.length > msg.content.length + 50 || msg.content === "" || msg.mode === "queued"
           if (isFullContent || mode === "rag") {
             return { ...msg, content, mode }
           }
           return { ...msg, content: msg.content + content, mode }
         })
       },
+      onQueued: (position: number) => {
+        // Placeholder until the first token replaces it
+        updateAssistantMessage(currentConversationId, (msg) =>
+          msg.content && msg.mode !== "queued"
+            ? msg
+            : { ...msg, content: `Σε αναμονή — θέση ${position} στην ουρά…`, mode: "queued" },
+        )
+      },
       onDone: () => {},
       onError: (msg: string) => {
         updateAssistantMessage(currentConversationId, (m) => ({ ...m, content: `Σφάλμα: ${msg}`, mode: "error" }))
@@ -237,7 +249,7 @@ export default function HermesChat() {
                     size="icon"
                     variant="destructive"
                     className="shrink-0 h-10 w-10"
-                    onClick={stopGeneration}
+                    onClick={() => stopGeneration()}
                   >
                     <Square className="h-4 w-4" />
                   </Button>